@@ -0,0 +1,124 @@
+import os
+import re
+import json
+import asyncio
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+import llm_client
+import structured_log
+
+# Load environment variables
+load_dotenv()
+
+log = structured_log.get_logger("batching")
+
+# Batch settings (override via .env)
+LLM_BATCH_SIZE = int(os.getenv('LLM_BATCH_SIZE', '20'))
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '1000'))
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '32'))
+
+BATCH_PROMPT_SUFFIX = (
+    "\n\nYou will receive a JSON array of user queries instead of a single query. "
+    "Return a JSON array with exactly one criteria object per query, in the same order. "
+    "Use {} for a query with no criteria. Return only the JSON array, no other text."
+)
+
+# Markdown code fence some models wrap JSON replies in
+FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$", flags=re.MULTILINE)
+
+# Criteria extracted up front for the current batch, keyed by query; call_llm checks it first
+prefetched_criteria: ContextVar[Optional[Dict[str, dict]]] = ContextVar("prefetched_criteria", default=None)
+
+class BatchError(ValueError):
+    """Raised for malformed batch payloads; agents turn it into a 400."""
+
+def parse_criteria(content: str):
+    """Parse an LLM criteria reply, with or without a ```json fence; raises ValueError on bad JSON."""
+    return json.loads(FENCE_PATTERN.sub("", content.strip()))
+
+def parse_batch_items(body: Dict) -> List[Dict]:
+    """Validate a batch payload {"requests": [{"id": ..., "query": ..., ...}, ...]} and assign missing ids."""
+    items = body.get("requests")
+    if not isinstance(items, list) or not items:
+        raise BatchError("Batch payload needs a non-empty 'requests' list.")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise BatchError(f"Batch has {len(items)} requests; the limit is {BATCH_MAX_ITEMS}.")
+    parsed = []
+    seen = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise BatchError(f"Batch request {index} is not an object.")
+        item_id = str(item.get("id", index))
+        if item_id in seen:
+            raise BatchError(f"Duplicate batch request id {item_id!r}.")
+        seen.add(item_id)
+        parsed.append({**item, "id": item_id})
+    return parsed
+
+def item_error(item: Dict) -> Optional[str]:
+    """Why a batch item cannot run, or None; reported as that item's error instead of failing the batch."""
+    query = item.get("query")
+    if query is not None and not isinstance(query, str):
+        return "query must be a string."
+    employee_ids = item.get("employee_ids")
+    if employee_ids is not None and (
+            not isinstance(employee_ids, list)
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in employee_ids)):
+        return "employee_ids must be a list of integer ids."
+    return None
+
+def batch_queries(items: List[Dict]) -> List[str]:
+    """Queries of the valid items, for criteria extraction up front."""
+    return [item["query"] for item in items if item.get("query") and item_error(item) is None]
+
+async def extract_criteria_batch(queries: List[str], prompt: str, model: str, temperature: float) -> Dict[str, dict]:
+    """Extract criteria for many queries with one LLM request per LLM_BATCH_SIZE queries.
+
+    Chunks run concurrently. A chunk whose response cannot be matched back to its
+    queries is dropped, so those queries fall through to the per-query call_llm.
+    """
+    chunks = [queries[i:i + LLM_BATCH_SIZE] for i in range(0, len(queries), LLM_BATCH_SIZE)]
+    extracted = await asyncio.gather(*(_extract_chunk(chunk, prompt, model, temperature) for chunk in chunks))
+    criteria_by_query = {}
+    for chunk_result in extracted:
+        criteria_by_query.update(chunk_result)
+    return criteria_by_query
+
+async def _extract_chunk(chunk: List[str], prompt: str, model: str, temperature: float) -> Dict[str, dict]:
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": prompt + BATCH_PROMPT_SUFFIX},
+            {"role": "user", "content": json.dumps(chunk)}
+        ],
+        "temperature": temperature
+    }
+    try:
+        data = await llm_client.post_chat(payload)
+        results = parse_criteria(data["choices"][0]["message"]["content"])
+    except Exception as e:
+        log.warning("Batch LLM extraction failed for %d queries: %s", len(chunk), e)
+        return {}
+    if not isinstance(results, list) or len(results) != len(chunk):
+        log.warning("Batch LLM extraction returned %s items for %d queries", len(results) if isinstance(results, list) else "no", len(chunk))
+        return {}
+    return {query: criteria for query, criteria in zip(chunk, results) if isinstance(criteria, dict)}
+
+async def run_batch(items: List[Dict], handler: Callable[[Dict], Awaitable[Dict]],
+                    concurrency: int = BATCH_CONCURRENCY) -> Dict[str, Dict]:
+    """Run `handler` over the valid batch items concurrently; results and per-item errors are keyed by item id."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(item: Dict):
+        error = item_error(item)
+        if error is not None:
+            return item["id"], {"error": error}
+        async with semaphore:
+            try:
+                return item["id"], await handler(item)
+            except Exception as e:
+                detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+                return item["id"], {"error": detail}
+
+    return dict(await asyncio.gather(*(run_one(item) for item in items)))
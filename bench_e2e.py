@@ -0,0 +1,237 @@
+"""Offline end-to-end load benchmark.
+
+Starts the stub LLM (stub_llm.py) and both agents against it, drives concurrent load at
+/tasks/send, /hr-tasks/send and the client_agent_v4.route_query_to_agent pipeline, and
+reports p50/p95/p99 latency, throughput and error rate per target. Results are saved as
+JSON (with the git commit) so runs can be compared with --compare.
+
+    python bench_e2e.py --requests 500 --concurrency 32 --llm-latency-ms 200 --out bench_e2e.json
+    python bench_e2e.py --compare bench_e2e_main.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+import httpx
+
+API_KEY = "dummy-dekallm-key"
+EMPLOYEE_PORT = 8000  # client_agent_v4 calls the agents on these fixed ports
+HR_PORT = 8001
+
+EMPLOYEE_PAYLOADS = [
+    {"query": "find employee with ID 5"},
+    {"query": "employees in Japan"},
+    {"query": "who is Alice Smith"},
+    {"query": "all employees", "limit": 20},
+    {"query": "who is the HR Manager"}
+]
+
+HR_PAYLOADS = [
+    {"query": "ID 3", "query_type": "salary"},
+    {"query": "who reports to the CTO", "query_type": "subtree"},
+    {"query": "median salary by country", "query_type": "salary_analytics"},
+    {"query": "Alice Smith schedule", "query_type": "schedule"},
+    {"employee_ids": [1, 2, 3], "query_type": "general"}
+]
+
+PIPELINE_QUERIES = [
+    "what is Alice Smith's salary",
+    "who has the highest salary",
+    "employees in Japan",
+    "who reports to the CTO",
+    "median salary by country"
+]
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize(latencies_ms: List[float], errors: int, elapsed_s: float) -> Dict:
+    ordered = sorted(latencies_ms)
+    total = len(latencies_ms)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed_s, 2) if elapsed_s else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "mean_ms": round(sum(ordered) / total, 2) if total else 0.0,
+        "elapsed_s": round(elapsed_s, 3)
+    }
+
+async def drive(call: Callable[[int], Awaitable[bool]], requests: int, concurrency: int) -> Dict:
+    """Run `call(i)` for i in range(requests) with `concurrency` workers; call returns True on success."""
+    latencies, errors = [], 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+def start_process(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+async def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url, timeout=1)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+async def run_benchmark(args) -> Dict:
+    llm_url = f"http://127.0.0.1:{args.llm_port}/v1/chat/completions"
+    env = {
+        **os.environ,
+        "API_URL": llm_url,
+        "API_KEY": "stub",
+        "MODEL": "stub-model",
+        "STUB_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "STUB_LLM_JITTER_MS": str(args.llm_jitter_ms),
+        "HR_DATASET": args.dataset
+    }
+    if not args.llm_cache:
+        env.update({"LLM_CACHE_SIZE": "0", "LLM_CACHE_DB": ""})
+    # The in-process pipeline reads the same settings at import time
+    os.environ.update({k: env[k] for k in ("API_URL", "API_KEY", "MODEL", "HR_DATASET")})
+    if not args.llm_cache:
+        os.environ.update({"LLM_CACHE_SIZE": "0", "LLM_CACHE_DB": ""})
+
+    processes = [
+        start_process(["stub_llm.py", "--port", str(args.llm_port), "--latency-ms", str(args.llm_latency_ms),
+                       "--jitter-ms", str(args.llm_jitter_ms), "--error-rate", str(args.llm_error_rate)], env),
+        start_process(["-m", "uvicorn", "remote_agent:app", "--port", str(EMPLOYEE_PORT), "--log-level", "warning"], env),
+        start_process(["-m", "uvicorn", "hr_agent:app", "--port", str(HR_PORT), "--log-level", "warning"], env)
+    ]
+    try:
+        for port in (args.llm_port, EMPLOYEE_PORT, HR_PORT):
+            await wait_ready(f"http://127.0.0.1:{port}/")
+        results = {}
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(limits=limits, headers={"x-api-key": API_KEY}, timeout=args.timeout) as client:
+
+            def agent_call(url: str, payloads: List[Dict]):
+                async def call(i: int) -> bool:
+                    response = await client.post(url, json=payloads[i % len(payloads)])
+                    return response.status_code == 200
+                return call
+
+            targets = {
+                "employee_agent": agent_call(f"http://127.0.0.1:{EMPLOYEE_PORT}/tasks/send", EMPLOYEE_PAYLOADS),
+                "hr_agent": agent_call(f"http://127.0.0.1:{HR_PORT}/hr-tasks/send", HR_PAYLOADS)
+            }
+            for name, call in targets.items():
+                if name in args.targets:
+                    print(f"🚀 {name}: {args.requests} requests, concurrency {args.concurrency}")
+                    results[name] = await drive(call, args.requests, args.concurrency)
+
+        if "pipeline" in args.targets:
+            import client_agent_v4
+            import llm_client
+
+            async def pipeline_call(i: int) -> bool:
+                result = await client_agent_v4.route_query_to_agent(PIPELINE_QUERIES[i % len(PIPELINE_QUERIES)])
+                return isinstance(result, dict) and "error" not in result
+
+            print(f"🚀 pipeline: {args.requests} requests, concurrency {args.concurrency}")
+            try:
+                # The client logs every step; keep the benchmark output readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results["pipeline"] = await drive(pipeline_call, args.requests, args.concurrency)
+            finally:
+                await client_agent_v4.close_agent_client()
+                await llm_client.close_client()
+        return results
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_results(results: Dict, baseline: Dict = None):
+    for name, stats in results.items():
+        line = (f"  {name:<15} p50 {stats['p50_ms']:>8.1f} ms  p95 {stats['p95_ms']:>8.1f} ms  p99 {stats['p99_ms']:>8.1f} ms  "
+                f"{stats['throughput_rps']:>8.1f} req/s  errors {stats['error_rate']:.2%}")
+        previous = (baseline or {}).get(name)
+        if previous:
+            deltas = []
+            for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                if previous.get(key):
+                    deltas.append(f"{key} {(stats[key] - previous[key]) / previous[key]:+.1%}")
+            line += "  vs baseline: " + ", ".join(deltas)
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load benchmark against a stub LLM.")
+    parser.add_argument("--requests", type=int, default=200, help="requests per target")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--targets", nargs="+", default=["employee_agent", "hr_agent", "pipeline"],
+                        choices=["employee_agent", "hr_agent", "pipeline"])
+    parser.add_argument("--llm-port", type=int, default=9000)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--llm-error-rate", type=float, default=0, help="fraction of stub LLM calls answered with 429")
+    parser.add_argument("--llm-cache", action="store_true", help="keep the agents' LLM cache enabled")
+    parser.add_argument("--dataset", default=os.getenv("HR_DATASET", "demo"), help="HR_DATASET for both agents")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--out", default="bench_e2e.json")
+    parser.add_argument("--compare", help="earlier results JSON to print deltas against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "results": results
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f).get("results")
+    print_results(results, baseline)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {args.out}")
+
+if __name__ == "__main__":
+    main()
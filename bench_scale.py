@@ -0,0 +1,160 @@
+"""Scale benchmark for the agents' hot paths over synthetic datasets.
+
+For each dataset size, builds every index/store the agents build at startup and times
+representative queries against them. Build memory (retained and peak) is measured with
+tracemalloc in a separate pass so tracing overhead does not skew the timings.
+
+    python bench_scale.py --sizes 10000 100000 1000000 --out bench_scale.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+import synthetic_data
+import query_ops
+import prompt_serializer
+from employee_index import EmployeeIndex
+from fast_path import FastPathParser
+from hr_indexes import HRIndexes
+from org_graph import OrgGraph
+from salary_analytics import SalaryStore
+
+def _time_ms(fn: Callable, repeat: int) -> float:
+    """Median wall time of `fn` over `repeat` runs, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+def _measure_build(build: Callable) -> Dict:
+    tracemalloc.start()
+    try:
+        obj = build()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del obj
+    return {"memory_mb": round(current / 2 ** 20, 2), "peak_mb": round(peak / 2 ** 20, 2)}
+
+def components(dataset: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+    """Per hot path: how the agents build it at startup and the queries to time against it."""
+    employees, salaries = dataset["employees"], dataset["salaries"]
+    schedules, hierarchy = dataset["schedules"], dataset["hierarchy"]
+    probe = employees[len(employees) // 2]
+    first_name = probe["name"].split(" ")[0]
+    leaf_role = max(hierarchy, key=lambda h: h["level"])["job_role"]
+    top_k = {"order_by": ["-base_salary"], "limit": 10}
+    bonus_filter = {"filter": [{"field": "bonus_eligibility", "op": "eq", "value": True}], "fields": ["employee_id"]}
+    return {
+        "employee_index": {
+            "build": lambda: EmployeeIndex(employees),
+            "queries": {
+                "id": lambda ix: ix.search({"id": probe["id"]}),
+                "full_name": lambda ix: ix.search({"name": probe["name"]}),
+                "name_substring": lambda ix: ix.search({"name": first_name[:3]}),
+                "country_and_role": lambda ix: ix.search({"country": probe["country"], "job_role": "engineer"}),
+                "all": lambda ix: ix.search({"all": True})
+            }
+        },
+        "fast_path": {
+            "build": lambda: FastPathParser(
+                names=[e["name"] for e in employees],
+                countries={e["country"] for e in employees},
+                job_roles={h["job_role"] for h in hierarchy}
+            ),
+            "queries": {
+                "employee_id": lambda fp: fp.parse(f"salary of employee {probe['id']}"),
+                "full_name": lambda fp: fp.parse(f"{probe['name']} schedule"),
+                "country": lambda fp: fp.parse(f"employees in {probe['country']}")
+            }
+        },
+        "hr_indexes": {
+            "build": lambda: HRIndexes(employees, salaries, schedules),
+            "queries": {
+                "find_employee_id": lambda hx: hx.find_employee_id(probe["name"]),
+                "prefix": lambda hx: hx.find_employee_ids_by_prefix(first_name[:2]),
+                "salary_for": lambda hx: hx.salary_for(probe["id"])
+            }
+        },
+        "org_graph": {
+            "build": lambda: OrgGraph(hierarchy),
+            "queries": {
+                "subtree_root": lambda g: g.subtree("CEO"),
+                "chain_deepest": lambda g: g.chain(leaf_role),
+                "resolve": lambda g: g.resolve(leaf_role.lower())
+            }
+        },
+        "salary_store": {
+            "build": lambda: SalaryStore(salaries, employees),
+            "queries": {
+                "rank_top10": lambda st: st.rank(10),
+                "aggregate_country": lambda st: st.aggregate("country"),
+                "histogram": lambda st: st.histogram(20)
+            }
+        },
+        "query_ops": {
+            "build": lambda: salaries,
+            "queries": {
+                "top10_base_salary": lambda rows: query_ops.apply_operators(rows, top_k),
+                "filter_project": lambda rows: query_ops.apply_operators(rows, bonus_filter)
+            }
+        },
+        "serialization": {
+            "build": lambda: salaries,
+            "queries": {
+                "json_all_salaries": lambda rows: json.dumps({"results": rows}),
+                "prompt_all_salaries": lambda rows: prompt_serializer.serialize_for_prompt(rows, "salary")
+            }
+        }
+    }
+
+def bench_size(n_employees: int, seed: int, repeat: int, measure_memory: bool) -> Dict:
+    start = time.perf_counter()
+    dataset = synthetic_data.generate_dataset(n_employees, seed)
+    result = {"generate_s": round(time.perf_counter() - start, 3), "components": {}}
+    if measure_memory:
+        result.update(_measure_build(lambda: synthetic_data.generate_dataset(n_employees, seed)))
+
+    for name, component in components(dataset).items():
+        start = time.perf_counter()
+        built = component["build"]()
+        stats = {"build_ms": round((time.perf_counter() - start) * 1000, 3)}
+        if measure_memory:
+            stats.update(_measure_build(component["build"]))
+        stats["queries_ms"] = {q: _time_ms(lambda: fn(built), repeat) for q, fn in component["queries"].items()}
+        result["components"][name] = stats
+        print(f"  {name:<16} build {stats['build_ms']:>10.1f} ms"
+              + (f"  mem {stats['memory_mb']:>8.1f} MB (peak {stats['peak_mb']:.1f})" if measure_memory else "")
+              + "  " + ", ".join(f"{q} {ms:.3f} ms" for q, ms in stats["queries_ms"].items()))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent hot paths over synthetic datasets.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", default="bench_scale.json")
+    args = parser.parse_args()
+
+    report = {
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "sizes": {}
+    }
+    for n in args.sizes:
+        print(f"📏 {n} employees")
+        report["sizes"][str(n)] = bench_size(n, args.seed, args.repeat, not args.no_memory)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Wire-format benchmark for agent responses over synthetic datasets.
+
+For each dataset size, encodes the "all employees" and "all salaries" responses in every
+available body format (stdlib json, orjson, msgpack) and content encoding (none, gzip, zstd),
+and reports bytes on the wire plus median encode (serialize + compress) and decode
+(decompress + parse) times. Formats whose optional package is missing are skipped.
+
+    python bench_wire.py --sizes 1000 10000 100000 --out bench_wire.json
+"""
+
+import argparse
+import gzip
+import json
+import platform
+import statistics
+import time
+from typing import Callable, Dict, Tuple
+import synthetic_data
+import wire_format
+
+def _time_ms(fn: Callable, repeat: int) -> float:
+    """Median wall time of `fn` over `repeat` runs, in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+def _formats() -> Dict[str, Tuple[Callable, Callable]]:
+    """Body format name → (encode, decode)."""
+    formats = {
+        "json": (lambda d: json.dumps(d, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), json.loads)
+    }
+    if wire_format.HAS_ORJSON:
+        formats["orjson"] = (wire_format.dumps_json, wire_format.loads_json)
+    if wire_format.HAS_MSGPACK:
+        formats["msgpack"] = (lambda d: wire_format.encode(d, wire_format.MSGPACK_TYPE),
+                              lambda b: wire_format.msgpack.unpackb(b, raw=False))
+    return formats
+
+def _encodings() -> Dict[str, Tuple[Callable, Callable]]:
+    """Content encoding name → (compress, decompress)."""
+    encodings = {
+        "identity": (lambda b: b, lambda b: b),
+        "gzip": (lambda b: wire_format.compress(b, "gzip"), gzip.decompress)
+    }
+    if wire_format.HAS_ZSTD:
+        encodings["zstd"] = (lambda b: wire_format.compress(b, "zstd"),
+                             lambda b: wire_format.zstandard.ZstdDecompressor().decompress(b))
+    return encodings
+
+def bench_payload(data: Dict, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for fmt, (encode, decode) in _formats().items():
+        body = encode(data)
+        for name, (compress, decompress) in _encodings().items():
+            wire = compress(body)
+            results[f"{fmt}+{name}"] = {
+                "bytes": len(wire),
+                "encode_ms": _time_ms(lambda: compress(encode(data)), repeat),
+                "decode_ms": _time_ms(lambda: decode(decompress(wire)), repeat)
+            }
+    return results
+
+def bench_size(n: int, seed: int, repeat: int) -> Dict:
+    dataset = synthetic_data.generate_dataset(n, seed)
+    payloads = {
+        "all_employees": {"results": dataset["employees"]},
+        "all_salaries": {"results": dataset["salaries"]}
+    }
+    return {name: bench_payload(data, repeat) for name, data in payloads.items()}
+
+def print_size(n: int, report: Dict):
+    for payload, results in report.items():
+        print(f"  {payload} ({n} rows)")
+        baseline = results["json+identity"]
+        for combo, stats in results.items():
+            print(f"    {combo:<18} {stats['bytes']:>12,} B ({stats['bytes'] / baseline['bytes']:>6.1%})  "
+                  f"encode {stats['encode_ms']:>9.2f} ms  decode {stats['decode_ms']:>9.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent response wire formats over synthetic datasets.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement; the median is reported")
+    parser.add_argument("--out", default="bench_wire.json")
+    args = parser.parse_args()
+
+    report = {
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "gzip_level": wire_format.WIRE_GZIP_LEVEL,
+        "zstd_level": wire_format.WIRE_ZSTD_LEVEL,
+        "sizes": {}
+    }
+    for n in args.sizes:
+        print(f"📏 {n} employees")
+        report["sizes"][str(n)] = bench_size(n, args.seed, args.repeat)
+        print_size(n, report["sizes"][str(n)])
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {args.out}")
+
+if __name__ == "__main__":
+    main()
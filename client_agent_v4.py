@@ -1,6 +1,16 @@
-import requests
+import asyncio
 import httpx
 import json
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Literal, Optional
+from pydantic import BaseModel, ValidationError
+import llm_client
+import prompt_serializer
+import telemetry
+import structured_log
+import wire_format
+import pagination
 from dotenv import load_dotenv
 import os
 
@@ -10,17 +20,35 @@ api_key = os.getenv('API_KEY')
 base_url = os.getenv('API_URL')
 model = os.getenv('MODEL')
 
+log = structured_log.get_logger("client_v4")
+
 # Agent endpoints
 EMPLOYEE_AGENT_URL = "http://localhost:8000/tasks/send"
 HR_AGENT_URL = "http://localhost:8001/hr-tasks/send"
 API_KEY = "dummy-dekallm-key"
 
+AGENT_TIMEOUT = float(os.getenv('AGENT_TIMEOUT', '10'))
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'true').lower() in ("1", "true", "yes")
+AGENT_MAX_CONNECTIONS = int(os.getenv('AGENT_MAX_CONNECTIONS', '20'))
+# Full-dataset responses kept for ETag revalidation; 0 disables the cache
+AGENT_RESPONSE_CACHE_SIZE = int(os.getenv('AGENT_RESPONSE_CACHE_SIZE', '64'))
+# Ask the agents for msgpack bodies instead of JSON (needs `pip install msgpack`)
+AGENT_WIRE_MSGPACK = os.getenv('AGENT_WIRE_MSGPACK', 'false').lower() in ("1", "true", "yes")
+# Read full-dataset comparisons as NDJSON streams instead of ETag-cached bodies (for large datasets)
+AGENT_STREAM_RESULTS = os.getenv('AGENT_STREAM_RESULTS', 'false').lower() in ("1", "true", "yes")
+# Rows a highest/lowest salary comparison asks the HR Agent for (top or bottom of the ranking)
+COMPARISON_ROWS = int(os.getenv('COMPARISON_ROWS', '25'))
+
+_agent_client = None
+# (url, canonical payload) → (ETag, parsed result), least recently used first
+_response_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_response_cache_stats = {"revalidated": 0, "fetched": 0}
+
+# "single" plans clarify + route + extract in one LLM call, "legacy" uses the original three calls
+QUERY_PLANNER = os.getenv('QUERY_PLANNER', 'single').lower()
+
 async def call_llm(prompt: str, user_query: str, temperature: float = 0.2) -> str:
     """Call the LLM with a specific prompt and user query."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
     payload = {
         "model": model,
         "messages": [
@@ -29,16 +57,13 @@ async def call_llm(prompt: str, user_query: str, temperature: float = 0.2) -> st
         ],
         "temperature": temperature
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(base_url, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        try:
-            content = data["choices"][0]["message"]["content"]
-            return content.strip()
-        except Exception as e:
-            print(f"LLM parse error: {e}")
-            return ""
+    data = await llm_client.post_chat(payload)
+    try:
+        content = data["choices"][0]["message"]["content"]
+        return content.strip()
+    except Exception as e:
+        log.warning("LLM parse error: %s", e)
+        return ""
 
 async def clarify_user_query(user_query: str) -> str:
     """
@@ -86,7 +111,7 @@ async def extract_search_criteria(user_query: str) -> dict:
         criteria = json.loads(response)
         return criteria
     except Exception as e:
-        print(f"Failed to parse criteria: {e}")
+        log.warning("Failed to parse criteria: %s", e)
         return {}
 
 async def determine_agent_and_query_type(user_query: str) -> tuple[str, str]:
@@ -97,15 +122,20 @@ async def determine_agent_and_query_type(user_query: str) -> tuple[str, str]:
         "You are an assistant that determines the routing strategy for employee queries.\n\n"
         "Return a JSON object with two fields:\n"
         "- agent_type: 'employee', 'hr', 'multi_agent', or 'comparison'\n"
-        "- query_type: 'salary', 'hierarchy', 'schedule', 'general', 'highest_salary', 'lowest_salary', 'highest_role', 'lowest_role'\n\n"
+        "- query_type: 'salary', 'salary_analytics', 'hierarchy', 'subtree', 'chain', 'depth', 'schedule', 'general', 'highest_salary', 'lowest_salary', 'highest_role', 'lowest_role'\n\n"
         "Rules:\n"
-        "- 'multi_agent': for salary/schedule queries about specific people\n"
-        "- 'hr': for hierarchy queries or general HR info\n"
+        "- 'multi_agent': for salary/schedule queries about specific people or groups of employees (e.g. everyone with a job role or in a country)\n"
+        "- 'hr': for hierarchy queries or general HR info; use query_type 'subtree' for everyone under a role "
+        "(directly or indirectly), 'chain' for the chain of command above a role, 'depth' for how deep a role sits, "
+        "'salary_analytics' for salary statistics (average, median, percentiles, distribution by currency, country or role)\n"
         "- 'employee': for general employee information\n"
         "- 'comparison': for queries asking about highest/lowest (salary, role, etc.)\n\n"
         "Examples:\n"
         "User: 'What is Bob's salary?' → {\"agent_type\": \"multi_agent\", \"query_type\": \"salary\"}\n"
+        "User: 'Salaries of all Data Scientists' → {\"agent_type\": \"multi_agent\", \"query_type\": \"salary\"}\n"
         "User: 'Show me the hierarchy' → {\"agent_type\": \"hr\", \"query_type\": \"hierarchy\"}\n"
+        "User: 'Who reports to the CTO, directly or indirectly?' → {\"agent_type\": \"hr\", \"query_type\": \"subtree\"}\n"
+        "User: 'What is the median salary by country?' → {\"agent_type\": \"hr\", \"query_type\": \"salary_analytics\"}\n"
         "User: 'Find Alice Smith' → {\"agent_type\": \"employee\", \"query_type\": \"general\"}\n"
         "User: 'Who has the highest salary?' → {\"agent_type\": \"comparison\", \"query_type\": \"highest_salary\"}\n"
         "User: 'Who has the lowest salary?' → {\"agent_type\": \"comparison\", \"query_type\": \"lowest_salary\"}\n"
@@ -121,122 +151,280 @@ async def determine_agent_and_query_type(user_query: str) -> tuple[str, str]:
         result = json.loads(response)
         return result.get("agent_type", "employee"), result.get("query_type", "general")
     except Exception as e:
-        print(f"Failed to parse routing decision: {e}")
+        log.warning("Failed to parse routing decision: %s", e)
         return "employee", "general"
 
-def get_employee_info(employee_query: str) -> dict:
-    """Get employee information from Employee Info Agent."""
-    try:
-        response = requests.post(
-            EMPLOYEE_AGENT_URL,
-            headers={"x-api-key": API_KEY},
-            json={"query": employee_query},
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Error communicating with Employee Info Agent: {str(e)}"}
+class QueryPlan(BaseModel):
+    """Validated output of the single-call query planner."""
+    clarified_query: str
+    agent_type: Literal["employee", "hr", "multi_agent", "comparison"] = "employee"
+    query_type: Literal[
+        "salary", "salary_analytics", "hierarchy", "subtree", "chain", "depth", "schedule", "general",
+        "highest_salary", "lowest_salary", "highest_role", "lowest_role"
+    ] = "general"
+    criteria: dict = {}
 
-def get_hr_info(employee_id: int, query_type: str) -> dict:
-    """Get HR information from HR Agent using employee ID."""
+async def plan_query(user_query: str) -> Optional[QueryPlan]:
+    """
+    Clarify, route and extract criteria for the user's query in a single LLM call.
+    Returns None when the response does not match the QueryPlan schema.
+    """
+    prompt = (
+        "You are an assistant that plans how to answer employee information queries. "
+        "In one step, clarify the user's query, decide the routing strategy and extract search criteria.\n\n"
+        "Return a JSON object with exactly these fields:\n"
+        "- clarified_query: the query rewritten to be specific and clear\n"
+        "- agent_type: 'employee', 'hr', 'multi_agent', or 'comparison'\n"
+        "- query_type: 'salary', 'salary_analytics', 'hierarchy', 'subtree', 'chain', 'depth', 'schedule', 'general', 'highest_salary', 'lowest_salary', 'highest_role', 'lowest_role'\n"
+        "- criteria: object with any found fields (id, name, country, job_role), or {} if none\n\n"
+        "Rules:\n"
+        "- 'multi_agent': for salary/schedule queries about specific people or groups of employees (e.g. everyone with a job role or in a country)\n"
+        "- 'hr': for hierarchy queries or general HR info; use query_type 'subtree' for everyone under a role "
+        "(directly or indirectly), 'chain' for the chain of command above a role, 'depth' for how deep a role sits, "
+        "'salary_analytics' for salary statistics (average, median, percentiles, distribution by currency, country or role)\n"
+        "- 'employee': for general employee information\n"
+        "- 'comparison': for queries asking about highest/lowest (salary, role, etc.)\n\n"
+        "Examples:\n"
+        "User: 'bob salary' → {\"clarified_query\": \"What is Bob Johnson's salary?\", \"agent_type\": \"multi_agent\", \"query_type\": \"salary\", \"criteria\": {\"name\": \"Bob Johnson\"}}\n"
+        "User: 'alice schedule' → {\"clarified_query\": \"What is Alice Smith's work schedule?\", \"agent_type\": \"multi_agent\", \"query_type\": \"schedule\", \"criteria\": {\"name\": \"Alice Smith\"}}\n"
+        "User: 'salaries of all data scientists' → {\"clarified_query\": \"What are the salaries of all employees with job role Data Scientist?\", \"agent_type\": \"multi_agent\", \"query_type\": \"salary\", \"criteria\": {\"job_role\": \"Data Scientist\"}}\n"
+        "User: 'find employee 5' → {\"clarified_query\": \"Find employee with ID 5\", \"agent_type\": \"employee\", \"query_type\": \"general\", \"criteria\": {\"id\": 5}}\n"
+        "User: 'who works in marketing' → {\"clarified_query\": \"Find employees with job role Marketing Specialist\", \"agent_type\": \"employee\", \"query_type\": \"general\", \"criteria\": {\"job_role\": \"Marketing Specialist\"}}\n"
+        "User: 'hierarchy for software engineer' → {\"clarified_query\": \"Show the hierarchy for Software Engineer\", \"agent_type\": \"hr\", \"query_type\": \"hierarchy\", \"criteria\": {\"job_role\": \"Software Engineer\"}}\n"
+        "User: 'chain of command above a software engineer' → {\"clarified_query\": \"What is the chain of command above Software Engineer?\", \"agent_type\": \"hr\", \"query_type\": \"chain\", \"criteria\": {\"job_role\": \"Software Engineer\"}}\n"
+        "User: 'median pay per country' → {\"clarified_query\": \"What is the median salary by country?\", \"agent_type\": \"hr\", \"query_type\": \"salary_analytics\", \"criteria\": {}}\n"
+        "User: 'who has highest salary' → {\"clarified_query\": \"Who has the highest salary?\", \"agent_type\": \"comparison\", \"query_type\": \"highest_salary\", \"criteria\": {}}\n"
+        "User: 'who has lowest role' → {\"clarified_query\": \"Who has the lowest role?\", \"agent_type\": \"comparison\", \"query_type\": \"lowest_role\", \"criteria\": {}}\n\n"
+        "Return only valid JSON, no other text."
+    )
+    
+    response = await call_llm(prompt, user_query, temperature=0.1)
     try:
-        response = requests.post(
-            HR_AGENT_URL,
-            headers={"x-api-key": API_KEY},
-            json={"query": f"ID {employee_id}", "query_type": query_type},
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Error communicating with HR Agent: {str(e)}"}
+        import re
+        response = re.sub(r"^```json\s*|```$", "", response.strip(), flags=re.MULTILINE)
+        return QueryPlan.model_validate(json.loads(response))
+    except (ValueError, ValidationError) as e:
+        log.warning("Failed to parse query plan: %s", e)
+        return None
+
+def get_agent_client() -> httpx.AsyncClient:
+    """Return the pooled client used for all agent calls, creating it on first use."""
+    global _agent_client
+    if _agent_client is None or _agent_client.is_closed:
+        limits = httpx.Limits(max_connections=AGENT_MAX_CONNECTIONS, max_keepalive_connections=AGENT_MAX_CONNECTIONS)
+        # httpx advertises and decodes gzip (and zstd when `zstandard` is installed) by itself
+        headers = {"x-api-key": API_KEY, "Accept": wire_format.accept_header(AGENT_WIRE_MSGPACK)}
+        _agent_client = httpx.AsyncClient(limits=limits, headers=headers)
+    return _agent_client
+
+async def close_agent_client():
+    global _agent_client
+    if _agent_client is not None and not _agent_client.is_closed:
+        await _agent_client.aclose()
+    _agent_client = None
+
+def agent_cache_stats() -> dict:
+    return {"entries": len(_response_cache), **_response_cache_stats}
 
-def get_all_employees() -> dict:
-    """Get all employee information from Employee Info Agent."""
+async def post_to_agent(url: str, payload: dict, agent_name: str, timeout: float = AGENT_TIMEOUT,
+                        revalidate: bool = False) -> dict:
+    """POST a task to an agent; failures and timeouts come back as {"error": ...}, cancellation propagates.
+
+    With revalidate=True the last response for the same payload is kept with its ETag and sent back
+    as If-None-Match; a 304 reuses it without downloading or parsing the body again. Cached results
+    are shared between callers, so treat them as read-only.
+    """
+    cache_key = (url, json.dumps(payload, sort_keys=True)) if revalidate and AGENT_RESPONSE_CACHE_SIZE > 0 else None
+    cached = _response_cache.get(cache_key) if cache_key else None
+    headers = telemetry.trace_headers()
+    if cached:
+        headers["If-None-Match"] = cached[0]
     try:
-        print("🔍 Getting all employees from Employee Info Agent...")
-        response = requests.post(
-            EMPLOYEE_AGENT_URL,
-            headers={"x-api-key": API_KEY},
-            json={"query": "all employees"},
-            timeout=10
-        )
+        client = get_agent_client()
+        with telemetry.span("agent_http", agent=agent_name):
+            response = await asyncio.wait_for(client.post(url, json=payload, headers=headers, timeout=timeout), timeout)
+        if response.status_code == 304 and cached:
+            _response_cache.move_to_end(cache_key)
+            _response_cache_stats["revalidated"] += 1
+            return cached[1]
         response.raise_for_status()
-        result = response.json()
-        print(f"✅ Got {len(result.get('results', []))} employees")
+        result = wire_format.decode_response(response)
+        if cache_key and response.headers.get("etag"):
+            _response_cache_stats["fetched"] += 1
+            _response_cache[cache_key] = (response.headers["etag"], result)
+            _response_cache.move_to_end(cache_key)
+            while len(_response_cache) > AGENT_RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
         return result
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Error communicating with Employee Info Agent: {str(e)}"}
+    except asyncio.TimeoutError:
+        return {"error": f"Timed out after {timeout}s communicating with {agent_name}"}
+    except httpx.HTTPError as e:
+        return {"error": f"Error communicating with {agent_name}: {str(e)}"}
 
-def get_all_salaries() -> dict:
-    """Get all salary information from HR Agent."""
-    try:
-        print("💰 Getting all salaries from HR Agent...")
-        payload = {"query": "all salaries", "query_type": "salary"}
-        print(f"📤 Sending payload: {payload}")
-        response = requests.post(
-            HR_AGENT_URL,
-            headers={"x-api-key": API_KEY},
-            json=payload,
-            timeout=10
-        )
-        response.raise_for_status()
-        result = response.json()
+async def stream_from_agent(url: str, payload: dict, agent_name: str,
+                            timeout: float = AGENT_TIMEOUT) -> AsyncIterator[Dict]:
+    """Yield result rows from an agent's NDJSON stream as they arrive; errors raise httpx.HTTPError.
+
+    `timeout` applies to each read, not to the whole stream.
+    """
+    client = get_agent_client()
+    headers = {**telemetry.trace_headers(), "Accept": pagination.NDJSON_TYPE}
+    with telemetry.span("agent_stream", agent=agent_name):
+        async with client.stream("POST", url, json={**payload, "stream": True}, headers=headers, timeout=timeout) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line:
+                    yield wire_format.loads_json(line)
+
+async def collect_stream(url: str, payload: dict, agent_name: str, timeout: float = AGENT_TIMEOUT) -> List[Dict]:
+    """Every row of an agent's NDJSON stream, as a list."""
+    return [row async for row in stream_from_agent(url, payload, agent_name, timeout)]
+
+async def get_employee_info(employee_query: str, timeout: float = AGENT_TIMEOUT) -> dict:
+    """Get employee information from Employee Info Agent."""
+    return await post_to_agent(EMPLOYEE_AGENT_URL, {"query": employee_query}, "Employee Info Agent", timeout)
+
+async def get_hr_info(employee_ids: List[int], query_type: str, timeout: float = AGENT_TIMEOUT) -> dict:
+    """Get HR information for any number of employees from the HR Agent in one request."""
+    payload = {"employee_ids": employee_ids, "query_type": query_type}
+    return await post_to_agent(HR_AGENT_URL, payload, "HR Agent", timeout)
+
+async def get_all_employees(timeout: float = AGENT_TIMEOUT, operators: dict = None) -> dict:
+    """Get all employee information from Employee Info Agent.
+    
+    `operators` (filter, order_by, limit, offset, fields) are pushed down and run by the agent.
+    """
+    print("🔍 Getting all employees from Employee Info Agent...")
+    payload = {"query": "all employees", **(operators or {})}
+    result = await post_to_agent(EMPLOYEE_AGENT_URL, payload, "Employee Info Agent", timeout, revalidate=True)
+    if "error" not in result:
+        print(f"✅ Got {len(result.get('results', []))} employees")
+    return result
+
+async def get_all_salaries(timeout: float = AGENT_TIMEOUT, operators: dict = None) -> dict:
+    """Get all salary information from HR Agent.
+    
+    `operators` (filter, order_by, limit, offset, fields) are pushed down and run by the agent.
+    """
+    print("💰 Getting all salaries from HR Agent...")
+    payload = {"query": "all salaries", "query_type": "salary", **(operators or {})}
+    log.debug("Sending payload: %s", payload)
+    result = await post_to_agent(HR_AGENT_URL, payload, "HR Agent", timeout, revalidate=True)
+    if "error" not in result:
         print(f"✅ Got {len(result.get('results', []))} salary records")
-        return result
-    except requests.exceptions.RequestException as e:
-        return {"error": f"Error communicating with HR Agent: {str(e)}"}
+    return result
+
+async def get_salary_ranking(n: Optional[int] = COMPARISON_ROWS, ascending: bool = False,
+                             timeout: float = AGENT_TIMEOUT) -> dict:
+    """Get the n highest (or lowest) paid employees, ranked by salary normalized to the HR Agent's
+    reporting currency; n=None ranks everyone. Rows carry name, role and country already."""
+    payload = {"query": "salary ranking", "query_type": "salary_analytics",
+               "analytics": {"mode": "rank", "n": n, "ascending": ascending}}
+    return await post_to_agent(HR_AGENT_URL, payload, "HR Agent", timeout, revalidate=True)
+
+async def get_role_levels(timeout: float = AGENT_TIMEOUT) -> Dict[str, int]:
+    """Hierarchy level of every job role (1 = top of the hierarchy) from the HR Agent; {} if unavailable."""
+    payload = {"query": json.dumps({"all": True}), "query_type": "hierarchy", "fields": ["job_role", "level"]}
+    result = await post_to_agent(HR_AGENT_URL, payload, "HR Agent", timeout, revalidate=True)
+    return {r["job_role"]: r["level"] for r in result.get("results", []) if r.get("level") is not None}
+
+async def stream_salary_join(timeout: float = AGENT_TIMEOUT) -> List[Dict]:
+    """Join every employee with their salary while reading both agents' NDJSON streams.
 
-def perform_comparison(query_type: str) -> dict:
-    """For salary queries, just return all salary data and let LLM handle the reasoning."""
+    Used when the HR Agent's ranking is unavailable. Rows are parsed as they arrive, so neither
+    raw response body is held whole, but the result set is: every salary is indexed by employee
+    id, and every joined row is kept for the prompt.
+    """
+    print("💰 Streaming all salaries from HR Agent...")
+    salary_map = {}
+    salaries = stream_from_agent(HR_AGENT_URL, {"query": "all salaries", "query_type": "salary"}, "HR Agent", timeout)
+    async for salary in salaries:
+        salary_map[salary["employee_id"]] = salary
+    print("🔍 Streaming all employees from Employee Info Agent...")
+    combined = []
+    async for emp in stream_from_agent(EMPLOYEE_AGENT_URL, {"query": "all employees"}, "Employee Info Agent", timeout):
+        salary = salary_map.pop(emp["id"], None)
+        if salary is not None:
+            combined.append({"employee": emp, "salary": salary})
+    print(f"✅ Joined {len(combined)} employees with their salaries")
+    return combined
+
+async def perform_comparison(query_type: str) -> dict:
+    """Fetch the data a highest/lowest comparison needs and let the LLM handle the reasoning."""
     try:
         if query_type in ["highest_salary", "lowest_salary"]:
-            # Get all employees and salaries
-            employees_result = get_all_employees()
-            salaries_result = get_all_salaries()
-            
-            if "error" in employees_result or "error" in salaries_result:
-                return {"error": "Failed to get employee or salary data"}
+            lowest = query_type == "lowest_salary"
+            # The HR Agent ranks normalized salaries and sends only the top (or bottom) rows
+            ranking_result = await get_salary_ranking(COMPARISON_ROWS, ascending=lowest)
+            ranked = ranking_result.get("results") if "error" not in ranking_result else None
+            if ranked:
+                end = "lowest" if lowest else "highest"
+                return {
+                    "comparison_type": "salary_data",
+                    "ranking": f"the {len(ranked)} {end}-paid employees, rank 1 = {end}",
+                    "results": ranked,
+                    "message": f"Found the {len(ranked)} {end} normalized salaries"
+                }
             
-            # Combine employee and salary data
-            employees = employees_result.get("results", [])
-            salaries = salaries_result.get("results", [])
-            
-            # Create a mapping of employee_id to salary
-            salary_map = {s["employee_id"]: s for s in salaries}
-            
-            # Combine employee info with salary info
-            combined_data = []
-            for emp in employees:
-                if emp["id"] in salary_map:
-                    combined_data.append({
-                        "employee": emp,
-                        "salary": salary_map[emp["id"]]
-                    })
+            # Ranking unavailable: fall back to joining every employee with their salary, unranked
+            if AGENT_STREAM_RESULTS:
+                combined_data = await stream_salary_join()
+            else:
+                employees_result, salaries_result = await asyncio.gather(get_all_employees(), get_all_salaries())
+                
+                if "error" in employees_result or "error" in salaries_result:
+                    return {"error": "Failed to get employee or salary data"}
+                
+                # Combine employee and salary data
+                employees = employees_result.get("results", [])
+                salaries = salaries_result.get("results", [])
+                
+                # Create a mapping of employee_id to salary
+                salary_map = {s["employee_id"]: s for s in salaries}
+                
+                # Combine employee info with salary info
+                combined_data = []
+                for emp in employees:
+                    if emp["id"] in salary_map:
+                        combined_data.append({
+                            "employee": emp,
+                            "salary": salary_map[emp["id"]]
+                        })
             
             if not combined_data:
                 return {"error": "No employee salary data found"}
             
-            # Return all combined data for LLM to process
             return {
                 "comparison_type": "salary_data",
+                "ranking": "unranked, every employee",
                 "results": combined_data,
                 "message": f"Found {len(combined_data)} employee salary records"
             }
         
         elif query_type in ["highest_role", "lowest_role"]:
-            # Get all employees
-            employees_result = get_all_employees()
-            
-            if "error" in employees_result:
-                return {"error": "Failed to get employee data"}
-            
-            employees = employees_result.get("results", [])
+            # Get all employees (only the columns the prompt uses) and the hierarchy level of every role
+            fields = {"fields": ["id", "name", "job_role", "country"]}
+            if AGENT_STREAM_RESULTS:
+                employees, levels = await asyncio.gather(
+                    collect_stream(EMPLOYEE_AGENT_URL, {"query": "all employees", **fields}, "Employee Info Agent"),
+                    get_role_levels()
+                )
+            else:
+                employees_result, levels = await asyncio.gather(get_all_employees(operators=fields), get_role_levels())
+                
+                if "error" in employees_result:
+                    return {"error": "Failed to get employee data"}
+                
+                employees = employees_result.get("results", [])
             
             if not employees:
                 return {"error": "No employee data found"}
             
+            # Highest roles (level 1) first, or lowest first, so the prompt budget keeps the rows asked about
+            sign = -1 if query_type == "lowest_role" else 1
+            employees = [{**e, "level": levels.get(e.get("job_role"))} for e in employees]
+            employees.sort(key=lambda e: (e["level"] is None, sign * (e["level"] or 0)))
+            
             # Return all employee data for LLM to process
             return {
                 "comparison_type": "role_data",
@@ -250,13 +438,15 @@ def perform_comparison(query_type: str) -> dict:
     except Exception as e:
         return {"error": f"Error performing comparison: {str(e)}"}
 
-async def generate_natural_response(user_query: str, result: dict) -> str:
-    """Use LLM to generate a natural language response based on the query and results."""
-    if "error" in result:
-        return f"I'm sorry, but I encountered an error: {result['error']}"
-    
+def encode_prompt_data(data, query_type: Optional[str] = None) -> str:
+    """Compact, token-budgeted encoding of agent results for the response prompt."""
+    text, stats = prompt_serializer.serialize_for_prompt(data, query_type)
+    log.debug("Prompt data: ~%d tokens (%d rows, %d omitted, budget %d)", stats["tokens"], stats["rows"],
+              stats["omitted"], prompt_serializer.PROMPT_TOKEN_BUDGET)
+    return text
 
-    
+def build_response_prompt(user_query: str, result: dict) -> str:
+    """Build the LLM prompt that turns the query and raw agent results into a natural answer."""
     # If this is a salary comparison, pass all salary data to the LLM
     if (
         isinstance(result, dict) and (
@@ -271,7 +461,10 @@ async def generate_natural_response(user_query: str, result: dict) -> str:
         if isinstance(result, dict) and result.get("comparison_type") == "salary_data":
             salary_data = result.get("results", [])
             prompt = (
-                "You are a helpful HR assistant. You are given a list of all employee salaries as JSON. "
+                "You are a helpful HR assistant. You are given a table of employee salaries "
+                "(a '|'-separated header row, then one row per employee; 'all rows:' lists values shared by every row). "
+                "Rows: {ranking}. Salaries are in different currencies; "
+                "the salary_<currency> column converts each salary to one reporting currency, so compare salaries using those. "
                 "Answer the user's question using only this data. "
                 "If the user asks for the second highest salary, find it from the data. "
                 "If the user asks for the lowest salary, find it from the data. "
@@ -279,11 +472,15 @@ async def generate_natural_response(user_query: str, result: dict) -> str:
                 "User Query: {user_query}\n"
                 "Salary Data: {salary_data}\n\n"
                 "Provide a clear, natural answer:"
-            ).format(user_query=user_query, salary_data=json.dumps(salary_data, indent=2))
+            ).format(user_query=user_query, ranking=result.get("ranking", "unranked"),
+                     salary_data=encode_prompt_data(salary_data, "salary_data"))
         elif isinstance(result, dict) and result.get("comparison_type") == "role_data":
             role_data = result.get("results", [])
             prompt = (
-                "You are a helpful HR assistant. You are given a list of all employees as JSON. "
+                "You are a helpful HR assistant. You are given a table of all employees "
+                "(a '|'-separated header row, then one row per employee). "
+                "'level' is the role's level in the hierarchy (1 = top); rows start at the end of the hierarchy "
+                "the question is about. "
                 "Answer the user's question using only this data. "
                 "If the user asks for the highest role, find it from the data. "
                 "If the user asks for the lowest role, find it from the data. "
@@ -291,12 +488,13 @@ async def generate_natural_response(user_query: str, result: dict) -> str:
                 "User Query: {user_query}\n"
                 "Employee Data: {role_data}\n\n"
                 "Provide a clear, natural answer:"
-            ).format(user_query=user_query, role_data=json.dumps(role_data, indent=2))
+            ).format(user_query=user_query, role_data=encode_prompt_data(role_data, "role_data"))
         else:
             # Fallback for other salary data structures
             salary_data = result if isinstance(result, list) else result.get("result") or result.get("results") or result
             prompt = (
-                "You are a helpful HR assistant. You are given a list of all employee salaries as JSON. "
+                "You are a helpful HR assistant. You are given a table of employee salaries "
+                "(a '|'-separated header row, then one row per record). "
                 "Answer the user's question using only this data. "
                 "If the user asks for the second highest salary, find it from the data. "
                 "If the user asks for the lowest salary, find it from the data. "
@@ -304,8 +502,8 @@ async def generate_natural_response(user_query: str, result: dict) -> str:
                 "User Query: {user_query}\n"
                 "Salary Data: {salary_data}\n\n"
                 "Provide a clear, natural answer:"
-            ).format(user_query=user_query, salary_data=json.dumps(salary_data, indent=2))
-        return await call_llm(prompt, "", temperature=0.3)
+            ).format(user_query=user_query, salary_data=encode_prompt_data(salary_data, "salary"))
+        return prompt
     
     # Default: previous behavior
     prompt = (
@@ -320,83 +518,121 @@ async def generate_natural_response(user_query: str, result: dict) -> str:
         "User Query: {user_query}\n"
         "Data Results: {result}\n\n"
         "Provide a natural response:"
-    ).format(user_query=user_query, result=json.dumps(result, indent=2))
-    return await call_llm(prompt, "", temperature=0.3)
+    ).format(user_query=user_query, result=encode_prompt_data(
+        result, result.get("query_type") if isinstance(result, dict) else None))
+    return prompt
+
+async def generate_natural_response(user_query: str, result: dict) -> str:
+    """Use LLM to generate a natural language response based on the query and results."""
+    if "error" in result:
+        return f"I'm sorry, but I encountered an error: {result['error']}"
+    return await call_llm(build_response_prompt(user_query, result), "", temperature=0.3)
+
+async def stream_natural_response(user_query: str, result: dict, timings: dict = None):
+    """
+    Stream the natural language response token by token as the LLM produces it.
+    Fills `timings` with time-to-first-token and total time in milliseconds.
+    """
+    start = time.perf_counter()
+    if timings is not None:
+        timings.update({"ttft_ms": None, "total_ms": None})
+    if "error" in result:
+        yield f"I'm sorry, but I encountered an error: {result['error']}"
+        return
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": build_response_prompt(user_query, result)},
+            {"role": "user", "content": ""}
+        ],
+        "temperature": 0.3
+    }
+    async for token in llm_client.stream_chat(payload):
+        if timings is not None and timings["ttft_ms"] is None:
+            timings["ttft_ms"] = (time.perf_counter() - start) * 1000
+        yield token
+    if timings is not None:
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
 
 async def route_query_to_agent(user_query: str) -> dict:
     """Route the query to the appropriate agent(s) and return the response."""
-    # Step 1: Clarify the user query
-    print("🔍 Clarifying user query...")
-    clarified_query = await clarify_user_query(user_query)
-    print(f"Clarified query: {clarified_query}")
+    plan_start = time.perf_counter()
+    plan = None
+    criteria = None
+    if QUERY_PLANNER == "single":
+        # Steps 1-2: Clarify, route and extract criteria in one LLM call
+        print("🧭 Planning query...")
+        with telemetry.span("plan_query"):
+            plan = await plan_query(user_query)
     
-    # Step 2: Determine routing strategy
-    print("🎯 Determining routing strategy...")
-    agent_type, query_type = await determine_agent_and_query_type(clarified_query)
+    if plan is not None:
+        clarified_query = plan.clarified_query
+        agent_type, query_type, criteria = plan.agent_type, plan.query_type, plan.criteria
+        print(f"Clarified query: {clarified_query}")
+    else:
+        # Step 1: Clarify the user query
+        print("🔍 Clarifying user query...")
+        clarified_query = await clarify_user_query(user_query)
+        print(f"Clarified query: {clarified_query}")
+        
+        # Step 2: Determine routing strategy
+        print("🎯 Determining routing strategy...")
+        agent_type, query_type = await determine_agent_and_query_type(clarified_query)
     print(f"Routing: {agent_type} for {query_type} query")
+    print(f"⏱️ Planning ({'single' if plan is not None else 'legacy'}) took {(time.perf_counter() - plan_start) * 1000:.0f} ms")
     
     if agent_type == "multi_agent":
         # Multi-agent communication: Employee Info → HR Agent
         print("🔄 Step 1: Getting employee information...")
-        employee_result = get_employee_info(clarified_query)
+        employee_result = await get_employee_info(json.dumps(criteria) if criteria else clarified_query)
         
         if "error" in employee_result:
             return employee_result
         
-        if not employee_result.get("results"):
+        employees = [e for e in employee_result.get("results", []) if e.get("id") is not None]
+        if not employees:
             return {"error": "Employee not found"}
         
-        # Extract employee ID from the first result
-        employee = employee_result["results"][0]
-        employee_id = employee.get("id")
-        
-        if not employee_id:
-            return {"error": "Could not determine employee ID"}
-        
-        print(f"✅ Found employee: {employee['name']} (ID: {employee_id})")
+        print(f"✅ Found {len(employees)} employee(s): {', '.join(e['name'] for e in employees[:5])}{' ...' if len(employees) > 5 else ''}")
         print(f"🔄 Step 2: Getting {query_type} information from HR Agent...")
         
-        # Get HR information using the employee ID
-        hr_result = get_hr_info(employee_id, query_type)
+        # One HR request for every matched employee
+        hr_result = await get_hr_info([e["id"] for e in employees], query_type)
         
         if "error" in hr_result:
             return hr_result
         
-        # Combine the results
-        combined_result = {
-            "employee_info": employee,
-            "hr_info": hr_result.get("results", []),
-            "query_type": query_type
-        }
+        # Hash join on employee id
+        hr_by_id = {r["employee_id"]: r for r in hr_result.get("results", [])}
+        joined = [{"employee": e, **hr_by_id.get(e["id"], {})} for e in employees]
         
-        return combined_result
+        return {
+            "employees": joined,
+            "query_type": query_type,
+            "message": f"Found {query_type} information for {len(joined)} employee(s)"
+        }
     
     elif agent_type == "comparison":
         # Comparison queries (highest/lowest salary, role, etc.)
         print(f"📊 Performing comparison query: {query_type}")
-        return perform_comparison(query_type)
+        return await perform_comparison(query_type)
     
     elif agent_type == "hr":
         # Direct HR query (for hierarchy queries that don't need employee info)
         endpoint = HR_AGENT_URL
         print(f"📊 Routing to HR Agent for {query_type} query")
         
-        # Extract criteria using LLM
-        criteria = await extract_search_criteria(clarified_query)
-        payload = {"query": json.dumps(criteria) if criteria else clarified_query}
+        if query_type == "salary_analytics":
+            # The HR agent reads mode, top-n and grouping ("median", "top 3", "by country") from the text
+            payload = {"query": clarified_query}
+        else:
+            # Extract criteria using LLM
+            if criteria is None:
+                criteria = await extract_search_criteria(clarified_query)
+            payload = {"query": json.dumps(criteria) if criteria else clarified_query}
         payload["query_type"] = query_type
         
-        try:
-            response = requests.post(
-                endpoint,
-                headers={"x-api-key": API_KEY},
-                json=payload,
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Error communicating with HR Agent: {str(e)}"}
+        return await post_to_agent(endpoint, payload, "HR Agent")
     
     else:
         # Employee Info Agent query
@@ -404,20 +640,24 @@ async def route_query_to_agent(user_query: str) -> dict:
         print(f"👥 Routing to Employee Info Agent for general query")
         
         # Extract criteria using LLM
-        criteria = await extract_search_criteria(clarified_query)
+        if criteria is None:
+            criteria = await extract_search_criteria(clarified_query)
         payload = {"query": json.dumps(criteria) if criteria else clarified_query}
         
-        try:
-            response = requests.post(
-                endpoint,
-                headers={"x-api-key": API_KEY},
-                json=payload,
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Error communicating with Employee Info Agent: {str(e)}"}
+        return await post_to_agent(endpoint, payload, "Employee Info Agent")
+
+def print_trace(spans: list):
+    """Per-stage time breakdown of one query, slowest stages first."""
+    totals = {}
+    for record in spans:
+        stage = record["stage"] + (f"[{record['agent']}]" if "agent" in record else "")
+        count, ms = totals.get(stage, (0, 0.0))
+        totals[stage] = (count + 1, ms + record["ms"])
+    breakdown = ", ".join(
+        f"{stage} {ms:.0f} ms" + (f" ×{count}" if count > 1 else "")
+        for stage, (count, ms) in sorted(totals.items(), key=lambda item: -item[1][1])
+    )
+    print(f"🕒 Trace {telemetry.current_trace_id()}: {breakdown}")
 
 async def main():
     print("🤖 A2A Client AI Agent CLI (V4 - LLM-Powered)")
@@ -425,31 +665,46 @@ async def main():
     print("💡 The system will clarify your query and provide natural responses!")
     print("📊 New: Try comparison queries like 'who has highest salary' or 'who has lowest role'")
     
-    while True:
-        user_input = input("\n> ").strip()
-        if user_input.lower() == "exit":
-            break
+    try:
+        while True:
+            user_input = input("\n> ").strip()
+            if user_input.lower() == "exit":
+                break
         
-        if not user_input:
-            continue
+            if not user_input:
+                continue
             
-        try:
-            print("\n" + "="*50)
-            result = await route_query_to_agent(user_input)
+            try:
+                with telemetry.trace(collect=True) as spans:
+                    print("\n" + "="*50)
+                    result = await route_query_to_agent(user_input)
             
-            # Generate natural language response
-            print("🤖 Generating natural response...")
-            print(f"input = {user_input}")
-            print(f"result = {result}")
-            natural_response = await generate_natural_response(user_input, result)
-            print("\n" + "="*50)
-            print("💬 Response:")
-            print(natural_response)
-            print("="*50)
+                    # Generate natural language response
+                    print("🤖 Generating natural response...")
+                    log.debug("Combined result for %r: %s", user_input, result)
+                    if STREAM_RESPONSES:
+                        print("\n" + "="*50)
+                        print("💬 Response:")
+                        timings = {}
+                        async for token in stream_natural_response(user_input, result, timings):
+                            print(token, end="", flush=True)
+                        print()
+                        if timings["ttft_ms"] is not None:
+                            print(f"⏱️ First token after {timings['ttft_ms']:.0f} ms, complete after {timings['total_ms']:.0f} ms")
+                        print("="*50)
+                    else:
+                        natural_response = await generate_natural_response(user_input, result)
+                        print("\n" + "="*50)
+                        print("💬 Response:")
+                        print(natural_response)
+                        print("="*50)
+                    print_trace(spans)
             
-        except Exception as e:
-            print(f"❌ Error: {e}")
+            except Exception as e:
+                print(f"❌ Error: {e}")
+    finally:
+        await close_agent_client()
+        await llm_client.close_client()
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main()) 
\ No newline at end of file
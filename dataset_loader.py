@@ -0,0 +1,63 @@
+import os
+import gzip
+import json
+import hashlib
+from typing import Dict, List
+from dotenv import load_dotenv
+import structured_log
+
+# Load environment variables
+load_dotenv()
+
+# Where both agents load their data from at startup:
+#   unset / "demo"            built-in 40-employee demo data
+#   "synthetic:<n>[:<seed>]"  generated in process by synthetic_data.py
+#   path to .json / .json.gz  a dataset written by synthetic_data.py
+HR_DATASET = os.getenv('HR_DATASET', 'demo')
+
+log = structured_log.get_logger("dataset_loader")
+
+DATASET_KEYS = ("employees", "salaries", "schedules", "hierarchy")
+
+_loaded: Dict[str, Dict[str, List[Dict]]] = {}
+
+def _demo_dataset() -> Dict[str, List[Dict]]:
+    from employee_data import EMPLOYEES
+    from hr_dummy_data import HR_SALARIES_DATA, HR_SCHEDULES_DATA, HR_JOB_HIERARCHY_DATA
+    return {
+        "employees": EMPLOYEES,
+        "salaries": HR_SALARIES_DATA,
+        "schedules": HR_SCHEDULES_DATA,
+        "hierarchy": HR_JOB_HIERARCHY_DATA
+    }
+
+def load_dataset(source: str = HR_DATASET) -> Dict[str, List[Dict]]:
+    """Load {"employees", "salaries", "schedules", "hierarchy"} from `source`; loaded once per process."""
+    source = (source or "demo").strip()
+    if source in _loaded:
+        return _loaded[source]
+    if source == "demo":
+        dataset = _demo_dataset()
+    elif source.startswith("synthetic:"):
+        import synthetic_data
+        parts = source.split(":")
+        seed = int(parts[2]) if len(parts) > 2 else 42
+        dataset = synthetic_data.generate_dataset(int(parts[1]), seed)
+    else:
+        opener = gzip.open if source.endswith(".gz") else open
+        with opener(source, "rt", encoding="utf-8") as f:
+            dataset = json.load(f)
+    missing = [key for key in DATASET_KEYS if not isinstance(dataset.get(key), list)]
+    if missing:
+        raise ValueError(f"Dataset {source!r} is missing {missing}")
+    log.info("Dataset '%s': %d employees, %d salaries, %d schedules, %d hierarchy roles", source,
+             len(dataset["employees"]), len(dataset["salaries"]), len(dataset["schedules"]), len(dataset["hierarchy"]))
+    _loaded[source] = dataset
+    return dataset
+
+def dataset_version(dataset: Dict[str, List[Dict]]) -> str:
+    """Content hash of a loaded dataset; changes whenever any record changes, whatever the source."""
+    digest = hashlib.sha256()
+    for key in DATASET_KEYS:
+        digest.update(json.dumps(dataset[key], sort_keys=True, separators=(",", ":"), default=str).encode("utf-8"))
+    return digest.hexdigest()
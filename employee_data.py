@@ -0,0 +1,44 @@
+# Employee Dummy Data for A2A Employee Information System
+
+EMPLOYEES = [
+    {"id": 1, "name": "Alice Smith", "country": "USA", "job_role": "Software Engineer"},
+    {"id": 2, "name": "Bob Johnson", "country": "Canada", "job_role": "Data Scientist"},
+    {"id": 3, "name": "Charlie Brown", "country": "UK", "job_role": "Product Manager"},
+    {"id": 4, "name": "Diana Miller", "country": "Australia", "job_role": "UX Designer"},
+    {"id": 5, "name": "Ethan Davis", "country": "Germany", "job_role": "DevOps Engineer"},
+    {"id": 6, "name": "Fiona White", "country": "France", "job_role": "Marketing Specialist"},
+    {"id": 7, "name": "George Green", "country": "Japan", "job_role": "HR Manager"},
+    {"id": 8, "name": "Hannah Black", "country": "Brazil", "job_role": "Financial Analyst"},
+    {"id": 9, "name": "Ivy King", "country": "India", "job_role": "Technical Writer"},
+    {"id": 10, "name": "Jack Lee", "country": "South Korea", "job_role": "Sales Representative"},
+    {"id": 11, "name": "Karen Hall", "country": "Mexico", "job_role": "Customer Support"},
+    {"id": 12, "name": "Liam Scott", "country": "Spain", "job_role": "Business Analyst"},
+    {"id": 13, "name": "Mia Adams", "country": "Italy", "job_role": "Legal Counsel"},
+    {"id": 14, "name": "Noah Baker", "country": "Netherlands", "job_role": "Research Scientist"},
+    {"id": 15, "name": "Olivia Wright", "country": "Sweden", "job_role": "Project Coordinator"},
+    {"id": 16, "name": "Peter Clark", "country": "Ireland", "job_role": "Network Engineer"},
+    {"id": 17, "name": "Quinn Lewis", "country": "New Zealand", "job_role": "Content Creator"},
+    {"id": 18, "name": "Rachel Young", "country": "Singapore", "job_role": "Operations Manager"},
+    {"id": 19, "name": "Sam Harris", "country": "Argentina", "job_role": "Data Engineer"},
+    {"id": 20, "name": "Tina Walker", "country": "Switzerland", "job_role": "Accountant"},
+    {"id": 21, "name": "Uma Garcia", "country": "Portugal", "job_role": "QA Engineer"},
+    {"id": 22, "name": "Victor Rodriguez", "country": "Chile", "job_role": "Cloud Architect"},
+    {"id": 23, "name": "Wendy Martinez", "country": "Belgium", "job_role": "Scrum Master"},
+    {"id": 24, "name": "Xavier Perez", "country": "Norway", "job_role": "Cybersecurity Analyst"},
+    {"id": 25, "name": "Yara Sanchez", "country": "Denmark", "job_role": "Product Designer"},
+    {"id": 26, "name": "Zack Kim", "country": "Finland", "job_role": "Machine Learning Engineer"},
+    {"id": 27, "name": "Anna Chen", "country": "China", "job_role": "Software Engineer"},
+    {"id": 28, "name": "Ben Taylor", "country": "Russia", "job_role": "Data Scientist"},
+    {"id": 29, "name": "Chloe Moore", "country": "Egypt", "job_role": "Marketing Specialist"},
+    {"id": 30, "name": "David Wilson", "country": "South Africa", "job_role": "Financial Analyst"},
+    {"id": 31, "name": "Sarah CEO", "country": "USA", "job_role": "CEO"},
+    {"id": 32, "name": "Mike CTO", "country": "Canada", "job_role": "CTO"},
+    {"id": 33, "name": "Lisa CFO", "country": "UK", "job_role": "CFO"},
+    {"id": 34, "name": "Tom COO", "country": "Germany", "job_role": "COO"},
+    {"id": 35, "name": "Emma CMO", "country": "France", "job_role": "CMO"},
+    {"id": 36, "name": "Alex VP Engineering", "country": "Japan", "job_role": "VP Engineering"},
+    {"id": 37, "name": "Jordan VP Sales", "country": "Brazil", "job_role": "VP Sales"},
+    {"id": 38, "name": "Casey VP Marketing", "country": "India", "job_role": "VP Marketing"},
+    {"id": 39, "name": "Riley Director IT", "country": "South Korea", "job_role": "Director IT"},
+    {"id": 40, "name": "Taylor Director HR", "country": "Spain", "job_role": "Director HR"}
+]
@@ -0,0 +1,85 @@
+from typing import Dict, Iterable, List, Set
+
+class EmployeeIndex:
+    """In-memory indexes over employee records, built once at startup.
+
+    - hash index on id
+    - per-field hash index from normalized (lowercased) value to record positions
+    - per-field n-gram posting lists over the distinct values, so a substring
+      lookup only verifies values that share every n-gram of the needle
+
+    `search` keeps the original semantics: case-insensitive substring match on
+    name, country and job_role, exact match on id, all criteria AND-ed together.
+    """
+
+    TEXT_FIELDS = ("name", "country", "job_role")
+
+    def __init__(self, records: Iterable[Dict], ngram: int = 3):
+        self.ngram = ngram
+        self.records: List[Dict] = list(records)
+        self.by_id: Dict[int, List[int]] = {}
+        self.values: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.TEXT_FIELDS}
+        self.grams: Dict[str, Dict[str, Set[str]]] = {field: {} for field in self.TEXT_FIELDS}
+        for position, record in enumerate(self.records):
+            self.by_id.setdefault(record["id"], []).append(position)
+            for field in self.TEXT_FIELDS:
+                value = record[field].lower()
+                positions = self.values[field].get(value)
+                if positions is None:
+                    positions = self.values[field][value] = []
+                    for gram in self._grams(value):
+                        self.grams[field].setdefault(gram, set()).add(value)
+                positions.append(position)
+
+    def __len__(self):
+        return len(self.records)
+
+    def search(self, criteria: Dict) -> List[Dict]:
+        """Return records matching every criterion, in original order."""
+        if criteria.get("all"):
+            return self.records
+        candidate_sets = []
+        if "id" in criteria:
+            try:
+                candidate_sets.append(set(self.by_id.get(int(criteria["id"]), ())))
+            except (TypeError, ValueError):
+                pass
+        for field in self.TEXT_FIELDS:
+            if field in criteria:
+                candidate_sets.append(self.lookup(field, str(criteria[field])))
+        if not candidate_sets:
+            return self.records
+        # Intersect smallest-first so each step shrinks the working set fastest
+        candidate_sets.sort(key=len)
+        matches = candidate_sets[0]
+        for candidates in candidate_sets[1:]:
+            if not matches:
+                break
+            matches = matches & candidates
+        return [self.records[position] for position in sorted(matches)]
+
+    def lookup(self, field: str, needle: str) -> Set[int]:
+        """Positions of records whose `field` contains `needle` (case-insensitive)."""
+        needle = needle.lower()
+        values = self.values[field]
+        if len(needle) < self.ngram:
+            matching_values = [value for value in values if needle in value]
+        else:
+            postings = [self.grams[field].get(gram) for gram in self._grams(needle)]
+            if any(p is None for p in postings):
+                return set()
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return set()
+            matching_values = [value for value in candidates if needle in value]
+        positions = set()
+        for value in matching_values:
+            positions.update(values[value])
+        return positions
+
+    def _grams(self, text: str) -> Set[str]:
+        n = self.ngram
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
@@ -0,0 +1,38 @@
+"""Conditional responses for the agents' task endpoints.
+
+A task response is a function of the loaded data and the request body, so its ETag is
+derived from both: the data version (a content hash computed once at startup) plus a
+hash of the canonical request body. That lets an agent answer a matching
+`If-None-Match` with 304 before running the workflow at all.
+"""
+
+import json
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+import wire_format
+
+def request_etag(data_version: str, body: dict) -> str:
+    """Weak ETag for (data version, request body); key order and whitespace in the body do not matter."""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    body_hash = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f'W/"{data_version[:16]}-{body_hash[:16]}"'
+
+def matches(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match names this ETag (or `*`)."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # Weak comparison: W/"x" and "x" name the same representation
+    strip = lambda tag: tag[2:] if tag.startswith("W/") else tag
+    return "*" in candidates or strip(etag) in {strip(tag) for tag in candidates}
+
+def not_modified(etag: str) -> Response:
+    """304 carrying the same validator and Vary as the 200 it stands for, so caches key variants alike."""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": wire_format.VARY})
+
+def tag_response(response: Response, etag: str):
+    """Attach the ETag; `no-cache` tells clients to revalidate before reusing the body."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
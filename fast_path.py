@@ -0,0 +1,136 @@
+import os
+import re
+import json
+from typing import Dict, Iterable, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Minimum confidence for the fast path to answer without calling the LLM
+FAST_PATH_THRESHOLD = float(os.getenv('FAST_PATH_THRESHOLD', '0.8'))
+
+CRITERIA_FIELDS = ("id", "name", "country", "job_role", "all")
+
+ID_PATTERN = re.compile(r"\b(?:id|employee|emp)\s*(?:#|:|no\.?|number)?\s*(\d+)\b")
+ALL_PATTERN = re.compile(r"\b(?:all|every|list)\s+(?:the\s+)?(?:employees?|staff|salaries|salary|schedules?|people|records)\b|\beveryone\b")
+# Queries the rules cannot express; always leave these to the LLM
+COMPLEX_PATTERN = re.compile(r"\b(?:not|except|without|highest|lowest|top|second|third|most|least|than|or)\b")
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+def _phrase_pattern(phrase: str) -> re.Pattern:
+    """Whole-word match for a phrase, allowing a plural 's' and "'s" on the last word."""
+    return re.compile(r"\b" + re.escape(_normalize(phrase)) + r"(?:'?s)?\b")
+
+class FastPathParser:
+    """Rule-based criteria extractor that answers trivially structured queries without the LLM.
+
+    `parse` returns (criteria, confidence); callers only trust the criteria when confidence
+    is at or above FAST_PATH_THRESHOLD.
+    """
+
+    def __init__(self, names: Iterable[str], countries: Iterable[str], job_roles: Iterable[str]):
+        self.names = {_normalize(n): n for n in names}
+        self.countries = {_normalize(c): c for c in countries}
+        self.job_roles = {_normalize(r): r for r in job_roles}
+        # Longest phrases first so "VP Engineering" wins over "Engineering"
+        self._name_patterns = [(_phrase_pattern(n), n) for n in sorted(self.names, key=len, reverse=True)]
+        self._country_patterns = [(_phrase_pattern(c), c) for c in sorted(self.countries, key=len, reverse=True)]
+        self._role_patterns = [(_phrase_pattern(r), r) for r in sorted(self.job_roles, key=len, reverse=True)]
+        first_names = {}
+        for normalized in self.names:
+            first_names.setdefault(normalized.split(" ")[0], []).append(normalized)
+        self._first_names = first_names
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, query: str) -> Tuple[Dict, float]:
+        criteria, confidence = self._parse(query)
+        if confidence >= FAST_PATH_THRESHOLD:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return criteria, confidence
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "threshold": FAST_PATH_THRESHOLD
+        }
+
+    def _parse(self, query: str) -> Tuple[Dict, float]:
+        structured = self._parse_json(query)
+        if structured is not None:
+            return structured, 1.0
+
+        text = _normalize(query)
+        if not text or COMPLEX_PATTERN.search(text):
+            return {}, 0.0
+
+        criteria = {}
+        scores = []
+
+        id_match = ID_PATTERN.search(text)
+        if id_match:
+            criteria["id"] = int(id_match.group(1))
+            scores.append(0.95)
+            text = text[:id_match.start()] + " " + text[id_match.end():]
+
+        text, name, name_score = self._match_name(text)
+        if name:
+            criteria["name"] = name
+            scores.append(name_score)
+
+        text, country = self._match_phrase(text, self._country_patterns, self.countries)
+        if country:
+            criteria["country"] = country
+            scores.append(0.9)
+
+        text, role = self._match_phrase(text, self._role_patterns, self.job_roles)
+        if role:
+            criteria["job_role"] = role
+            scores.append(0.9)
+
+        if not criteria:
+            if ALL_PATTERN.search(text):
+                return {"all": True}, 0.95
+            return {}, 0.0
+        return criteria, min(scores)
+
+    def _parse_json(self, query: str):
+        """Accept queries that are already criteria JSON (as sent by client_agent_v4)."""
+        stripped = query.strip()
+        if not stripped.startswith("{"):
+            return None
+        try:
+            data = json.loads(stripped)
+        except ValueError:
+            return None
+        if not isinstance(data, dict) or not data or any(k not in CRITERIA_FIELDS for k in data):
+            return None
+        return data
+
+    def _match_name(self, text: str):
+        for pattern, normalized in self._name_patterns:
+            match = pattern.search(text)
+            if match:
+                return text[:match.start()] + " " + text[match.end():], self.names[normalized], 0.95
+        for word in re.findall(r"[a-z]+", text):
+            candidates = self._first_names.get(word.rstrip("s")) or self._first_names.get(word)
+            if candidates and len(candidates) == 1:
+                # Unique first name ("salary for Karen"); slightly less certain than a full name
+                return re.sub(r"\b" + re.escape(word) + r"\b", " ", text, count=1), self.names[candidates[0]], 0.85
+        return text, None, 0.0
+
+    @staticmethod
+    def _match_phrase(text: str, patterns, originals: dict):
+        for pattern, normalized in patterns:
+            match = pattern.search(text)
+            if match:
+                return text[:match.start()] + " " + text[match.end():], originals[normalized]
+        return text, None
@@ -1,14 +1,39 @@
 from fastapi import FastAPI, HTTPException, Request
-from typing import List, Dict
-import httpx
+from typing import Annotated, List, Dict
+from contextlib import asynccontextmanager
 import os
+import hashlib
+import operator
 from pydantic import BaseModel
 from langchain_core.tools import tool
-from langgraph.graph import StateGraph
-from hr_dummy_data import HR_SALARIES_DATA, HR_JOB_HIERARCHY_DATA, HR_SCHEDULES_DATA
+from langgraph.graph import StateGraph, END
+import llm_client
+import llm_gateway
+import llm_cache
+import fast_path
+import query_ops
+import batching
+import telemetry
+import dataset_loader
+import structured_log
+import singleflight
+import etag
+import pagination
+from hr_indexes import HRIndexes
+from org_graph import OrgGraph
+import salary_analytics
 from dotenv import load_dotenv
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm_client.get_client()
+    yield
+    await llm_client.close_client()
+
+app = FastAPI(lifespan=lifespan)
+telemetry.instrument(app, "hr_agent")
+llm_gateway.install(app)
+log = structured_log.get_logger("hr_agent")
 
 # Load environment variables
 load_dotenv()
@@ -16,9 +41,43 @@ api_key = os.getenv('API_KEY')
 base_url = os.getenv('API_URL')
 model = os.getenv('MODEL')
 
+# Data and everything derived from it is built once at startup from HR_DATASET
+dataset = dataset_loader.load_dataset()
+EMPLOYEES = dataset["employees"]
+HR_SALARIES_DATA = dataset["salaries"]
+HR_SCHEDULES_DATA = dataset["schedules"]
+HR_JOB_HIERARCHY_DATA = dataset["hierarchy"]
+
+hr_indexes = HRIndexes(EMPLOYEES, HR_SALARIES_DATA, HR_SCHEDULES_DATA)
+org_graph = OrgGraph(HR_JOB_HIERARCHY_DATA)
+for missing_role, reporting_roles in org_graph.dangling.items():
+    log.warning("Hierarchy: '%s' is referenced by %s but has no hierarchy record", missing_role, reporting_roles)
+if org_graph.cycles:
+    log.warning("Hierarchy: reporting cycle among %s", org_graph.cycles)
+
+fast_path_parser = fast_path.FastPathParser(
+    names=[e["name"] for e in EMPLOYEES],
+    countries={e["country"] for e in EMPLOYEES},
+    job_roles={e["job_role"] for e in EMPLOYEES} | {h["job_role"] for h in HR_JOB_HIERARCHY_DATA}
+)
+
+salary_store = salary_analytics.SalaryStore(HR_SALARIES_DATA, EMPLOYEES)
+
+# ETags on /hr-tasks/send change only when the loaded data (or the reporting currency) does
+data_version = hashlib.sha256(
+    f"{dataset_loader.dataset_version(dataset)}:{salary_store.reporting_currency}".encode("utf-8")
+).hexdigest()
+
 class HRQueryState(BaseModel):
     query: str
     query_type: str = "general"
+    options: Dict = {}
+    employee_ids: List[int] = []
+    # Multi-category requests: criteria are extracted once, then one branch per query type runs
+    query_types: List[str] = []
+    criteria: Dict = {}
+    # Parallel branches each add their own key, so updates are merged instead of overwritten
+    branch_results: Annotated[Dict[str, List[Dict]], operator.or_] = {}
     results: List[Dict] = []
 
 @app.get("/")
@@ -30,68 +89,187 @@ def validate_api_key(request: Request):
     if not api_key or api_key != "dummy-dekallm-key":
         raise HTTPException(status_code=401, detail="Invalid or missing API key.")
 
+@app.get("/llm-cache/stats")
+def llm_cache_stats(request: Request):
+    validate_api_key(request)
+    return llm_cache.cache.stats()
+
+@app.get("/fast-path/stats")
+def fast_path_stats(request: Request):
+    validate_api_key(request)
+    return fast_path_parser.stats()
+
+@app.get("/llm-gateway/stats")
+def llm_gateway_stats(request: Request):
+    validate_api_key(request)
+    return llm_gateway.gateway.stats()
+
+@app.get("/singleflight/stats")
+def singleflight_stats(request: Request):
+    validate_api_key(request)
+    return workflow_flight.stats()
+
+@app.get("/hierarchy/integrity")
+def hierarchy_integrity(request: Request):
+    validate_api_key(request)
+    return {"dangling_parents": org_graph.dangling, "cycles": org_graph.cycles}
+
+EXTRACTION_PROMPT = (
+    "You are an assistant that extracts employee search criteria from user queries. "
+    "Available employee names: Alice Smith, Bob Johnson, Charlie Brown, Diana Miller, Ethan Davis, "
+    "Fiona White, George Green, Hannah Black, Ivy King, Jack Lee, Karen Hall, Liam Scott, "
+    "Mia Adams, Noah Baker, Olivia Wright, Peter Clark, Quinn Lewis, Rachel Young, Sam Harris, "
+    "Tina Walker, Uma Garcia, Victor Rodriguez, Wendy Martinez, Xavier Perez, Yara Sanchez, "
+    "Zack Kim, Anna Chen, Ben Taylor, Chloe Moore, David Wilson, Sarah CEO, Mike CTO, Lisa CFO, "
+    "Tom COO, Emma CMO, Alex VP Engineering, Jordan VP Sales, Casey VP Marketing, Riley Director IT, "
+    "Taylor Director HR.\n"
+    "Return a JSON object with any found fields.\n"
+    "Examples:\n"
+    "User: what is Alice Smith's salary\nOutput: {\"name\": \"Alice Smith\"}\n"
+    "User: salary for Karen\nOutput: {\"name\": \"Karen Hall\"}\n"
+    "User: salary for ID 1\nOutput: {\"id\": 1}\n"
+    "User: who reports to Product Manager\nOutput: {\"job_role\": \"Product Manager\"}\n"
+    "User: schedule for Bob Johnson\nOutput: {\"name\": \"Bob Johnson\"}\n"
+    "User: hierarchy for Software Engineer\nOutput: {\"job_role\": \"Software Engineer\"}\n"
+    "User: what is Zack's salary\nOutput: {\"name\": \"Zack Kim\"}\n"
+    "User: all salaries\nOutput: {\"all\": true}\n"
+    "User: show all salaries\nOutput: {\"all\": true}"
+)
+EXTRACTION_TEMPERATURE = 0.1
+
+@telemetry.traced("call_llm")
 async def call_llm(query: str) -> dict:
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    prompt = (
-        "You are an assistant that extracts employee search criteria from user queries. "
-        "Available employee names: Alice Smith, Bob Johnson, Charlie Brown, Diana Miller, Ethan Davis, "
-        "Fiona White, George Green, Hannah Black, Ivy King, Jack Lee, Karen Hall, Liam Scott, "
-        "Mia Adams, Noah Baker, Olivia Wright, Peter Clark, Quinn Lewis, Rachel Young, Sam Harris, "
-        "Tina Walker, Uma Garcia, Victor Rodriguez, Wendy Martinez, Xavier Perez, Yara Sanchez, "
-        "Zack Kim, Anna Chen, Ben Taylor, Chloe Moore, David Wilson, Sarah CEO, Mike CTO, Lisa CFO, "
-        "Tom COO, Emma CMO, Alex VP Engineering, Jordan VP Sales, Casey VP Marketing, Riley Director IT, "
-        "Taylor Director HR.\n"
-        "Return a JSON object with any found fields.\n"
-        "Examples:\n"
-        "User: what is Alice Smith's salary\nOutput: {\"name\": \"Alice Smith\"}\n"
-        "User: salary for Karen\nOutput: {\"name\": \"Karen Hall\"}\n"
-        "User: salary for ID 1\nOutput: {\"id\": 1}\n"
-        "User: who reports to Product Manager\nOutput: {\"job_role\": \"Product Manager\"}\n"
-        "User: schedule for Bob Johnson\nOutput: {\"name\": \"Bob Johnson\"}\n"
-        "User: hierarchy for Software Engineer\nOutput: {\"job_role\": \"Software Engineer\"}\n"
-        "User: what is Zack's salary\nOutput: {\"name\": \"Zack Kim\"}\n"
-        "User: all salaries\nOutput: {\"all\": true}\n"
-        "User: show all salaries\nOutput: {\"all\": true}"
-    )
+    prefetched = batching.prefetched_criteria.get()
+    if prefetched is not None and query in prefetched:
+        return prefetched[query]
+    criteria, confidence = fast_path_parser.parse(query)
+    if confidence >= fast_path.FAST_PATH_THRESHOLD:
+        log.debug("Fast path criteria (%.2f): %s", confidence, criteria)
+        return criteria
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": prompt},
+            {"role": "system", "content": EXTRACTION_PROMPT},
             {"role": "user", "content": query}
         ],
-        "temperature": 0.1
+        "temperature": EXTRACTION_TEMPERATURE
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(base_url, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        print(f"\n\ndata = {data}")
+    cache_key = llm_cache.make_key(model, EXTRACTION_PROMPT, query, EXTRACTION_TEMPERATURE)
+    cached = llm_cache.cache.get(cache_key)
+    if cached is not None:
+        log.debug("LLM cache hit")
+        return cached
+    data = await llm_client.post_chat(payload)
+    log.debug("LLM response: %s", data)
+    content = None
+    try:
+        content = data["choices"][0]["message"]["content"]
+        criteria = batching.parse_criteria(content)
+    except Exception as e:
+        log.warning("LLM parse error: %s", e)
+        log.debug("Raw LLM response: %s", content if content is not None else "No content")
+        return {}
+    llm_cache.cache.set(cache_key, criteria)
+    return criteria
+
+async def call_llm_batch(queries: List[str]) -> Dict[str, dict]:
+    """Criteria for many queries: fast path and cache first, the rest in packed LLM requests."""
+    criteria_by_query = {}
+    pending = []
+    for query in dict.fromkeys(queries):
+        criteria, confidence = fast_path_parser.parse(query)
+        if confidence >= fast_path.FAST_PATH_THRESHOLD:
+            criteria_by_query[query] = criteria
+            continue
+        cached = llm_cache.cache.get(llm_cache.make_key(model, EXTRACTION_PROMPT, query, EXTRACTION_TEMPERATURE))
+        if cached is not None:
+            criteria_by_query[query] = cached
+            continue
+        pending.append(query)
+    extracted = await batching.extract_criteria_batch(pending, EXTRACTION_PROMPT, model, EXTRACTION_TEMPERATURE)
+    for query, criteria in extracted.items():
+        llm_cache.cache.set(llm_cache.make_key(model, EXTRACTION_PROMPT, query, EXTRACTION_TEMPERATURE), criteria)
+        criteria_by_query[query] = criteria
+    log.debug("Batch extraction: %d queries, %d sent to the LLM, %d extracted", len(queries), len(pending), len(extracted))
+    return criteria_by_query
+
+def resolve_employee_id(criteria: dict):
+    """Employee id from extracted criteria: an explicit id wins, otherwise an indexed name lookup."""
+    if "id" in criteria:
         try:
-            content = data["choices"][0]["message"]["content"]
-            import re
-            content = re.sub(r"^```json\\s*|```$", "", content.strip(), flags=re.MULTILINE)
-            import json as pyjson
-            criteria = pyjson.loads(content)
-            return criteria
-        except Exception as e:
-            print("\nLLM parse error:", e)
-            print("\nRaw LLM response:", content if 'content' in locals() else "No content")
-            return {}
+            return int(criteria["id"])
+        except (TypeError, ValueError):
+            return None
+    if "name" in criteria:
+        return hr_indexes.find_employee_id(str(criteria["name"]))
+    return None
 
 @tool
+@telemetry.traced("salary_search_tool")
 async def salary_search_tool(query: str) -> List[Dict]:
-    """Always return all salary data for any query."""
-    print("\nReturning all salaries (no filtering)")
+    """Return the salary record for a specific employee (ID or name), otherwise all salary data.
+
+    Criteria come from the batch prefetch or the fast path only, so this never calls the LLM;
+    a query that does not resolve to an employee returns all salaries.
+    """
+    prefetched = batching.prefetched_criteria.get()
+    if prefetched is not None and query in prefetched:
+        criteria = prefetched[query]
+    else:
+        criteria, confidence = fast_path_parser.parse(query)
+        if confidence < fast_path.FAST_PATH_THRESHOLD:
+            criteria = {}
+    employee_id = resolve_employee_id(criteria)
+    if employee_id is not None:
+        record = hr_indexes.salary_for(employee_id)
+        log.debug("Indexed salary lookup for employee %s", employee_id)
+        return [record] if record else []
+    log.debug("Returning all salaries (no filtering)")
     return HR_SALARIES_DATA
 
+# HR record parts returned per employee by employee_records_tool, by query_type
+EMPLOYEE_RECORD_PARTS = {
+    "salary": ("salary",),
+    "schedule": ("schedule",),
+    "hierarchy": ("level",),
+    "level": ("level",)
+}
+
+@tool
+@telemetry.traced("employee_records_tool")
+async def employee_records_tool(employee_ids: List[int], query_type: str = "general") -> List[Dict]:
+    """Return salary, schedule and/or hierarchy level for each of the given employee ids in one pass."""
+    parts = EMPLOYEE_RECORD_PARTS.get(query_type, ("salary", "schedule", "level"))
+    results = []
+    for employee_id in dict.fromkeys(employee_ids):
+        job_role = hr_indexes.job_role_by_id.get(employee_id)
+        row = {"employee_id": employee_id, "job_role": job_role}
+        if "salary" in parts:
+            salary = hr_indexes.salary_for(employee_id)
+            row["salary"] = {k: v for k, v in salary.items() if k != "employee_id"} if salary else None
+        if "schedule" in parts:
+            schedule = hr_indexes.schedule_for(employee_id)
+            row["schedule"] = {k: v for k, v in schedule.items() if k != "employee_id"} if schedule else None
+        if "level" in parts:
+            row["level"] = org_graph.records.get(job_role, {}).get("level")
+        results.append(row)
+    log.debug("Indexed %s lookup for %d employees", "/".join(parts), len(results))
+    return results
+
 @tool
+@telemetry.traced("salary_analytics_tool")
+async def salary_analytics_tool(query: str, options: Dict = None) -> List[Dict]:
+    """Rank, aggregate or histogram salaries normalized to the reporting currency."""
+    merged = {**salary_analytics.parse_analytics_options(query), **(options or {})}
+    log.debug("Salary analytics options: %s", merged)
+    return salary_analytics.run_analytics(salary_store, merged)
+
+@tool
+@telemetry.traced("hierarchy_search_tool")
 async def hierarchy_search_tool(query: str) -> List[Dict]:
     """Search job hierarchy information by criteria extracted from the query using LLM."""
     criteria = await call_llm(query)
-    print("\nLLM criteria for hierarchy:", criteria)
+    log.debug("LLM criteria for hierarchy: %s", criteria)
     if not criteria:
         return []
     
@@ -106,85 +284,202 @@ async def hierarchy_search_tool(query: str) -> List[Dict]:
         if match:
             results.append(hierarchy_record)
     
-    print("\nHierarchy search results:", results)
+    log.debug("Hierarchy search results (%d): %s", len(results), results)
     return results
 
+async def resolve_hierarchy_role(query: str):
+    criteria = await call_llm(query)
+    log.debug("LLM criteria for hierarchy graph: %s", criteria)
+    if not criteria or "job_role" not in criteria:
+        return None
+    return org_graph.resolve(str(criteria["job_role"]))
+
 @tool
+@telemetry.traced("hierarchy_subtree_tool")
+async def hierarchy_subtree_tool(query: str) -> List[Dict]:
+    """Return every role reporting to a job role, directly or indirectly."""
+    role = await resolve_hierarchy_role(query)
+    if role is None:
+        return []
+    results = [org_graph.records[r] for r in org_graph.subtree(role)]
+    log.debug("Subtree under %s: %d roles", role, len(results))
+    return results
+
+@tool
+@telemetry.traced("hierarchy_chain_tool")
+async def hierarchy_chain_tool(query: str) -> List[Dict]:
+    """Return the chain of command from a job role up to the top of the hierarchy."""
+    role = await resolve_hierarchy_role(query)
+    if role is None:
+        return []
+    results = []
+    for r in org_graph.chain(role):
+        if r in org_graph.records:
+            results.append(org_graph.records[r])
+        else:
+            results.append({"job_role": r, "reports_to": None, "level": None, "missing": True})
+    log.debug("Chain of command for %s: %s", role, [r["job_role"] for r in results])
+    return results
+
+@tool
+@telemetry.traced("hierarchy_depth_tool")
+async def hierarchy_depth_tool(query: str) -> List[Dict]:
+    """Return a job role's depth in the reporting graph with its direct and total reports."""
+    role = await resolve_hierarchy_role(query)
+    if role is None:
+        return []
+    return [{
+        "job_role": role,
+        "depth": org_graph.depth.get(role),
+        "level": org_graph.records[role].get("level"),
+        "reports_to": org_graph.records[role].get("reports_to"),
+        "direct_reports": org_graph.direct_reports(role),
+        "subtree_size": org_graph.subtree_size(role)
+    }]
+
+@tool
+@telemetry.traced("schedule_search_tool")
 async def schedule_search_tool(query: str) -> List[Dict]:
     """Search employee work schedule information by criteria extracted from the query using LLM."""
     criteria = await call_llm(query)
-    print("\nLLM criteria for schedule:", criteria)
+    log.debug("LLM criteria for schedule: %s", criteria)
     if not criteria:
         return []
     
-    results = []
-    for schedule_record in HR_SCHEDULES_DATA:
-        match = True
-        if "id" in criteria:
-            try:
-                id_val = int(criteria["id"])
-                if schedule_record["employee_id"] != id_val:
-                    match = False
-            except Exception:
-                match = False
-        elif "name" in criteria:
-            name_to_id_map = {
-                "alice smith": 1, "bob johnson": 2, "charlie brown": 3,
-                "diana miller": 4, "ethan davis": 5, "fiona white": 6,
-                "george green": 7, "hannah black": 8, "ivy king": 9,
-                "jack lee": 10, "karen hall": 11, "liam scott": 12,
-                "mia adams": 13, "noah baker": 14, "olivia wright": 15,
-                "peter clark": 16, "quinn lewis": 17, "rachel young": 18,
-                "sam harris": 19, "tina walker": 20, "uma garcia": 21,
-                "victor rodriguez": 22, "wendy martinez": 23, "xavier perez": 24,
-                "yara sanchez": 25, "zack kim": 26, "anna chen": 27,
-                "ben taylor": 28, "chloe moore": 29, "david wilson": 30
-            }
-            search_name = criteria["name"].lower()
-            
-            if search_name in name_to_id_map:
-                if schedule_record["employee_id"] != name_to_id_map[search_name]:
-                    match = False
-            else:
-                for full_name, emp_id in name_to_id_map.items():
-                    if search_name in full_name or full_name.startswith(search_name):
-                        if schedule_record["employee_id"] != emp_id:
-                            match = False
-                        break
-                else:
-                    match = False
-        
-        if match:
-            results.append(schedule_record)
+    if "id" not in criteria and "name" not in criteria:
+        results = HR_SCHEDULES_DATA
+    else:
+        employee_id = resolve_employee_id(criteria)
+        record = hr_indexes.schedule_for(employee_id) if employee_id is not None else None
+        results = [record] if record else []
     
-    print("\nSchedule search results:", results)
+    log.debug("Schedule search results (%d): %s", len(results), results)
     return results
 
+@telemetry.traced("hr_search_node")
 async def hr_search_node(state: HRQueryState) -> dict:
     query_type = state.query_type.lower()
     
-    print(f"🔍 HR search node: query='{state.query}', query_type='{query_type}'")
+    log.debug("HR search node: query=%r, query_type=%r", state.query, query_type)
     
-    if query_type == "salary":
+    if state.employee_ids:
+        results = await employee_records_tool.ainvoke({"employee_ids": state.employee_ids, "query_type": query_type})
+    elif query_type == "salary":
         results = await salary_search_tool.ainvoke(state.query)
     elif query_type == "hierarchy":
         results = await hierarchy_search_tool.ainvoke(state.query)
     elif query_type == "schedule":
         results = await schedule_search_tool.ainvoke(state.query)
+    elif query_type == "subtree":
+        results = await hierarchy_subtree_tool.ainvoke(state.query)
+    elif query_type == "chain":
+        results = await hierarchy_chain_tool.ainvoke(state.query)
+    elif query_type == "depth":
+        results = await hierarchy_depth_tool.ainvoke(state.query)
+    elif query_type == "salary_analytics":
+        results = await salary_analytics_tool.ainvoke({"query": state.query, "options": state.options})
     else:
         results = await salary_search_tool.ainvoke(state.query)
     
-    print(f"📊 HR search results: {len(results)} items")
+    log.debug("HR search results: %d items", len(results))
     return {"query": state.query, "query_type": state.query_type, "results": results}
 
+# Query types that can be combined in one request with `query_types`, and their branch nodes
+FAN_OUT_NODES = {
+    "salary": "salary_search",
+    "hierarchy": "hierarchy_search",
+    "schedule": "schedule_search"
+}
+
+def parse_query_types(value, employee_ids: List[int] = ()) -> List[str]:
+    """Validated, de-duplicated `query_types` of a request ([] when not sent)."""
+    if value is None:
+        return []
+    if not isinstance(value, list) or not value or not all(isinstance(t, str) for t in value):
+        raise HTTPException(status_code=400, detail="query_types must be a non-empty list of query types.")
+    if employee_ids:
+        raise HTTPException(status_code=400, detail="query_types cannot be combined with employee_ids; use query_type.")
+    query_types = list(dict.fromkeys(t.lower() for t in value))
+    unsupported = [t for t in query_types if t not in FAN_OUT_NODES]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"query_types supports {sorted(FAN_OUT_NODES)}, got {unsupported}")
+    return query_types
+
+@telemetry.traced("extract_criteria_node")
+async def extract_criteria_node(state: HRQueryState) -> dict:
+    """Extract criteria once for every branch of a multi-category request."""
+    return {"criteria": await call_llm(state.query)}
+
+async def run_with_criteria(state: HRQueryState, tool) -> List[Dict]:
+    """Invoke a query-based tool with the shared criteria served to its `call_llm` instead of a new extraction."""
+    token = batching.prefetched_criteria.set({state.query: state.criteria})
+    try:
+        return await tool.ainvoke(state.query)
+    finally:
+        batching.prefetched_criteria.reset(token)
+
+@telemetry.traced("salary_branch_node")
+async def salary_branch_node(state: HRQueryState) -> dict:
+    employee_id = resolve_employee_id(state.criteria)
+    if employee_id is not None:
+        record = hr_indexes.salary_for(employee_id)
+        results = [record] if record else []
+    else:
+        results = await run_with_criteria(state, salary_search_tool)
+    return {"branch_results": {"salary": results}}
+
+@telemetry.traced("hierarchy_branch_node")
+async def hierarchy_branch_node(state: HRQueryState) -> dict:
+    employee_id = resolve_employee_id(state.criteria)
+    if employee_id is not None:
+        # A named employee: their own role's place in the hierarchy
+        record = org_graph.records.get(hr_indexes.job_role_by_id.get(employee_id))
+        results = [{"employee_id": employee_id, **record}] if record else []
+    else:
+        results = await run_with_criteria(state, hierarchy_search_tool)
+    return {"branch_results": {"hierarchy": results}}
+
+@telemetry.traced("schedule_branch_node")
+async def schedule_branch_node(state: HRQueryState) -> dict:
+    return {"branch_results": {"schedule": await run_with_criteria(state, schedule_search_tool)}}
+
+@telemetry.traced("merge_results_node")
+async def merge_results_node(state: HRQueryState) -> dict:
+    """Flatten the branch results in request order, tagging each row with its query type."""
+    results = [
+        {"query_type": query_type, **row}
+        for query_type in state.query_types
+        for row in state.branch_results.get(query_type, [])
+    ]
+    log.debug("Merged %s: %d rows", "/".join(state.query_types), len(results))
+    return {"results": results}
+
+def route_request(state: HRQueryState) -> str:
+    return "extract_criteria" if state.query_types else "hr_search"
+
+def fan_out(state: HRQueryState) -> List[str]:
+    return [FAN_OUT_NODES[query_type] for query_type in state.query_types]
+
 def build_graph():
     graph = StateGraph(HRQueryState)
     graph.add_node("hr_search", hr_search_node)
-    graph.set_entry_point("hr_search")
-    graph.set_finish_point("hr_search")
+    graph.add_node("extract_criteria", extract_criteria_node)
+    graph.add_node("salary_search", salary_branch_node)
+    graph.add_node("hierarchy_search", hierarchy_branch_node)
+    graph.add_node("schedule_search", schedule_branch_node)
+    graph.add_node("merge_results", merge_results_node)
+    graph.set_conditional_entry_point(route_request, ["extract_criteria", "hr_search"])
+    # Branches chosen by fan_out run concurrently in one step; merge_results runs once after all of them
+    graph.add_conditional_edges("extract_criteria", fan_out, list(FAN_OUT_NODES.values()))
+    for node in FAN_OUT_NODES.values():
+        graph.add_edge(node, "merge_results")
+    graph.add_edge("merge_results", END)
+    graph.add_edge("hr_search", END)
     return graph.compile()
 
 langraph_workflow = build_graph()
+# Identical concurrent /hr-tasks/send requests share one workflow run
+workflow_flight = singleflight.SingleFlight("hr_agent")
 
 @app.post("/hr-tasks/send")
 async def hr_task(request: Request):
@@ -192,12 +487,75 @@ async def hr_task(request: Request):
     body = await request.json()
     query = body.get("query", "")
     query_type = body.get("query_type", "general")
+    employee_ids = body.get("employee_ids") or []
     
-    print(f"\n📥 HR Agent received: query='{query}', query_type='{query_type}'")
+    log.debug("HR Agent received: query=%r, query_type=%r, query_types=%s, employee_ids=%s",
+              query, query_type, body.get("query_types"), employee_ids)
     
-    if not query:
+    if not isinstance(employee_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in employee_ids):
+        raise HTTPException(status_code=400, detail="employee_ids must be a list of integer ids.")
+    query_types = parse_query_types(body.get("query_types"), employee_ids)
+    if not query and not employee_ids:
         raise HTTPException(status_code=400, detail="Missing query.")
+    # Validate the whole request first, so a malformed body is a 400 even when its ETag matches
+    scope_tag = etag.request_etag(data_version, pagination.cursor_scope(body))
+    try:
+        ops = query_ops.parse_operators(body)
+        paging = pagination.parse_paging(body, scope_tag)
+        options = salary_analytics.parse_options(body.get("analytics"))
+    except (query_ops.QueryOpsError, salary_analytics.AnalyticsError, pagination.PagingError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    tag = etag.request_etag(data_version, body)
+    if etag.matches(request, tag):
+        return etag.not_modified(tag)
+    
+    inputs = {
+        "query": query, "query_type": query_type, "options": options,
+        "employee_ids": employee_ids, "query_types": query_types
+    }
+    key = singleflight.request_key(query, query_type, options=options, employee_ids=employee_ids,
+                                   query_types=query_types)
+    
+    async def search() -> List[Dict]:
+        state = await workflow_flight.do(key, lambda: langraph_workflow.ainvoke(inputs))
+        log.debug("HR Agent returning results from %d records", len(state["results"]))
+        return state["results"]
+    
+    try:
+        response = await pagination.build_response(request, body, search, ops, paging, scope_tag)
+    except salary_analytics.AnalyticsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag.tag_response(response, tag)
+    return response
+ 
+
+@app.post("/hr-tasks/batch")
+async def hr_batch(request: Request):
+    validate_api_key(request)
+    body = await request.json()
+    try:
+        items = batching.parse_batch_items(body)
+    except batching.BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    log.debug("HR Agent received batch of %d requests", len(items))
+    criteria_by_query = await call_llm_batch(batching.batch_queries(items))
+    
+    async def run_item(item: dict) -> dict:
+        if not item.get("query") and not item.get("employee_ids"):
+            return {"error": "Missing query."}
+        ops = query_ops.parse_operators(item)
+        state = await langraph_workflow.ainvoke({
+            "query": item.get("query", ""), "query_type": item.get("query_type", "general"),
+            "options": salary_analytics.parse_options(item.get("analytics")), "employee_ids": item.get("employee_ids") or [],
+            "query_types": parse_query_types(item.get("query_types"), item.get("employee_ids"))
+        })
+        return {"results": query_ops.apply_operators(state["results"], ops)}
     
-    state = await langraph_workflow.ainvoke({"query": query, "query_type": query_type})
-    print(f"📤 HR Agent returning: {len(state['results'])} results")
-    return {"results": state["results"]} 
\ No newline at end of file
+    token = batching.prefetched_criteria.set(criteria_by_query)
+    try:
+        results = await batching.run_batch(items, run_item)
+    finally:
+        batching.prefetched_criteria.reset(token)
+    log.debug("HR Agent returning batch of %d results", len(results))
+    return {"results": results}
@@ -0,0 +1,59 @@
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"\s+", " ", name.strip().lower())
+
+class HRIndexes:
+    """Precomputed lookups shared by every HR tool.
+
+    - employee_id → salary record, schedule record and job role
+    - normalized full name → employee_id
+    - sorted (name key, employee_id) array for prefix lookups, where the keys are the
+      full name and every word-start suffix ("karen hall", "hall"), so "karen", "hall"
+      and "karen h" all resolve with one binary search
+    """
+
+    def __init__(self, employees: Iterable[Dict], salaries: Iterable[Dict], schedules: Iterable[Dict]):
+        self.salary_by_id: Dict[int, Dict] = {s["employee_id"]: s for s in salaries}
+        self.schedule_by_id: Dict[int, Dict] = {s["employee_id"]: s for s in schedules}
+        self.name_to_id: Dict[str, int] = {}
+        self.job_role_by_id: Dict[int, str] = {}
+        prefix_entries = []
+        for employee in employees:
+            self.job_role_by_id[employee["id"]] = employee["job_role"]
+            full_name = normalize_name(employee["name"])
+            self.name_to_id.setdefault(full_name, employee["id"])
+            words = full_name.split(" ")
+            for i in range(len(words)):
+                prefix_entries.append((" ".join(words[i:]), employee["id"]))
+        prefix_entries.sort()
+        self._prefix_keys: List[str] = [key for key, _ in prefix_entries]
+        self._prefix_ids: List[int] = [employee_id for _, employee_id in prefix_entries]
+
+    def find_employee_id(self, name: str) -> Optional[int]:
+        """Resolve a (partial) name to an employee id; ambiguous prefixes resolve to the lowest id."""
+        search_name = normalize_name(name)
+        if not search_name:
+            return None
+        if search_name in self.name_to_id:
+            return self.name_to_id[search_name]
+        matches = self.find_employee_ids_by_prefix(search_name)
+        return min(matches) if matches else None
+
+    def find_employee_ids_by_prefix(self, prefix: str) -> List[int]:
+        prefix = normalize_name(prefix)
+        start = bisect_left(self._prefix_keys, prefix)
+        matches = set()
+        for i in range(start, len(self._prefix_keys)):
+            if not self._prefix_keys[i].startswith(prefix):
+                break
+            matches.add(self._prefix_ids[i])
+        return sorted(matches)
+
+    def salary_for(self, employee_id: int) -> Optional[Dict]:
+        return self.salary_by_id.get(employee_id)
+
+    def schedule_for(self, employee_id: int) -> Optional[Dict]:
+        return self.schedule_by_id.get(employee_id)
@@ -0,0 +1,121 @@
+import os
+import gzip
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Dict
+from dotenv import load_dotenv
+import structured_log
+
+# Load environment variables
+load_dotenv()
+
+# Record/replay settings (override via .env)
+#   off     every call goes to the LLM (default)
+#   record  calls go to the LLM and each request/response pair is appended to the cassette
+#   replay  calls are served from the cassette with no network; unrecorded payloads raise CassetteMiss
+LLM_CASSETTE_MODE = os.getenv('LLM_CASSETTE_MODE', 'off').lower()
+LLM_CASSETTE_PATH = os.getenv('LLM_CASSETTE_PATH', 'llm_cassette.jsonl.gz')
+# "instant" replays immediately, "recorded" sleeps for the recorded latency (and token gaps when streaming)
+LLM_CASSETTE_TIMING = os.getenv('LLM_CASSETTE_TIMING', 'instant').lower()
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+log = structured_log.get_logger("llm_cassette")
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a payload that was never recorded."""
+
+def payload_key(payload: dict) -> str:
+    """Canonical hash of a chat payload: key order and whitespace do not matter."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class Cassette:
+    """Request/response pairs keyed by payload hash, stored one JSON object per line (gzip if *.gz).
+
+    Entries are {"key", "response", "elapsed_ms"} for regular calls and
+    {"key", "chunks": [[offset_ms, text], ...], "elapsed_ms"} for streamed calls.
+    Recording the same payload again appends a new line; the last one wins on load.
+    """
+
+    def __init__(self, path: str = LLM_CASSETTE_PATH, mode: str = LLM_CASSETTE_MODE,
+                 timing: str = LLM_CASSETTE_TIMING):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"LLM_CASSETTE_MODE must be one of {CASSETTE_MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        if mode == "replay":
+            self.load()
+
+    def _open(self, mode: str):
+        opener = gzip.open if self.path.endswith(".gz") else open
+        return opener(self.path, mode, encoding="utf-8")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            log.warning("LLM cassette %s does not exist; every replayed call will miss", self.path)
+            return
+        with self._open("rt") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries[entry["key"]] = entry
+        log.info("LLM cassette (%s): %d recorded responses from %s", self.mode, len(self.entries), self.path)
+
+    def _append(self, entry: Dict):
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            with self._open("at") as f:
+                f.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+            self.recorded += 1
+
+    def _lookup(self, key: str) -> Dict:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded LLM response for this payload in {self.path}")
+        self.hits += 1
+        return entry
+
+    def record_chat(self, payload: dict, response: dict, elapsed_ms: float):
+        self._append({"key": payload_key(payload), "response": response, "elapsed_ms": round(elapsed_ms, 1)})
+
+    def record_stream(self, payload: dict, chunks, elapsed_ms: float):
+        self._append({"key": payload_key({**payload, "stream": True}), "chunks": chunks, "elapsed_ms": round(elapsed_ms, 1)})
+
+    async def replay_chat(self, payload: dict) -> dict:
+        entry = self._lookup(payload_key(payload))
+        if self.timing == "recorded":
+            await asyncio.sleep(entry.get("elapsed_ms", 0) / 1000)
+        return entry["response"]
+
+    async def replay_stream(self, payload: dict):
+        entry = self._lookup(payload_key({**payload, "stream": True}))
+        start = time.perf_counter()
+        for offset_ms, text in entry["chunks"]:
+            if self.timing == "recorded":
+                delay = offset_ms / 1000 - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield text
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded
+        }
+
+cassette = Cassette()
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import asyncio
+import importlib.util
+import httpx
+from dotenv import load_dotenv
+from llm_cassette import cassette
+from llm_gateway import gateway, estimate_call_tokens
+import telemetry
+import structured_log
+
+# Load environment variables
+load_dotenv()
+api_key = os.getenv('API_KEY')
+base_url = os.getenv('API_URL')
+
+log = structured_log.get_logger("llm_client")
+
+# Pool settings (override via .env)
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '15'))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '100'))
+LLM_MAX_KEEPALIVE = int(os.getenv('LLM_MAX_KEEPALIVE', '20'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '30'))
+LLM_HTTP2 = os.getenv('LLM_HTTP2', 'false').lower() in ("1", "true", "yes")
+
+_client = None
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])."""
+    if not LLM_HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        log.warning("LLM_HTTP2 requested but 'h2' is not installed, falling back to HTTP/1.1")
+        return False
+    return True
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide LLM client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+        )
+        _client = httpx.AsyncClient(limits=limits, timeout=LLM_TIMEOUT, http2=_http2_available())
+    return _client
+
+async def close_client():
+    """Close the shared client and release its pooled connections."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+async def post_chat(payload: dict, timeout: float = LLM_TIMEOUT) -> dict:
+    """POST a chat-completions payload over the pooled client and return the JSON body.
+
+    The call goes through the LLM gateway (rate limits, in-flight cap, retries; see llm_gateway.py).
+    In cassette replay mode the recorded response is returned without any network call.
+    """
+    outcome = "error"
+    try:
+        with telemetry.span("llm.chat"):
+            if cassette.mode == "replay":
+                data = await cassette.replay_chat(payload)
+                outcome = "replay"
+                return data
+            headers = {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            }
+            start = time.perf_counter()
+
+            async def send() -> dict:
+                response = await get_client().post(base_url, headers=headers, json=payload, timeout=timeout)
+                response.raise_for_status()
+                return response.json()
+
+            data = await gateway.call(send, estimate_call_tokens(payload))
+            if cassette.mode == "record":
+                cassette.record_chat(payload, data, (time.perf_counter() - start) * 1000)
+            outcome = "ok"
+            return data
+    finally:
+        telemetry.LLM_CALLS_TOTAL.inc(kind="chat", outcome=outcome)
+
+async def stream_chat(payload: dict, timeout: float = LLM_TIMEOUT):
+    """POST a chat-completions payload with stream=True and yield content deltas as SSE chunks arrive.
+
+    The stream holds a gateway slot until it ends; failures are retried only before the first delta.
+    """
+    outcome = "error"
+    try:
+        with telemetry.span("llm.stream"):
+            if cassette.mode == "replay":
+                async for delta in cassette.replay_stream(payload):
+                    yield delta
+                outcome = "replay"
+                return
+            start = time.perf_counter()
+            chunks = []
+            headers = {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream"
+            }
+            tokens = estimate_call_tokens(payload)
+            attempt = 0
+            while True:
+                try:
+                    async with gateway.admit(tokens):
+                        async with get_client().stream("POST", base_url, headers=headers, json={**payload, "stream": True}, timeout=timeout) as response:
+                            response.raise_for_status()
+                            async for line in response.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    break
+                                try:
+                                    chunk = json.loads(data)
+                                    delta = chunk["choices"][0].get("delta", {}).get("content")
+                                except (ValueError, KeyError, IndexError):
+                                    continue
+                                if delta:
+                                    chunks.append([round((time.perf_counter() - start) * 1000, 1), delta])
+                                    yield delta
+                    break
+                except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                    # Deltas already shown cannot be taken back, so only a stream that has not started is retried
+                    delay = None if chunks else gateway.retry_delay(attempt, e)
+                    if delay is None:
+                        raise gateway.final_error(e) from e
+                attempt += 1
+                await asyncio.sleep(delay)
+            if cassette.mode == "record":
+                cassette.record_stream(payload, chunks, (time.perf_counter() - start) * 1000)
+            outcome = "ok"
+    finally:
+        telemetry.LLM_CALLS_TOTAL.inc(kind="stream", outcome=outcome)
@@ -0,0 +1,242 @@
+"""Admission control and retries for every LLM call made through `llm_client`.
+
+A call first passes the rate limiters (requests/s and estimated tokens/min token buckets),
+then takes one of `LLM_MAX_IN_FLIGHT` slots. Callers wait for both in a bounded queue: when
+`LLM_QUEUE_MAX` callers are already waiting, or a caller has waited `LLM_QUEUE_TIMEOUT`
+seconds, the call is shed with `GatewayOverloaded`, which the agents return as 503 with a
+Retry-After header (`install(app)`), as is a provider 429/503 that outlasts the retries.
+Failed calls (429, 5xx, connection errors, timeouts) are retried up to `LLM_MAX_RETRIES`
+times with exponential backoff and full jitter, waiting at least as long as the provider's
+Retry-After; the slot is released while backing off.
+"""
+
+import os
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+import httpx
+from dotenv import load_dotenv
+import telemetry
+import structured_log
+from prompt_serializer import estimate_tokens
+
+# Load environment variables
+load_dotenv()
+
+# Gateway settings (override via .env); 0 disables a rate limit
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', '16'))
+LLM_RATE_RPS = float(os.getenv('LLM_RATE_RPS', '0'))
+LLM_RATE_BURST = int(os.getenv('LLM_RATE_BURST', '10'))
+LLM_TOKENS_PER_MIN = float(os.getenv('LLM_TOKENS_PER_MIN', '0'))
+LLM_QUEUE_MAX = int(os.getenv('LLM_QUEUE_MAX', '64'))
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '5'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '0.25'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '8'))
+# A Retry-After longer than this is not waited out: the error goes back to the caller
+LLM_RETRY_AFTER_MAX = float(os.getenv('LLM_RETRY_AFTER_MAX', '30'))
+# Completion tokens assumed per call when the payload sets no max_tokens
+LLM_COMPLETION_TOKENS = int(os.getenv('LLM_COMPLETION_TOKENS', '256'))
+
+RETRY_STATUSES = (408, 409, 425, 429, 500, 502, 503, 504)
+
+SHED_TOTAL = telemetry.Counter("a2a_llm_gateway_shed_total", "LLM calls rejected by admission control.", ("reason",))
+RETRIES_TOTAL = telemetry.Counter("a2a_llm_gateway_retries_total", "LLM call retries by cause.", ("reason",))
+IN_FLIGHT = telemetry.Gauge("a2a_llm_gateway_in_flight", "LLM calls holding a gateway slot.")
+QUEUED = telemetry.Gauge("a2a_llm_gateway_queued", "LLM calls waiting for admission.")
+WAIT_SECONDS = telemetry.Histogram("a2a_llm_gateway_wait_seconds", "Time LLM calls waited for admission.")
+
+log = structured_log.get_logger("llm_gateway")
+
+T = TypeVar("T")
+
+class GatewayOverloaded(RuntimeError):
+    """Raised when a call is shed; `retry_after` is a hint in seconds for the client."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"LLM gateway overloaded ({reason}); retry in {retry_after:g}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`; acquirers are served in FIFO order."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float, deadline: float):
+        """Take `amount` units, waiting for refills; raises asyncio.TimeoutError past `deadline`."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = (amount - self.level) / self.rate
+                if time.monotonic() + wait > deadline:
+                    raise asyncio.TimeoutError()
+                await asyncio.sleep(wait)
+
+def estimate_call_tokens(payload: dict) -> int:
+    """Prompt tokens (local estimate) plus the completion budget of a chat payload."""
+    prompt = sum(estimate_tokens(str(m.get("content", ""))) for m in payload.get("messages", []))
+    return prompt + int(payload.get("max_tokens") or LLM_COMPLETION_TOKENS)
+
+def retry_after_seconds(response: Optional[httpx.Response]) -> Optional[float]:
+    """Retry-After of a response in seconds (delta-seconds or HTTP-date form), if any."""
+    value = response.headers.get("retry-after") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class LLMGateway:
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT, rate_rps: float = LLM_RATE_RPS,
+                 rate_burst: int = LLM_RATE_BURST, tokens_per_min: float = LLM_TOKENS_PER_MIN,
+                 queue_max: int = LLM_QUEUE_MAX, queue_timeout: float = LLM_QUEUE_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES):
+        self.max_in_flight = max_in_flight
+        self.queue_max = queue_max
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.requests = TokenBucket(rate_rps, max(rate_burst, 1)) if rate_rps > 0 else None
+        self.tokens = TokenBucket(tokens_per_min / 60, tokens_per_min) if tokens_per_min > 0 else None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.retries = 0
+
+    def _shed(self, reason: str):
+        self.shed += 1
+        SHED_TOTAL.inc(reason=reason)
+        log.warning("Shedding LLM call: %s (%d queued, %d in flight)", reason, self.queued, self.in_flight)
+        raise GatewayOverloaded(reason, retry_after=max(self.queue_timeout, 1.0))
+
+    @asynccontextmanager
+    async def admit(self, tokens: int):
+        """Hold one in-flight slot for the body of the block, after waiting for rate limits and a free slot."""
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        if self.queued >= self.queue_max:
+            self._shed("queue_full")
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        self.queued += 1
+        QUEUED.inc()
+        try:
+            if self.requests is not None:
+                await self.requests.acquire(1, deadline)
+            if self.tokens is not None:
+                await self.tokens.acquire(tokens, deadline)
+            if self._semaphore.locked():
+                await asyncio.wait_for(self._semaphore.acquire(), max(deadline - time.monotonic(), 0))
+            else:
+                await self._semaphore.acquire()
+        except asyncio.TimeoutError:
+            self._shed("queue_timeout")
+        finally:
+            self.queued -= 1
+            QUEUED.dec()
+        WAIT_SECONDS.observe(time.monotonic() - start)
+        self.admitted += 1
+        self.in_flight += 1
+        IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            IN_FLIGHT.dec()
+            self._semaphore.release()
+
+    def retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """Seconds to wait before retry number `attempt + 1`, or None when `error` should be raised."""
+        if attempt >= self.max_retries:
+            return None
+        response = None
+        if isinstance(error, httpx.HTTPStatusError):
+            response = error.response
+            if response.status_code not in RETRY_STATUSES:
+                return None
+            reason = str(response.status_code)
+        elif isinstance(error, httpx.TransportError):
+            reason = type(error).__name__
+        else:
+            return None
+        delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            if retry_after > LLM_RETRY_AFTER_MAX:
+                return None
+            delay = max(delay, retry_after)
+        self.retries += 1
+        RETRIES_TOTAL.inc(reason=reason)
+        log.info("LLM call failed (%s), retry %d/%d in %.2fs", reason, attempt + 1, self.max_retries, delay)
+        return delay
+
+    def final_error(self, error: Exception) -> Exception:
+        """What to raise once retries are over: provider overload becomes GatewayOverloaded (a 503 with Retry-After)."""
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (429, 503):
+            retry_after = retry_after_seconds(error.response)
+            return GatewayOverloaded(f"provider returned {error.response.status_code}",
+                                     retry_after if retry_after is not None else LLM_BACKOFF_MAX)
+        return error
+
+    async def call(self, fn: Callable[[], Awaitable[T]], tokens: int) -> T:
+        """Run `fn` under admission control, retrying retryable failures with backoff."""
+        attempt = 0
+        while True:
+            try:
+                async with self.admit(tokens):
+                    return await fn()
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                delay = self.retry_delay(attempt, e)
+                if delay is None:
+                    raise self.final_error(e) from e
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "retries": self.retries,
+            "rate_rps": self.requests.rate if self.requests else None,
+            "tokens_per_min": self.tokens.capacity if self.tokens else None
+        }
+
+gateway = LLMGateway()
+
+def install(app):
+    """Return shed LLM calls as 503 with Retry-After from a FastAPI app."""
+    from fastapi import Request
+    from fastapi.responses import JSONResponse
+
+    @app.exception_handler(GatewayOverloaded)
+    async def overloaded_handler(request: Request, exc: GatewayOverloaded):
+        return JSONResponse(status_code=503, content={"detail": str(exc)},
+                            headers={"Retry-After": str(max(int(exc.retry_after), 1))})
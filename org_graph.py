@@ -0,0 +1,97 @@
+from typing import Dict, Iterable, List, Optional
+
+class OrgGraph:
+    """Reporting graph built from `reports_to` at load time.
+
+    Roles are laid out with an Euler tour (pre-order entry/exit times), so the
+    whole subtree under a role is one contiguous slice of `order` and a subtree
+    query costs O(k) in the number of roles returned. Ancestry is a parent-pointer
+    walk, O(depth).
+
+    Roles whose `reports_to` is not itself a role ("dangling parents") are kept as
+    roots of their own subtree and listed in `dangling`; roles caught in a cycle are
+    unreachable from any root and listed in `cycles`.
+    """
+
+    def __init__(self, records: Iterable[Dict]):
+        self.records: Dict[str, Dict] = {}
+        for record in records:
+            self.records.setdefault(record["job_role"], record)
+        self._by_lower = {role.lower(): role for role in self.records}
+        self.children: Dict[str, List[str]] = {role: [] for role in self.records}
+        self.dangling: Dict[str, List[str]] = {}
+        roots = []
+        for role, record in self.records.items():
+            parent = record.get("reports_to")
+            if parent is None:
+                roots.append(role)
+            elif parent in self.records:
+                self.children[parent].append(role)
+            else:
+                self.dangling.setdefault(parent, []).append(role)
+                roots.append(role)
+
+        self.order: List[str] = []
+        self.tin: Dict[str, int] = {}
+        self.tout: Dict[str, int] = {}
+        self.depth: Dict[str, int] = {}
+        for root in roots:
+            self._euler_tour(root)
+        self.cycles: List[str] = [role for role in self.records if role not in self.tin]
+
+    def _euler_tour(self, root: str):
+        # Iterative DFS; the hierarchy can be deep enough to hit the recursion limit at scale
+        self.depth[root] = 0
+        stack = [(root, False)]
+        while stack:
+            role, exiting = stack.pop()
+            if exiting:
+                self.tout[role] = len(self.order)
+                continue
+            self.tin[role] = len(self.order)
+            self.order.append(role)
+            stack.append((role, True))
+            for child in reversed(self.children[role]):
+                self.depth[child] = self.depth[role] + 1
+                stack.append((child, False))
+
+    def resolve(self, job_role: str) -> Optional[str]:
+        """Exact (case-insensitive) role match, else the shortest role containing the text."""
+        text = job_role.strip().lower()
+        if text in self._by_lower:
+            return self._by_lower[text]
+        candidates = [role for lower, role in self._by_lower.items() if text in lower]
+        return min(candidates, key=len) if candidates else None
+
+    def direct_reports(self, role: str) -> List[str]:
+        return list(self.children.get(role, []))
+
+    def subtree(self, role: str) -> List[str]:
+        """Everyone reporting to `role` directly or indirectly, in pre-order."""
+        if role not in self.tin:
+            return []
+        return self.order[self.tin[role] + 1:self.tout[role]]
+
+    def chain(self, role: str) -> List[str]:
+        """Chain of command from `role` up to the top, starting with `role` itself."""
+        chain = []
+        seen = set()
+        current = role
+        while current in self.records and current not in seen:
+            chain.append(current)
+            seen.add(current)
+            current = self.records[current].get("reports_to")
+        if current is not None and current not in self.records:
+            chain.append(current)
+        return chain
+
+    def is_ancestor(self, ancestor: str, role: str) -> bool:
+        """O(1) check that `role` is in the subtree of `ancestor`."""
+        if ancestor not in self.tin or role not in self.tin:
+            return False
+        return self.tin[ancestor] < self.tin[role] < self.tout[ancestor]
+
+    def subtree_size(self, role: str) -> int:
+        if role not in self.tin:
+            return 0
+        return self.tout[role] - self.tin[role] - 1
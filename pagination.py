@@ -0,0 +1,152 @@
+"""Cursor pagination and NDJSON streaming for /tasks/send and /hr-tasks/send.
+
+Paging is requested with `page_size`; the response carries `next_cursor`, an opaque token
+to send back as `cursor` for the next page (null on the last page):
+
+    {"query": "all salaries", "query_type": "salary", "page_size": 500}
+    → {"results": [...500 rows...], "next_cursor": "eyJvIjo1MDAsImsiOiI..."}
+    {"query": "all salaries", "query_type": "salary", "page_size": 500, "cursor": "eyJvIjo1MDAsImsiOiI..."}
+
+A cursor is bound to the request it came from and to the loaded data, so it cannot be
+replayed against a different query or after the data changed.
+
+The first page runs the search and the `filter`/`order_by` operators once; while more pages
+remain, that ordered row list is kept per cursor scope (an LRU of `PAGE_CACHE_SIZE` scopes,
+dropped after the last page), so later pages are list slices and do not re-run the workflow.
+Memory is therefore not bounded by the page size: a cached scope holds one reference per
+matching row (the records themselves are shared with the loaded dataset).
+
+`"stream": true` (or `Accept: application/x-ndjson`) returns every row as one JSON object
+per line, generated while the response is written instead of buffered into one body.
+"""
+
+import os
+import json
+import base64
+import hashlib
+import binascii
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+from dotenv import load_dotenv
+import query_ops
+import wire_format
+
+# Load environment variables
+load_dotenv()
+
+# Paging and streaming settings (override via .env)
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '1000'))
+NDJSON_CHUNK_ROWS = int(os.getenv('NDJSON_CHUNK_ROWS', '500'))  # rows per write when streaming
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '32'))  # paged requests whose ordered rows are kept; 0 disables
+
+NDJSON_TYPE = "application/x-ndjson"
+
+# Ordered rows of paged requests with pages left, keyed by scope tag (LRU)
+_page_rows: "OrderedDict[str, List[Dict]]" = OrderedDict()
+
+class PagingError(ValueError):
+    """Raised for a malformed page_size or an invalid/expired cursor; agents turn it into a 400."""
+
+def cursor_scope(body: Dict) -> Dict:
+    """The part of a request a cursor is bound to: everything except the cursor itself."""
+    return {k: v for k, v in body.items() if k != "cursor"}
+
+def _scope_id(scope_tag: str) -> str:
+    # The whole tag: its data-version half is what ties a cursor to the loaded data (and agent)
+    return hashlib.sha256(scope_tag.encode("utf-8")).hexdigest()[:16]
+
+def encode_cursor(offset: int, scope_tag: str) -> str:
+    raw = json.dumps({"o": offset, "k": _scope_id(scope_tag)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, scope_tag: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+        offset, tag = state["o"], state["k"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise PagingError("Invalid cursor.")
+    if tag != _scope_id(scope_tag):
+        raise PagingError("Cursor does not belong to this request or the data has changed; start again without it.")
+    if not isinstance(offset, int) or offset < 0:
+        raise PagingError("Invalid cursor.")
+    return offset
+
+def wants_stream(request, body: Dict) -> bool:
+    return bool(body.get("stream")) or NDJSON_TYPE in (request.headers.get("accept") or "")
+
+def parse_paging(body: Dict, scope_tag: str) -> Optional[Dict]:
+    """{"page_size", "offset"} for a paged request, None when no page_size was sent."""
+    page_size = body.get("page_size")
+    if page_size is None:
+        if body.get("cursor"):
+            raise PagingError("cursor needs page_size.")
+        return None
+    if not isinstance(page_size, int) or isinstance(page_size, bool) or not 1 <= page_size <= PAGE_SIZE_MAX:
+        raise PagingError(f"page_size must be an integer between 1 and {PAGE_SIZE_MAX}")
+    cursor = body.get("cursor")
+    offset = decode_cursor(cursor, scope_tag) if cursor else 0
+    return {"page_size": page_size, "offset": offset}
+
+def paginate(rows: List[Dict], ops: Optional[Dict], paging: Dict, scope_tag: str) -> Dict:
+    """One page of `rows` (already filtered and ordered), plus the cursor for the next one."""
+    ops = ops or {}
+    page_size, start = paging["page_size"], paging["offset"]
+    # The caller's own offset/limit still bound the walk
+    stop = len(rows)
+    if ops.get("limit") is not None:
+        stop = min(stop, ops.get("offset", 0) + ops["limit"])
+    begin = ops.get("offset", 0) + start
+    end = min(begin + page_size, stop)
+    page = rows[begin:end] if end > begin else []
+    if ops.get("fields"):
+        page = [{f: r[f] for f in ops["fields"] if f in r} for r in page]
+    return {
+        "results": page,
+        "next_cursor": encode_cursor(start + page_size, scope_tag) if end < stop else None
+    }
+
+async def paged_response(load: Callable[[], Awaitable[List[Dict]]], ops: Optional[Dict],
+                         paging: Dict, scope_tag: str) -> Dict:
+    """A page for a paged request, reusing the scope's ordered rows when an earlier page cached them."""
+    rows = _page_rows.get(scope_tag)
+    if rows is None:
+        ordering = {k: ops[k] for k in ("filter", "order_by") if ops and ops.get(k)}
+        rows = query_ops.apply_operators(await load(), ordering)
+    page = paginate(rows, ops, paging, scope_tag)
+    if page["next_cursor"] is not None and PAGE_CACHE_SIZE > 0:
+        _page_rows[scope_tag] = rows
+        _page_rows.move_to_end(scope_tag)
+        while len(_page_rows) > PAGE_CACHE_SIZE:
+            _page_rows.popitem(last=False)
+    else:
+        _page_rows.pop(scope_tag, None)
+    return page
+
+def ndjson_chunks(rows: Iterator[Dict], chunk_rows: int = NDJSON_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode rows as NDJSON, yielding `chunk_rows` lines per write."""
+    lines = []
+    for row in rows:
+        lines.append(wire_format.dumps_json(row))
+        if len(lines) >= chunk_rows:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+def ndjson_response(rows: Iterator[Dict]):
+    from fastapi.responses import StreamingResponse
+    return StreamingResponse(ndjson_chunks(rows), media_type=NDJSON_TYPE)
+
+async def build_response(request, body: Dict, load: Callable[[], Awaitable[List[Dict]]], ops: Optional[Dict],
+                         paging: Optional[Dict], scope_tag: str):
+    """Task response in the mode the request asked for: NDJSON stream, one page, or every row.
+
+    `load` runs the search; a page served from the scope's cached rows does not call it.
+    """
+    if paging is not None and not wants_stream(request, body):
+        return wire_format.encode_response(request, await paged_response(load, ops, paging, scope_tag))
+    records = await load()
+    if wants_stream(request, body):
+        return ndjson_response(query_ops.iter_operators(records, ops))
+    return wire_format.encode_response(request, {"results": query_ops.apply_operators(records, ops)})
@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import math
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Estimated-token budget for the data section of a response prompt
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '3000'))
+
+# Columns the LLM needs per query/comparison type; anything else is dropped before encoding.
+# A trailing "*" matches by prefix (the normalized salary column is named after the reporting currency).
+PROJECTIONS = {
+    "salary_data": ["rank", "name", "job_role", "country", "base_salary", "currency", "salary_*", "bonus_eligibility"],
+    "role_data": ["id", "name", "job_role", "level", "country"],
+    "salary": ["employee_id", "name", "base_salary", "currency", "bonus_eligibility"],
+    "schedule": ["employee_id", "name", "work_days", "start_time", "end_time", "timezone", "shift_type"],
+    "hierarchy": ["name", "job_role", "reports_to", "level"],
+    "subtree": ["job_role", "reports_to", "level"],
+    "chain": ["job_role", "reports_to", "level", "missing"]
+}
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+def estimate_tokens(text: str) -> int:
+    """Local BPE-style estimate: ~4 letters or ~3 digits per token, one per punctuation mark."""
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+def flatten_record(record: Dict) -> Dict:
+    """Lift nested dicts ({"employee": {...}, "salary": {...}}) into one flat row; prefix only on key clashes."""
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            for inner_key, inner_value in flatten_record(value).items():
+                flat[inner_key if inner_key not in flat else f"{key}.{inner_key}"] = inner_value
+        else:
+            flat[key] = value
+    return flat
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Y" if value else "N"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (list, tuple)):
+        return ",".join(_cell(v) for v in value)
+    return str(value).replace("|", "/").replace("\n", " ")
+
+def encode_table(records: List[Dict], fields: Optional[List[str]] = None) -> Tuple[str, Iterator[str]]:
+    """Columnar text encoding: header once, constant columns hoisted, one '|'-separated line per row.
+
+    Returns the header/constant preamble and a lazy iterator of row lines, so callers that
+    truncate rows only format the ones they keep.
+    """
+    return _encode_rows([flatten_record(r) for r in records], fields)
+
+def _encode_rows(rows: List[Dict], fields: Optional[List[str]]) -> Tuple[str, Iterator[str]]:
+    columns = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    if fields:
+        projected = [c for f in fields for c in columns
+                     if c == f or (f.endswith("*") and c.startswith(f[:-1]))]
+        columns = projected or columns
+    constants = {}
+    if len(rows) > 1:
+        for column in columns:
+            # Stops at the first differing row, so varying columns cost almost nothing
+            first = _cell(rows[0].get(column))
+            if all(_cell(row.get(column)) == first for row in rows):
+                constants[column] = first
+    varying = [c for c in columns if c not in constants]
+    preamble = []
+    if constants:
+        preamble.append("all rows: " + ", ".join(f"{k}={v}" for k, v in constants.items()))
+    preamble.append("|".join(varying))
+    lines = ("|".join(_cell(row.get(c)) for c in varying) for row in rows)
+    return "\n".join(preamble), lines
+
+class _NumericSummary:
+    """Running min/max/mean per numeric column over the (flattened) rows left out of a table."""
+
+    def __init__(self, rows: Iterable[Dict] = ()):
+        self.columns: Dict[str, list] = {}
+        for row in rows:
+            self.add(row)
+
+    def add(self, row: Dict):
+        for key, value in row.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and key not in ("id", "employee_id", "rank"):
+                column = self.columns.get(key)
+                if column is None:
+                    self.columns[key] = [value, value, value, 1]
+                else:
+                    column[0] = min(column[0], value)
+                    column[1] = max(column[1], value)
+                    column[2] += value
+                    column[3] += 1
+
+    def __str__(self) -> str:
+        return "; ".join(f"{k} min={_cell(lo)} max={_cell(hi)} mean={round(total / count, 2)}"
+                         for k, (lo, hi, total, count) in self.columns.items())
+
+def encode_records(records: List[Dict], fields: Optional[List[str]] = None, budget: int = PROMPT_TOKEN_BUDGET) -> Tuple[str, Dict]:
+    """Encode records as a compact table that fits `budget` estimated tokens.
+
+    Rows are kept in order, so callers put the rows the question is about first (e.g. lowest
+    earners first for "lowest salary"); rows that do not fit are replaced by a one-line count
+    plus numeric min/max/mean over the omitted rows.
+    """
+    if not records:
+        return "(no rows)", {"rows": 0, "omitted": 0, "tokens": 3}
+    if not all(isinstance(r, dict) for r in records):
+        text = json.dumps(records, separators=(",", ":"), default=str)
+        return text, {"rows": len(records), "omitted": 0, "tokens": estimate_tokens(text)}
+    rows = [flatten_record(r) for r in records]
+    preamble, lines = _encode_rows(rows, fields)
+    tokens = estimate_tokens(preamble)
+    kept, kept_tokens = [], []
+    for line in lines:
+        line_tokens = estimate_tokens(line) + 1
+        if tokens + line_tokens > budget and kept:
+            break
+        kept.append(line)
+        kept_tokens.append(line_tokens)
+        tokens += line_tokens
+    if len(kept) == len(records):
+        return "\n".join([preamble] + kept), {"rows": len(records), "omitted": 0, "tokens": tokens}
+
+    # The summary line needs room too; drop rows until it fits (always keep one)
+    summary = _NumericSummary(rows[len(kept):])
+    while True:
+        note = f"... {len(records) - len(kept)} more rows omitted to fit the prompt budget"
+        if summary.columns:
+            note += f" ({summary})"
+        note_tokens = estimate_tokens(note) + 1
+        if tokens + note_tokens <= budget or len(kept) <= 1:
+            break
+        kept.pop()
+        tokens -= kept_tokens.pop()
+        summary.add(rows[len(kept)])
+    text = "\n".join([preamble] + kept + [note])
+    return text, {"rows": len(records), "omitted": len(records) - len(kept), "tokens": tokens + note_tokens}
+
+def serialize_for_prompt(data, query_type: Optional[str] = None, budget: int = PROMPT_TOKEN_BUDGET) -> Tuple[str, Dict]:
+    """Compact, budgeted text for any agent result: lists of records become tables, everything else compact JSON."""
+    fields = PROJECTIONS.get(query_type) if query_type else None
+    if isinstance(data, list):
+        return encode_records(data, fields, budget)
+    if not isinstance(data, dict):
+        text = json.dumps(data, separators=(",", ":"), default=str)
+        return text, {"rows": 0, "omitted": 0, "tokens": estimate_tokens(text)}
+
+    sections = []
+    stats = {"rows": 0, "omitted": 0, "tokens": 0}
+    scalars = {k: v for k, v in data.items() if not (isinstance(v, list) and v and all(isinstance(r, dict) for r in v))}
+    if scalars:
+        text = json.dumps(scalars, separators=(",", ":"), default=str)
+        sections.append(text)
+        stats["tokens"] += estimate_tokens(text)
+    for key, value in data.items():
+        if key in scalars:
+            continue
+        text, table_stats = encode_records(value, fields, max(budget - stats["tokens"], 1))
+        sections.append(f"{key}:\n{text}")
+        for stat in stats:
+            stats[stat] += table_stats[stat]
+    return "\n".join(sections), stats
@@ -0,0 +1,142 @@
+"""Structured result operators accepted by /tasks/send and /hr-tasks/send, executed by the agent
+after search so only the rows and fields the client needs go over the wire:
+
+    {
+        "query": "all salaries",
+        "filter": [{"field": "bonus_eligibility", "op": "eq", "value": true}],
+        "order_by": ["-base_salary", "employee_id"],
+        "offset": 0,
+        "limit": 3,
+        "fields": ["employee_id", "base_salary", "currency"]
+    }
+"""
+
+import heapq
+import operator
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+OPERATOR_KEYS = ("filter", "order_by", "limit", "offset", "fields")
+
+def _contains(left, right) -> bool:
+    return str(right).lower() in str(left).lower()
+
+def _in(left, right) -> bool:
+    return left in right
+
+FILTER_OPS = {
+    "eq": operator.eq, "=": operator.eq, "==": operator.eq,
+    "ne": operator.ne, "!=": operator.ne,
+    "lt": operator.lt, "<": operator.lt,
+    "lte": operator.le, "<=": operator.le,
+    "gt": operator.gt, ">": operator.gt,
+    "gte": operator.ge, ">=": operator.ge,
+    "in": _in,
+    "contains": _contains
+}
+
+class QueryOpsError(ValueError):
+    """Raised for malformed operators; agents turn it into a 400."""
+
+def parse_operators(body: Dict) -> Optional[Dict]:
+    """Validate the operator keys of a task payload; returns None when none were sent."""
+    ops = {key: body[key] for key in OPERATOR_KEYS if body.get(key) is not None}
+    if not ops:
+        return None
+
+    predicates = ops.get("filter", [])
+    if isinstance(predicates, dict):
+        predicates = [predicates]
+    if not isinstance(predicates, list):
+        raise QueryOpsError("filter must be a predicate object or a list of them")
+    for predicate in predicates:
+        if not isinstance(predicate, dict) or "field" not in predicate:
+            raise QueryOpsError(f"Invalid filter predicate: {predicate!r}")
+        op = predicate.get("op", "eq")
+        if op not in FILTER_OPS:
+            raise QueryOpsError(f"Unsupported filter op {op!r}; use one of {sorted(set(FILTER_OPS))}")
+        if op == "in" and not isinstance(predicate.get("value"), list):
+            raise QueryOpsError("The 'in' filter op needs a list value")
+    ops["filter"] = predicates
+
+    order_by = ops.get("order_by", [])
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    if not isinstance(order_by, list) or not all(isinstance(k, str) and k.lstrip("-") for k in order_by):
+        raise QueryOpsError("order_by must be a field name or a list of them ('-field' for descending)")
+    ops["order_by"] = order_by
+
+    for key in ("limit", "offset"):
+        if key in ops and (not isinstance(ops[key], int) or isinstance(ops[key], bool) or ops[key] < 0):
+            raise QueryOpsError(f"{key} must be a non-negative integer")
+
+    fields = ops.get("fields")
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+        raise QueryOpsError("fields must be a list of field names")
+    return ops
+
+def _matches(record: Dict, predicates: List[Dict]) -> bool:
+    for predicate in predicates:
+        field = predicate["field"]
+        if field not in record:
+            return False
+        try:
+            if not FILTER_OPS[predicate.get("op", "eq")](record[field], predicate.get("value")):
+                return False
+        except TypeError:
+            return False
+    return True
+
+def _select(records: Iterable[Dict], order_by: List[str], k: Optional[int]) -> List[Dict]:
+    """Order records; when only the first k are needed use heap selection instead of a full sort.
+
+    Records missing an order_by field sort after those that have it, in either direction.
+    """
+    descending = [key.startswith("-") for key in order_by]
+    fields = [key.lstrip("-") for key in order_by]
+    if k is not None and len(set(descending)) == 1:
+        key = lambda record: tuple(
+            (record.get(f) is not None, record.get(f)) if descending[0] else (record.get(f) is None, record.get(f))
+            for f in fields
+        )
+        select = heapq.nlargest if descending[0] else heapq.nsmallest
+        return select(k, records, key=key)
+    # Mixed directions: stable sorts from the least significant key up
+    ordered = list(records)
+    for field, desc in reversed(list(zip(fields, descending))):
+        present = [r for r in ordered if r.get(field) is not None]
+        missing = [r for r in ordered if r.get(field) is None]
+        present.sort(key=lambda r: r[field], reverse=desc)
+        ordered = present + missing
+    return ordered[:k] if k is not None else ordered
+
+def apply_operators(records: Iterable[Dict], ops: Optional[Dict]) -> List[Dict]:
+    """Run filter → order_by → offset/limit → fields over search results."""
+    if not ops:
+        return records if isinstance(records, list) else list(records)
+    return list(iter_operators(records, ops))
+
+def iter_operators(records: Iterable[Dict], ops: Optional[Dict]) -> Iterator[Dict]:
+    """Lazy form of `apply_operators` for streaming: rows are produced one at a time.
+
+    Filtering, paging and projection stay lazy; order_by still has to see every row
+    (or keep the first offset + limit in a heap).
+    """
+    if not ops:
+        return iter(records)
+    rows = records
+    if ops.get("filter"):
+        rows = (r for r in rows if _matches(r, ops["filter"]))
+    offset = ops.get("offset", 0)
+    limit = ops.get("limit")
+    if ops.get("order_by"):
+        k = offset + limit if limit is not None else None
+        try:
+            rows = _select(rows, ops["order_by"], k)
+        except TypeError:
+            raise QueryOpsError(f"Cannot order by {ops['order_by']}: values are not comparable")
+    stop = offset + limit if limit is not None else None
+    rows = islice(rows, offset, stop)
+    if ops.get("fields"):
+        rows = ({f: r[f] for f in ops["fields"] if f in r} for r in rows)
+    return rows
@@ -1,59 +1,35 @@
 from fastapi import FastAPI, HTTPException, Request
 from typing import List, Dict
-import httpx
+from contextlib import asynccontextmanager
 import os
 from pydantic import BaseModel
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph
+import llm_client
+import llm_gateway
+import llm_cache
+import fast_path
+import query_ops
+import batching
+import telemetry
+import dataset_loader
+import structured_log
+import singleflight
+import etag
+import pagination
+from employee_index import EmployeeIndex
+from dotenv import load_dotenv
 
-app = FastAPI()
-
-# Dummy in-memory employee data
-EMPLOYEES = [
-    {"id": 1, "name": "Alice Smith", "country": "USA", "job_role": "Software Engineer"},
-    {"id": 2, "name": "Bob Johnson", "country": "Canada", "job_role": "Data Scientist"},
-    {"id": 3, "name": "Charlie Brown", "country": "UK", "job_role": "Product Manager"},
-    {"id": 4, "name": "Diana Miller", "country": "Australia", "job_role": "UX Designer"},
-    {"id": 5, "name": "Ethan Davis", "country": "Germany", "job_role": "DevOps Engineer"},
-    {"id": 6, "name": "Fiona White", "country": "France", "job_role": "Marketing Specialist"},
-    {"id": 7, "name": "George Green", "country": "Japan", "job_role": "HR Manager"},
-    {"id": 8, "name": "Hannah Black", "country": "Brazil", "job_role": "Financial Analyst"},
-    {"id": 9, "name": "Ivy King", "country": "India", "job_role": "Technical Writer"},
-    {"id": 10, "name": "Jack Lee", "country": "South Korea", "job_role": "Sales Representative"},
-    {"id": 11, "name": "Karen Hall", "country": "Mexico", "job_role": "Customer Support"},
-    {"id": 12, "name": "Liam Scott", "country": "Spain", "job_role": "Business Analyst"},
-    {"id": 13, "name": "Mia Adams", "country": "Italy", "job_role": "Legal Counsel"},
-    {"id": 14, "name": "Noah Baker", "country": "Netherlands", "job_role": "Research Scientist"},
-    {"id": 15, "name": "Olivia Wright", "country": "Sweden", "job_role": "Project Coordinator"},
-    {"id": 16, "name": "Peter Clark", "country": "Ireland", "job_role": "Network Engineer"},
-    {"id": 17, "name": "Quinn Lewis", "country": "New Zealand", "job_role": "Content Creator"},
-    {"id": 18, "name": "Rachel Young", "country": "Singapore", "job_role": "Operations Manager"},
-    {"id": 19, "name": "Sam Harris", "country": "Argentina", "job_role": "Data Engineer"},
-    {"id": 20, "name": "Tina Walker", "country": "Switzerland", "job_role": "Accountant"},
-    {"id": 21, "name": "Uma Garcia", "country": "Portugal", "job_role": "QA Engineer"},
-    {"id": 22, "name": "Victor Rodriguez", "country": "Chile", "job_role": "Cloud Architect"},
-    {"id": 23, "name": "Wendy Martinez", "country": "Belgium", "job_role": "Scrum Master"},
-    {"id": 24, "name": "Xavier Perez", "country": "Norway", "job_role": "Cybersecurity Analyst"},
-    {"id": 25, "name": "Yara Sanchez", "country": "Denmark", "job_role": "Product Designer"},
-    {"id": 26, "name": "Zack Kim", "country": "Finland", "job_role": "Machine Learning Engineer"},
-    {"id": 27, "name": "Anna Chen", "country": "China", "job_role": "Software Engineer"},
-    {"id": 28, "name": "Ben Taylor", "country": "Russia", "job_role": "Data Scientist"},
-    {"id": 29, "name": "Chloe Moore", "country": "Egypt", "job_role": "Marketing Specialist"},
-    {"id": 30, "name": "David Wilson", "country": "South Africa", "job_role": "Financial Analyst"},
-    {"id": 31, "name": "Sarah CEO", "country": "USA", "job_role": "CEO"},
-    {"id": 32, "name": "Mike CTO", "country": "Canada", "job_role": "CTO"},
-    {"id": 33, "name": "Lisa CFO", "country": "UK", "job_role": "CFO"},
-    {"id": 34, "name": "Tom COO", "country": "Germany", "job_role": "COO"},
-    {"id": 35, "name": "Emma CMO", "country": "France", "job_role": "CMO"},
-    {"id": 36, "name": "Alex VP Engineering", "country": "Japan", "job_role": "VP Engineering"},
-    {"id": 37, "name": "Jordan VP Sales", "country": "Brazil", "job_role": "VP Sales"},
-    {"id": 38, "name": "Casey VP Marketing", "country": "India", "job_role": "VP Marketing"},
-    {"id": 39, "name": "Riley Director IT", "country": "South Korea", "job_role": "Director IT"},
-    {"id": 40, "name": "Taylor Director HR", "country": "Spain", "job_role": "Director HR"}
-]
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm_client.get_client()
+    yield
+    await llm_client.close_client()
 
-from dotenv import load_dotenv
-import os
+app = FastAPI(lifespan=lifespan)
+telemetry.instrument(app, "employee_agent")
+llm_gateway.install(app)
+log = structured_log.get_logger("employee_agent")
 
 # Load environment variables from .env file
 load_dotenv()
@@ -63,6 +39,19 @@ api_key = os.getenv('API_KEY')
 base_url = os.getenv('API_URL')
 model = os.getenv('MODEL')
 
+# Employee records are loaded once at startup from HR_DATASET
+dataset = dataset_loader.load_dataset()
+EMPLOYEES = dataset["employees"]
+employee_index = EmployeeIndex(EMPLOYEES)
+# ETags on /tasks/send change only when the loaded data does
+data_version = dataset_loader.dataset_version(dataset)
+
+fast_path_parser = fast_path.FastPathParser(
+    names=[e["name"] for e in EMPLOYEES],
+    countries={e["country"] for e in EMPLOYEES},
+    job_roles={e["job_role"] for e in EMPLOYEES}
+)
+
 class EmployeeSearchState(BaseModel):
     query: str
     results: List[Dict] = []
@@ -76,78 +65,114 @@ def validate_api_key(request: Request):
     if not api_key or api_key != "dummy-dekallm-key":
         raise HTTPException(status_code=401, detail="Invalid or missing API key.")
 
+@app.get("/llm-cache/stats")
+def llm_cache_stats(request: Request):
+    validate_api_key(request)
+    return llm_cache.cache.stats()
+
+@app.get("/fast-path/stats")
+def fast_path_stats(request: Request):
+    validate_api_key(request)
+    return fast_path_parser.stats()
+
+@app.get("/llm-gateway/stats")
+def llm_gateway_stats(request: Request):
+    validate_api_key(request)
+    return llm_gateway.gateway.stats()
+
+@app.get("/singleflight/stats")
+def singleflight_stats(request: Request):
+    validate_api_key(request)
+    return workflow_flight.stats()
+
+EXTRACTION_PROMPT = (
+    "You are an assistant that extracts employee search criteria (id, name, country, job_role) from user queries. "
+    "Return a JSON object with any found fields.\n"
+    "Examples:\n"
+    "User: who is the hr manager\nOutput: {\"job_role\": \"HR Manager\"}\n"
+    "User: find employee with ID 2\nOutput: {\"id\": 2}\n"
+    "User: show me employees in marketing\nOutput: {\"job_role\": \"Marketing Specialist\"}\n"
+    "User: who is Alice Smith\nOutput: {\"name\": \"Alice Smith\"}\n"
+    "User: employees in Japan\nOutput: {\"country\": \"Japan\"}\n"
+    "User: all employees\nOutput: {\"all\": true}\n"
+    "User: show all employees\nOutput: {\"all\": true}"
+)
+EXTRACTION_TEMPERATURE = 0.2
+
+@telemetry.traced("call_llm")
 async def call_llm(query: str) -> dict:
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    prompt = (
-        "You are an assistant that extracts employee search criteria (id, name, country, job_role) from user queries. "
-        "Return a JSON object with any found fields.\n"
-        "Examples:\n"
-        "User: who is the hr manager\nOutput: {\"job_role\": \"HR Manager\"}\n"
-        "User: find employee with ID 2\nOutput: {\"id\": 2}\n"
-        "User: show me employees in marketing\nOutput: {\"job_role\": \"Marketing Specialist\"}\n"
-        "User: who is Alice Smith\nOutput: {\"name\": \"Alice Smith\"}\n"
-        "User: employees in Japan\nOutput: {\"country\": \"Japan\"}\n"
-        "User: all employees\nOutput: {\"all\": true}\n"
-        "User: show all employees\nOutput: {\"all\": true}"
-    )
+    prefetched = batching.prefetched_criteria.get()
+    if prefetched is not None and query in prefetched:
+        return prefetched[query]
+    criteria, confidence = fast_path_parser.parse(query)
+    if confidence >= fast_path.FAST_PATH_THRESHOLD:
+        log.debug("Fast path criteria (%.2f): %s", confidence, criteria)
+        return criteria
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": prompt},
+            {"role": "system", "content": EXTRACTION_PROMPT},
             {"role": "user", "content": query}
         ],
-        "temperature": 0.2
+        "temperature": EXTRACTION_TEMPERATURE
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.post(base_url, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        print(f"\n\ndata = {data}")
-        try:
-            content = data["choices"][0]["message"]["content"]
-            import re
-            content = re.sub(r"^```json\\s*|```$", "", content.strip(), flags=re.MULTILINE)
-            import json as pyjson
-            criteria = pyjson.loads(content)
-            return criteria
-        except Exception as e:
-            print("\nLLM parse error:", e)
-            return {}
+    cache_key = llm_cache.make_key(model, EXTRACTION_PROMPT, query, EXTRACTION_TEMPERATURE)
+    cached = llm_cache.cache.get(cache_key)
+    if cached is not None:
+        log.debug("LLM cache hit")
+        return cached
+    data = await llm_client.post_chat(payload)
+    log.debug("LLM response: %s", data)
+    content = None
+    try:
+        content = data["choices"][0]["message"]["content"]
+        criteria = batching.parse_criteria(content)
+    except Exception as e:
+        log.warning("LLM parse error: %s", e)
+        log.debug("Raw LLM response: %s", content if content is not None else "No content")
+        return {}
+    llm_cache.cache.set(cache_key, criteria)
+    return criteria
+
+async def call_llm_batch(queries: List[str]) -> Dict[str, dict]:
+    """Criteria for many queries: fast path and cache first, the rest in packed LLM requests."""
+    criteria_by_query = {}
+    pending = []
+    for query in dict.fromkeys(queries):
+        criteria, confidence = fast_path_parser.parse(query)
+        if confidence >= fast_path.FAST_PATH_THRESHOLD:
+            criteria_by_query[query] = criteria
+            continue
+        cached = llm_cache.cache.get(llm_cache.make_key(model, EXTRACTION_PROMPT, query, EXTRACTION_TEMPERATURE))
+        if cached is not None:
+            criteria_by_query[query] = cached
+            continue
+        pending.append(query)
+    extracted = await batching.extract_criteria_batch(pending, EXTRACTION_PROMPT, model, EXTRACTION_TEMPERATURE)
+    for query, criteria in extracted.items():
+        llm_cache.cache.set(llm_cache.make_key(model, EXTRACTION_PROMPT, query, EXTRACTION_TEMPERATURE), criteria)
+        criteria_by_query[query] = criteria
+    log.debug("Batch extraction: %d queries, %d sent to the LLM, %d extracted", len(queries), len(pending), len(extracted))
+    return criteria_by_query
 
 @tool
+@telemetry.traced("employee_search_tool")
 async def employee_search_tool(query: str) -> List[Dict]:
     """Search employees by criteria extracted from the query using LLM."""
     criteria = await call_llm(query)
-    print(f"\nLLM criteria:{criteria}")
+    log.debug("LLM criteria: %s", criteria)
     if not criteria:
         return []
     
     if "all" in criteria and criteria["all"]:
-        print("\nReturning all employees")
+        log.debug("Returning all employees")
         return EMPLOYEES
     
-    results = EMPLOYEES
-    if "id" in criteria:
-        try:
-            id_val = int(criteria["id"])
-            results = [e for e in results if e["id"] == id_val]
-        except Exception:
-            pass
-    if "name" in criteria:
-        name_val = criteria["name"].lower()
-        results = [e for e in results if name_val in e["name"].lower()]
-    if "country" in criteria:
-        country_val = criteria["country"].lower()
-        results = [e for e in results if country_val in e["country"].lower()]
-    if "job_role" in criteria:
-        job_val = criteria["job_role"].lower()
-        results = [e for e in results if job_val in e["job_role"].lower()]
-    print("\nFiltered results:", results)
+    results = employee_index.search(criteria)
+    log.debug("Filtered results (%d): %s", len(results), results)
     return results
 
+@telemetry.traced("employee_search_node")
 async def employee_search_node(state: EmployeeSearchState) -> dict:
     results = await employee_search_tool.ainvoke(state.query)
     return {"query": state.query, "results": results}
@@ -160,6 +185,8 @@ def build_graph():
     return graph.compile()
 
 langraph_workflow = build_graph()
+# Identical concurrent /tasks/send queries share one workflow run
+workflow_flight = singleflight.SingleFlight("employee_agent")
 
 @app.post("/tasks/send")
 async def a2a_task(request: Request):
@@ -168,5 +195,45 @@ async def a2a_task(request: Request):
     query = body.get("query", "")
     if not query:
         raise HTTPException(status_code=400, detail="Missing query.")
-    state = await langraph_workflow.ainvoke({"query": query})
-    return {"results": state["results"]} 
\ No newline at end of file
+    # Validate the whole request first, so a malformed body is a 400 even when its ETag matches
+    scope_tag = etag.request_etag(data_version, pagination.cursor_scope(body))
+    try:
+        ops = query_ops.parse_operators(body)
+        paging = pagination.parse_paging(body, scope_tag)
+    except (query_ops.QueryOpsError, pagination.PagingError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    tag = etag.request_etag(data_version, body)
+    if etag.matches(request, tag):
+        return etag.not_modified(tag)
+    
+    async def search() -> List[Dict]:
+        state = await workflow_flight.do(singleflight.request_key(query), lambda: langraph_workflow.ainvoke({"query": query}))
+        return state["results"]
+    
+    response = await pagination.build_response(request, body, search, ops, paging, scope_tag)
+    etag.tag_response(response, tag)
+    return response
+
+@app.post("/tasks/batch")
+async def a2a_batch(request: Request):
+    validate_api_key(request)
+    body = await request.json()
+    try:
+        items = batching.parse_batch_items(body)
+    except batching.BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    criteria_by_query = await call_llm_batch(batching.batch_queries(items))
+    
+    async def run_item(item: dict) -> dict:
+        if not item.get("query"):
+            return {"error": "Missing query."}
+        ops = query_ops.parse_operators(item)
+        state = await langraph_workflow.ainvoke({"query": item["query"]})
+        return {"results": query_ops.apply_operators(state["results"], ops)}
+    
+    token = batching.prefetched_criteria.set(criteria_by_query)
+    try:
+        results = await batching.run_batch(items, run_item)
+    finally:
+        batching.prefetched_criteria.reset(token)
+    return {"results": results}
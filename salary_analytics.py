@@ -0,0 +1,208 @@
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+REPORTING_CURRENCY = os.getenv('REPORTING_CURRENCY', 'USD').upper()
+
+# Static demo FX table: value of one unit of each currency in USD
+FX_TO_USD = {
+    "USD": 1.0, "EUR": 1.08, "GBP": 1.27, "CHF": 1.12, "CAD": 0.73, "AUD": 0.66,
+    "NZD": 0.60, "SGD": 0.74, "JPY": 0.0067, "CNY": 0.138, "KRW": 0.00073, "INR": 0.012,
+    "BRL": 0.18, "MXN": 0.055, "ARS": 0.0011, "CLP": 0.00105, "SEK": 0.095, "NOK": 0.093,
+    "DKK": 0.145, "RUB": 0.011, "EGP": 0.021, "ZAR": 0.054
+}
+
+GROUP_FIELDS = ("currency", "country", "job_role")
+ANALYTICS_MODES = ("rank", "aggregate", "histogram")
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+
+class AnalyticsError(ValueError):
+    """Raised for invalid analytics options; the HR agent turns it into a 400."""
+
+class SalaryStore:
+    """Columnar salary data with vectorized ranking, group-by aggregates and histograms.
+
+    Columns: employee_id (int64), base_salary (float64), currency code (int16 into
+    `currencies`), bonus_eligibility (bool), plus country/job_role codes joined from
+    the employee records and the salary normalized to the reporting currency.
+    Salaries in a currency missing from the FX table normalize to NaN and are left
+    out of rankings and aggregates.
+    """
+
+    def __init__(self, salaries: Iterable[Dict], employees: Iterable[Dict] = (),
+                 reporting_currency: str = REPORTING_CURRENCY, fx_to_usd: Dict[str, float] = FX_TO_USD):
+        salaries = list(salaries)
+        if reporting_currency not in fx_to_usd:
+            raise ValueError(f"No FX rate for reporting currency {reporting_currency}")
+        self.reporting_currency = reporting_currency
+        employees_by_id = {e["id"]: e for e in employees}
+
+        self.employee_id = np.fromiter((s["employee_id"] for s in salaries), dtype=np.int64, count=len(salaries))
+        self.base_salary = np.fromiter((s["base_salary"] for s in salaries), dtype=np.float64, count=len(salaries))
+        self.bonus_eligibility = np.fromiter((bool(s["bonus_eligibility"]) for s in salaries), dtype=bool, count=len(salaries))
+        self.currencies, self.currency = self._encode([s["currency"] for s in salaries])
+        self.countries, self.country = self._encode(
+            [employees_by_id.get(s["employee_id"], {}).get("country", "Unknown") for s in salaries])
+        self.job_roles, self.job_role = self._encode(
+            [employees_by_id.get(s["employee_id"], {}).get("job_role", "Unknown") for s in salaries])
+        self.names = [employees_by_id.get(s["employee_id"], {}).get("name") for s in salaries]
+
+        rates = np.array([fx_to_usd.get(c, np.nan) for c in self.currencies], dtype=np.float64)
+        self.normalized = self.base_salary * rates[self.currency] / fx_to_usd[reporting_currency]
+
+    @staticmethod
+    def _encode(values: List[str]):
+        labels, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        return [str(label) for label in labels], codes.astype(np.int16 if len(labels) < 2 ** 15 else np.int32)
+
+    def __len__(self):
+        return len(self.employee_id)
+
+    def _row(self, i: int) -> Dict:
+        return {
+            "employee_id": int(self.employee_id[i]),
+            "name": self.names[i],
+            "country": self.countries[self.country[i]],
+            "job_role": self.job_roles[self.job_role[i]],
+            "base_salary": float(self.base_salary[i]),
+            "currency": self.currencies[self.currency[i]],
+            "bonus_eligibility": bool(self.bonus_eligibility[i]),
+            f"salary_{self.reporting_currency.lower()}": round(float(self.normalized[i]), 2)
+        }
+
+    def rank(self, n: Optional[int] = 10, ascending: bool = False) -> List[Dict]:
+        """Top (or bottom) n employees by normalized salary; n=None ranks everyone."""
+        valid = np.flatnonzero(~np.isnan(self.normalized))
+        values = self.normalized[valid]
+        if not ascending:
+            values = -values
+        if n is not None and n < len(valid):
+            # argpartition selects the k best in O(N); only those k get sorted
+            part = np.argpartition(values, n - 1)[:n]
+            order = part[np.argsort(values[part], kind="stable")]
+        else:
+            order = np.argsort(values, kind="stable")
+        return [{"rank": r + 1, **self._row(int(valid[i]))} for r, i in enumerate(order)]
+
+    def aggregate(self, group_by: str = "currency", percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                  normalized: bool = True) -> List[Dict]:
+        """Per-group count/min/max/mean/median/percentiles, computed with one lexsort and reduceat.
+
+        Raw amounts (normalized=False) are only comparable within one currency, so they can only
+        be grouped by currency; each group is reported in its own units.
+        """
+        if group_by not in GROUP_FIELDS:
+            raise AnalyticsError(f"group_by must be one of {GROUP_FIELDS}")
+        if not normalized and group_by != "currency":
+            raise AnalyticsError("normalized: false needs group_by \"currency\"; other groups mix currencies")
+        labels = {"currency": self.currencies, "country": self.countries, "job_role": self.job_roles}[group_by]
+        codes = getattr(self, group_by)
+        values = self.normalized if normalized else self.base_salary
+        valid = ~np.isnan(values)
+        codes, values, bonus = codes[valid], values[valid], self.bonus_eligibility[valid]
+        if len(values) == 0:
+            return []
+
+        # Sort by group, then by value within each group
+        order = np.lexsort((values, codes))
+        codes, values, bonus = codes[order], values[order], bonus[order]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+        counts = np.diff(np.append(starts, len(values)))
+
+        sums = np.add.reduceat(values, starts)
+        result = {
+            "count": counts,
+            "min": values[starts],
+            "max": values[starts + counts - 1],
+            "mean": sums / counts,
+            "bonus_eligible": np.add.reduceat(bonus.astype(np.int64), starts)
+        }
+        for p in (50.0, *map(float, percentiles)):
+            # Linear interpolation between the two nearest ranks, as np.percentile does
+            position = starts + (counts - 1) * (p / 100.0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, starts + counts - 1)
+            weight = position - lower
+            result.setdefault("median" if p == 50 else f"p{p:g}", values[lower] * (1 - weight) + values[upper] * weight)
+
+        rows = []
+        for g in range(len(starts)):
+            label = labels[codes[starts[g]]]
+            row = {group_by: label, "unit": self.reporting_currency if normalized else label}
+            for stat, column in result.items():
+                value = column[g]
+                row[stat] = int(value) if stat in ("count", "bonus_eligible") else round(float(value), 2)
+            rows.append(row)
+        return rows
+
+    def histogram(self, bins: int = 10) -> List[Dict]:
+        """Histogram of normalized salaries."""
+        values = self.normalized[~np.isnan(self.normalized)]
+        if len(values) == 0:
+            return []
+        counts, edges = np.histogram(values, bins=bins)
+        return [
+            {"bin_start": round(float(edges[i]), 2), "bin_end": round(float(edges[i + 1]), 2),
+             "count": int(counts[i]), "unit": self.reporting_currency}
+            for i in range(len(counts))
+        ]
+
+def parse_analytics_options(query: str) -> Dict:
+    """Infer analytics options from a natural-language query ("top 3 salaries", "salary by country")."""
+    text = query.lower()
+    options: Dict = {}
+    if re.search(r"\b(histogram|distribution)\b", text):
+        options["mode"] = "histogram"
+    elif re.search(r"\b(highest|lowest|top|bottom|rank|ranking|most|least)\b", text):
+        options["mode"] = "rank"
+        options["ascending"] = bool(re.search(r"\b(lowest|bottom|least)\b", text))
+        top = re.search(r"\b(?:top|bottom)\s+(\d+)\b", text)
+        if top:
+            options["n"] = int(top.group(1))
+    else:
+        options["mode"] = "aggregate"
+    if re.search(r"\b(?:by|per)\s+country\b", text):
+        options["group_by"] = "country"
+    elif re.search(r"\b(?:by|per)\s+(?:job[\s_]?)?role\b", text):
+        options["group_by"] = "job_role"
+    elif re.search(r"\b(?:by|per)\s+currency\b", text):
+        options["group_by"] = "currency"
+    return options
+
+def parse_options(value) -> Dict:
+    """Validated `analytics` object of a request ({} when not sent)."""
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise AnalyticsError("analytics must be an object, e.g. {\"mode\": \"rank\", \"n\": 5}")
+    return value
+
+def run_analytics(store: SalaryStore, options: Dict) -> List[Dict]:
+    """Dispatch an analytics request: mode is "rank", "aggregate" or "histogram"."""
+    options = parse_options(options)
+    mode = options.get("mode", "aggregate")
+    if mode == "rank":
+        n = options.get("n", 10)
+        if n is not None and (not isinstance(n, int) or isinstance(n, bool) or n < 1):
+            raise AnalyticsError("n must be a positive integer or null to rank everyone")
+        return store.rank(n=n, ascending=bool(options.get("ascending", False)))
+    if mode == "histogram":
+        bins = options.get("bins", 10)
+        if not isinstance(bins, int) or isinstance(bins, bool) or bins < 1:
+            raise AnalyticsError("bins must be a positive integer")
+        return store.histogram(bins=bins)
+    if mode == "aggregate":
+        percentiles = options.get("percentiles", DEFAULT_PERCENTILES)
+        if not isinstance(percentiles, (list, tuple)) or not all(
+                isinstance(p, (int, float)) and not isinstance(p, bool) and 0 <= p <= 100 for p in percentiles):
+            raise AnalyticsError("percentiles must be a list of numbers between 0 and 100")
+        return store.aggregate(
+            group_by=options.get("group_by", "currency"),
+            percentiles=percentiles,
+            normalized=bool(options.get("normalized", True))
+        )
+    raise AnalyticsError(f"Unknown analytics mode {mode!r}; use one of {ANALYTICS_MODES}")
@@ -0,0 +1,69 @@
+import os
+import json
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from dotenv import load_dotenv
+import telemetry
+from llm_cache import normalize_query
+
+# Load environment variables
+load_dotenv()
+
+# Coalesce concurrent identical workflow calls (override via .env)
+SINGLEFLIGHT_ENABLED = os.getenv('SINGLEFLIGHT_ENABLED', 'true').lower() in ("1", "true", "yes")
+
+COALESCED_TOTAL = telemetry.Counter(
+    "a2a_singleflight_calls_total",
+    "Workflow calls by app and role: leader (ran the workflow) or coalesced (awaited a leader).",
+    ("app", "role")
+)
+
+def request_key(query: str, query_type: str = "", **params) -> str:
+    """Key for identical requests: normalized query and query_type plus any other workflow inputs."""
+    extra = json.dumps(params, sort_keys=True, default=str) if params else ""
+    return f"{(query_type or '').lower()}\x1f{normalize_query(query or '')}\x1f{extra}"
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key await the same result.
+
+    The call runs in its own task, so a leader whose request is cancelled does not fail the
+    callers waiting on it. Nothing is cached: once the call finishes, the next caller runs it
+    again. Results are shared between callers, so treat them as read-only.
+    """
+
+    def __init__(self, app_name: str, enabled: bool = SINGLEFLIGHT_ENABLED):
+        self.app_name = app_name
+        self.enabled = enabled
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await fn()
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f: self._finished(key, f))
+            self.leaders += 1
+            COALESCED_TOTAL.inc(app=self.app_name, role="leader")
+        else:
+            self.coalesced += 1
+            COALESCED_TOTAL.inc(app=self.app_name, role="coalesced")
+        return await asyncio.shield(future)
+
+    def _finished(self, key: Hashable, future: asyncio.Future):
+        self._in_flight.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # retrieved here in case every caller was cancelled
+
+    def stats(self) -> dict:
+        total = self.leaders + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0
+        }
@@ -0,0 +1,177 @@
+"""Leveled, queue-backed structured logging for the agents and the V4 client.
+
+Loggers live under the "a2a" namespace (`get_logger("hr_agent")`). Records that pass
+the level check and sampling are summarized on the caller's thread (bounded depth,
+list length and string length; salary fields redacted) and handed to a QueueHandler;
+formatting and the stream write happen on a background QueueListener thread. Per-request
+detail is logged at DEBUG, so at the default INFO level it costs one `isEnabledFor`
+check. Each record carries the current trace id from `telemetry`.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from typing import Any, Optional
+from dotenv import load_dotenv
+import telemetry
+
+# Load environment variables
+load_dotenv()
+
+# Logging settings (override via .env)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()  # "text" or "json" (one object per line)
+# Fraction of traces whose DEBUG/INFO records are kept; warnings and errors are always kept
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+# Payload summaries: characters per string, items per list/dict, nesting depth. The string and
+# item caps are lifted while the logger is at DEBUG (full detail); redaction always applies
+LOG_MAX_CHARS = int(os.getenv('LOG_MAX_CHARS', '200'))
+LOG_MAX_ITEMS = int(os.getenv('LOG_MAX_ITEMS', '5'))
+LOG_MAX_DEPTH = int(os.getenv('LOG_MAX_DEPTH', '4'))
+# Keys whose values are replaced with "[redacted]" (regex, case-insensitive); empty disables redaction
+LOG_REDACT_KEYS = os.getenv('LOG_REDACT_KEYS', r'salary|bonus')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+ROOT_LOGGER = "a2a"
+REDACTED = "[redacted]"
+
+_redact_pattern = re.compile(LOG_REDACT_KEYS, re.IGNORECASE) if LOG_REDACT_KEYS else None
+_listener: Optional[logging.handlers.QueueListener] = None
+_dropped = 0
+
+def summarize(value: Any, depth: int = 0, full: bool = False) -> Any:
+    """Bounded, redacted copy of a payload: long strings and collections are cut, salary fields hidden.
+
+    `full` keeps every string and item (only nesting depth is capped) but still redacts.
+    """
+    if isinstance(value, str):
+        if not full and len(value) > LOG_MAX_CHARS:
+            return f"{value[:LOG_MAX_CHARS]}…(+{len(value) - LOG_MAX_CHARS} chars)"
+        return value
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    if depth >= LOG_MAX_DEPTH:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        summary = {}
+        for i, (key, item) in enumerate(value.items()):
+            if not full and i == LOG_MAX_ITEMS:
+                summary["…"] = f"+{len(value) - LOG_MAX_ITEMS} keys"
+                break
+            if _redact_pattern is not None and _redact_pattern.search(str(key)):
+                summary[key] = REDACTED
+            else:
+                summary[key] = summarize(item, depth + 1, full)
+        return summary
+    if isinstance(value, (list, tuple, set)):
+        items = list(value) if isinstance(value, set) else value
+        summary = [summarize(item, depth + 1, full) for item in (items if full else items[:LOG_MAX_ITEMS])]
+        if not full and len(items) > LOG_MAX_ITEMS:
+            summary.append(f"…(+{len(items) - LOG_MAX_ITEMS} items)")
+        return summary
+    return summarize(repr(value), depth, full)
+
+def _sampled(trace_id: Optional[str]) -> bool:
+    """Keep all or none of a trace's records, so a sampled request logs end to end."""
+    if LOG_SAMPLE_RATE >= 1:
+        return True
+    if trace_id is None:
+        return random.random() < LOG_SAMPLE_RATE
+    return zlib.crc32(trace_id.encode()) % 10000 < LOG_SAMPLE_RATE * 10000
+
+class _ContextFilter(logging.Filter):
+    """Tags records with the trace id and applies trace sampling below WARNING."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = telemetry.current_trace_id()
+        return record.levelno >= logging.WARNING or _sampled(record.trace_id)
+
+class _SummarizingQueueHandler(logging.handlers.QueueHandler):
+    """Summarizes arguments on the caller's thread (in full at DEBUG) and never blocks on a full queue."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        full = logging.getLogger(record.name).getEffectiveLevel() <= logging.DEBUG
+        if isinstance(record.args, dict):
+            record.args = summarize(record.args, full=full)
+        elif record.args:
+            record.args = tuple(summarize(arg, full=full) for arg in record.args)
+        fields = getattr(record, "fields", None)
+        if fields:
+            record.fields = summarize(fields, full=full)
+        record.exc_text = self.formatter.formatException(record.exc_info) if record.exc_info else None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = (f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} "
+                f"{record.name[len(ROOT_LOGGER) + 1:] or ROOT_LOGGER} trace={(record.trace_id or '-')[:8]} "
+                f"{record.getMessage()}")
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += "".join(f" {k}={v}" for k, v in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": record.trace_id,
+            "msg": record.getMessage(),
+            **(getattr(record, "fields", None) or {})
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None):
+    """Attach the queue handler to the "a2a" logger and start the background writer (idempotent)."""
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    handler = _SummarizingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.setFormatter(logging.Formatter())
+    handler.addFilter(_ContextFilter())
+    root.addHandler(handler)
+    root.propagate = False
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def dropped_records() -> int:
+    """Records discarded because the queue was full."""
+    return _dropped
+
+def get_logger(name: str) -> logging.Logger:
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
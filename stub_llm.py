@@ -0,0 +1,166 @@
+"""Local OpenAI-compatible chat-completions stub for offline benchmarks.
+
+Responses are deterministic functions of the prompt: the stub recognizes the agents'
+extraction, batch-extraction, planning, routing and clarification prompts and answers
+each in the shape the caller parses; anything else gets a short natural-language answer.
+Latency is LATENCY ± JITTER milliseconds per request (seeded), plus TOKEN_MS per
+streamed token when the request sets "stream": true. ERROR_RATE of requests (seeded) are
+answered with 429 and a Retry-After of RETRY_AFTER seconds, to exercise client retries.
+
+    python stub_llm.py --port 9000 --latency-ms 300 --jitter-ms 100
+    API_URL=http://127.0.0.1:9000/v1/chat/completions uvicorn hr_agent:app --port 8001
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from prompt_serializer import estimate_tokens
+
+STUB_LLM_LATENCY_MS = float(os.getenv('STUB_LLM_LATENCY_MS', '200'))
+STUB_LLM_JITTER_MS = float(os.getenv('STUB_LLM_JITTER_MS', '50'))
+STUB_LLM_TOKEN_MS = float(os.getenv('STUB_LLM_TOKEN_MS', '5'))
+STUB_LLM_SEED = int(os.getenv('STUB_LLM_SEED', '42'))
+STUB_LLM_ERROR_RATE = float(os.getenv('STUB_LLM_ERROR_RATE', '0'))
+STUB_LLM_RETRY_AFTER = os.getenv('STUB_LLM_RETRY_AFTER', '1')
+
+app = FastAPI()
+_rng = random.Random(STUB_LLM_SEED)
+_stats = {"requests": 0, "streamed": 0, "rate_limited": 0}
+
+ID_PATTERN = re.compile(r"\b(?:id|employee)\s*#?\s*(\d+)\b", re.IGNORECASE)
+ROLE_PATTERN = re.compile(r"\b(CEO|CTO|CFO|COO|CMO|(?:[A-Z][a-z]+ )?(?:Engineer|Manager|Scientist|Analyst|Specialist|Designer|Architect))s?\b")
+NAME_PATTERN = re.compile(r"\b([A-Z][a-z]+ [A-Z][a-z]+)\b")
+
+def criteria_for(query: str) -> dict:
+    """Criteria the stub "extracts" from a query: passthrough JSON, id, job role, name or all."""
+    try:
+        parsed = json.loads(query)
+        if isinstance(parsed, dict):
+            return parsed
+    except ValueError:
+        pass
+    id_match = ID_PATTERN.search(query)
+    if id_match:
+        return {"id": int(id_match.group(1))}
+    role_match = ROLE_PATTERN.search(query)
+    if role_match:
+        return {"job_role": role_match.group(1)}
+    name_match = NAME_PATTERN.search(query)
+    if name_match:
+        return {"name": name_match.group(1)}
+    return {"all": True}
+
+def route_for(query: str):
+    """(agent_type, query_type) the stub plans for a query, by keyword."""
+    text = query.lower()
+    if re.search(r"\b(highest|lowest|top)\b", text):
+        kind = "role" if "role" in text else "salary"
+        return "comparison", ("lowest_" if "lowest" in text else "highest_") + kind
+    if re.search(r"\b(average|median|percentile|distribution)\b", text):
+        return "hr", "salary_analytics"
+    if "reports to" in text or "reporting to" in text:
+        return "hr", "subtree"
+    if "chain of command" in text:
+        return "hr", "chain"
+    if "hierarchy" in text:
+        return "hr", "hierarchy"
+    if "schedule" in text:
+        return "multi_agent", "schedule"
+    if "salary" in text or "salaries" in text:
+        return "multi_agent", "salary"
+    return "employee", "general"
+
+def respond(system: str, user: str) -> str:
+    """Deterministic completion text for a (system, user) prompt pair."""
+    if "JSON array of user queries" in system:
+        try:
+            queries = json.loads(user)
+        except ValueError:
+            queries = []
+        return json.dumps([criteria_for(q) for q in queries])
+    if "plans how to answer" in system:
+        agent_type, query_type = route_for(user)
+        return json.dumps({"clarified_query": user, "agent_type": agent_type, "query_type": query_type,
+                           "criteria": criteria_for(user) if agent_type != "comparison" else {}})
+    if "determines the routing strategy" in system:
+        agent_type, query_type = route_for(user)
+        return json.dumps({"agent_type": agent_type, "query_type": query_type})
+    if "clarifies and improves" in system:
+        return user
+    if "extracts" in system and "criteria" in system:
+        return json.dumps(criteria_for(user))
+    return f"Here is a summary of the {estimate_tokens(system)}-token result for your question."
+
+async def _sleep_latency():
+    delay = max(STUB_LLM_LATENCY_MS + _rng.uniform(-STUB_LLM_JITTER_MS, STUB_LLM_JITTER_MS), 0)
+    await asyncio.sleep(delay / 1000)
+
+@app.get("/")
+def root():
+    return {"message": "Stub LLM is running.", **_stats}
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    messages = body.get("messages", [])
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    content = respond(system, user)
+    model = body.get("model") or "stub"
+    created = int(time.time())
+    _stats["requests"] += 1
+    if STUB_LLM_ERROR_RATE and _rng.random() < STUB_LLM_ERROR_RATE:
+        _stats["rate_limited"] += 1
+        return JSONResponse(status_code=429, content={"error": {"message": "Rate limit reached (stub)"}},
+                            headers={"Retry-After": STUB_LLM_RETRY_AFTER})
+    await _sleep_latency()
+
+    if body.get("stream"):
+        _stats["streamed"] += 1
+
+        async def events():
+            for i, piece in enumerate(re.findall(r"\S+\s*", content)):
+                if i:
+                    await asyncio.sleep(STUB_LLM_TOKEN_MS / 1000)
+                chunk = {"object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    prompt_tokens = estimate_tokens(system) + estimate_tokens(user)
+    completion_tokens = estimate_tokens(content)
+    return {
+        "id": f"stub-{_stats['requests']}",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens}
+    }
+
+def main():
+    global STUB_LLM_LATENCY_MS, STUB_LLM_JITTER_MS, STUB_LLM_ERROR_RATE, _rng
+    parser = argparse.ArgumentParser(description="Run the stub chat-completions server.")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=STUB_LLM_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=STUB_LLM_JITTER_MS)
+    parser.add_argument("--seed", type=int, default=STUB_LLM_SEED)
+    parser.add_argument("--error-rate", type=float, default=STUB_LLM_ERROR_RATE, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+    STUB_LLM_LATENCY_MS, STUB_LLM_JITTER_MS, STUB_LLM_ERROR_RATE = args.latency_ms, args.jitter_ms, args.error_rate
+    _rng = random.Random(args.seed)
+
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Seeded synthetic HR dataset generator for scale testing.
+
+Produces employees, salaries, schedules and hierarchy roles that are consistent with
+each other: every employee has exactly one salary and one schedule, every job role
+has a hierarchy record, salaries are drawn in the employee's local currency from a
+level-based USD band, and schedule timezones follow the employee's country.
+
+    python synthetic_data.py --employees 100000 --seed 42 --out data/employees_100k.json.gz
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+from typing import Dict, List
+from salary_analytics import FX_TO_USD
+
+# (country, currency, timezone)
+COUNTRIES = [
+    ("USA", "USD", "EST"), ("Canada", "CAD", "EST"), ("UK", "GBP", "GMT"), ("Australia", "AUD", "AEST"),
+    ("Germany", "EUR", "CET"), ("France", "EUR", "CET"), ("Japan", "JPY", "JST"), ("Brazil", "BRL", "BRT"),
+    ("India", "INR", "IST"), ("South Korea", "KRW", "KST"), ("Mexico", "MXN", "CST"), ("Spain", "EUR", "CET"),
+    ("Italy", "EUR", "CET"), ("Netherlands", "EUR", "CET"), ("Sweden", "SEK", "CET"), ("Ireland", "EUR", "GMT"),
+    ("New Zealand", "NZD", "NZST"), ("Singapore", "SGD", "SGT"), ("Argentina", "ARS", "ART"),
+    ("Switzerland", "CHF", "CET"), ("Portugal", "EUR", "WET"), ("Chile", "CLP", "CLT"), ("Norway", "NOK", "CET"),
+    ("Denmark", "DKK", "CET"), ("Finland", "EUR", "EET"), ("China", "CNY", "CST"), ("Russia", "RUB", "MSK"),
+    ("Egypt", "EGP", "EET"), ("South Africa", "ZAR", "SAST")
+]
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Ethan", "Fiona", "George", "Hannah", "Ivy", "Jack", "Karen", "Liam",
+    "Mia", "Noah", "Olivia", "Paul", "Quinn", "Rachel", "Sam", "Tina", "Umar", "Victor", "Wendy", "Xavier",
+    "Yara", "Zane", "Aisha", "Ben", "Chloe", "David", "Elena", "Felix", "Grace", "Hugo", "Isla", "James",
+    "Kenji", "Lucia", "Mateo", "Nina", "Omar", "Priya", "Rafael", "Sofia", "Tomas", "Uma", "Valentina",
+    "William", "Ximena", "Yusuf", "Zoe", "Arjun", "Bianca", "Carlos", "Dmitri", "Emma", "Farah", "Gabriel",
+    "Hiro", "Ingrid", "Jonas", "Kofi", "Leila", "Marco", "Nadia", "Oscar", "Pablo", "Rosa", "Sven", "Thandi"
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Brown", "Prince", "Hunt", "Gallagher", "Green", "Lee", "King", "Hall", "Harris",
+    "Wright", "Baker", "Moore", "Taylor", "Wilson", "Perez", "Rodriguez", "Sanchez", "Garcia", "Martin",
+    "Rossi", "Muller", "Dubois", "Tanaka", "Kim", "Singh", "Silva", "Novak", "Jensen", "Larsen", "Nakamura",
+    "Kowalski", "Ivanov", "Okafor", "Mensah", "Haddad", "Costa", "Fischer", "Schmidt", "Andersen", "Murphy",
+    "Kelly", "Chen", "Wang", "Patel", "Khan", "Lopez", "Gonzalez", "Nguyen", "Tran", "Yilmaz", "Cohen",
+    "Berg", "Lindqvist", "Fernandes", "Morales", "Ortiz", "Rahman", "Suzuki", "Sato", "Park", "Choi"
+]
+
+# Fixed top of the hierarchy: (job_role, reports_to, level)
+EXECUTIVE_ROLES = [
+    ("CEO", None, 1),
+    ("CTO", "CEO", 2), ("CFO", "CEO", 2), ("COO", "CEO", 2), ("CMO", "CEO", 2), ("Head of HR", "CEO", 2)
+]
+
+# department: (head role, head reports to, individual contributor roles)
+DEPARTMENTS = {
+    "Engineering": ("VP Engineering", "CTO", ["Software Engineer", "Data Engineer", "DevOps Engineer", "QA Engineer", "Cloud Architect", "Cybersecurity Analyst"]),
+    "Data": ("VP Data", "CTO", ["Data Scientist", "Machine Learning Engineer", "Research Scientist"]),
+    "Product": ("VP Product", "COO", ["Product Manager", "Product Designer", "UX Designer", "Technical Writer"]),
+    "Sales": ("VP Sales", "COO", ["Sales Representative", "Account Executive", "Customer Support"]),
+    "Marketing": ("VP Marketing", "CMO", ["Marketing Specialist", "Content Strategist", "SEO Specialist"]),
+    "Finance": ("VP Finance", "CFO", ["Financial Analyst", "Accountant", "Project Coordinator"]),
+    "People": ("Director HR", "Head of HR", ["HR Specialist", "Recruiter"])
+}
+
+# One generated team-lead role per this many employees
+TEAM_SIZE = 200
+
+# Yearly USD band midpoint for level 1, shrinking per level below it
+TOP_SALARY_USD = 250000
+SALARY_LEVEL_FACTOR = 0.8
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+SCHEDULE_TEMPLATES = [
+    # (weight, work_days, start_time, end_time, shift_type)
+    (60, WEEKDAYS, "09:00 AM", "05:00 PM", "Day"),
+    (20, WEEKDAYS, "08:00 AM", "06:00 PM", "Day"),
+    (10, WEEKDAYS, "10:00 PM", "06:00 AM", "Night"),
+    (10, ["Saturday", "Sunday"], "08:00 AM", "04:00 PM", "Weekend")
+]
+
+def generate_hierarchy(n_employees: int, rng: random.Random) -> List[Dict]:
+    """Executives, department heads, generated team leads (nested within their department) and IC roles."""
+    hierarchy = [{"job_role": role, "reports_to": parent, "level": level} for role, parent, level in EXECUTIVE_ROLES]
+    levels = {role: level for role, _, level in EXECUTIVE_ROLES}
+    for head, head_parent, _ in DEPARTMENTS.values():
+        levels[head] = levels[head_parent] + 1
+        hierarchy.append({"job_role": head, "reports_to": head_parent, "level": levels[head]})
+
+    leads_by_department: Dict[str, List[str]] = {department: [] for department in DEPARTMENTS}
+    departments = list(DEPARTMENTS)
+    for i in range(n_employees // TEAM_SIZE):
+        department = departments[i % len(departments)]
+        leads = leads_by_department[department]
+        # About half the teams nest under an existing team, so chains get deeper with scale
+        parent = rng.choice(leads) if leads and rng.random() < 0.5 else DEPARTMENTS[department][0]
+        role = f"{department} Team Lead {i + 1}"
+        levels[role] = levels[parent] + 1
+        hierarchy.append({"job_role": role, "reports_to": parent, "level": levels[role]})
+        leads.append(role)
+
+    for head, _, ic_roles in DEPARTMENTS.values():
+        for role in ic_roles:
+            hierarchy.append({"job_role": role, "reports_to": head, "level": levels[head] + 1})
+    return hierarchy
+
+def generate_dataset(n_employees: int, seed: int = 42) -> Dict[str, List[Dict]]:
+    """Generate {"employees", "salaries", "schedules", "hierarchy"} for n_employees; same seed, same data."""
+    rng = random.Random(seed)
+    hierarchy = generate_hierarchy(n_employees, rng)
+    level_by_role = {h["job_role"]: h["level"] for h in hierarchy}
+
+    # Every executive, head and team lead role is held by one employee; everyone else is an IC
+    managed_roles = [h["job_role"] for h in hierarchy if h["job_role"] not in
+                     {role for _, _, ic_roles in DEPARTMENTS.values() for role in ic_roles}]
+    ic_roles = [role for _, _, roles in DEPARTMENTS.values() for role in roles]
+    weights = [w for w, *_ in SCHEDULE_TEMPLATES]
+
+    employees, salaries, schedules = [], [], []
+    for employee_id in range(1, n_employees + 1):
+        job_role = managed_roles[employee_id - 1] if employee_id <= len(managed_roles) else rng.choice(ic_roles)
+        country, currency, timezone = rng.choice(COUNTRIES)
+        employees.append({
+            "id": employee_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "country": country,
+            "job_role": job_role
+        })
+
+        level = level_by_role[job_role]
+        salary_usd = TOP_SALARY_USD * SALARY_LEVEL_FACTOR ** (level - 1) * rng.lognormvariate(0, 0.15)
+        local = salary_usd / FX_TO_USD[currency]
+        step = 10 ** max(int(math.log10(local)) - 2, 0)
+        salaries.append({
+            "employee_id": employee_id,
+            "base_salary": float(round(local / step) * step),
+            "currency": currency,
+            "bonus_eligibility": level <= 4 or rng.random() < 0.5
+        })
+
+        _, work_days, start_time, end_time, shift_type = rng.choices(SCHEDULE_TEMPLATES, weights)[0]
+        schedules.append({
+            "employee_id": employee_id,
+            "work_days": list(work_days),
+            "start_time": start_time,
+            "end_time": end_time,
+            "timezone": timezone,
+            "shift_type": shift_type
+        })
+    return {"employees": employees, "salaries": salaries, "schedules": schedules, "hierarchy": hierarchy}
+
+def write_dataset(dataset: Dict[str, List[Dict]], path: str):
+    """Write a dataset as JSON; gzip-compressed when the path ends in .gz."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wt", encoding="utf-8") as f:
+        json.dump(dataset, f, separators=(",", ":"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic HR dataset.")
+    parser.add_argument("--employees", type=int, default=10000, help="number of employees (e.g. 10000, 100000, 1000000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="output .json or .json.gz path")
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.employees, args.seed)
+    write_dataset(dataset, args.out)
+    print(f"Wrote {len(dataset['employees'])} employees and {len(dataset['hierarchy'])} hierarchy roles to {args.out}")
+
+if __name__ == "__main__":
+    main()
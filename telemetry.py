@@ -0,0 +1,212 @@
+"""Span tracing and Prometheus metrics shared by both agents and the V4 client.
+
+A trace id travels in the `x-trace-id` header from the client into the agents; inside a
+process it lives in a context variable, so every span opened while handling a request
+(LLM calls, LangGraph nodes, search tools, inter-agent HTTP calls) is tagged with it.
+Span durations feed the `a2a_stage_latency_seconds` histogram; `instrument(app, name)`
+adds request metrics and a `GET /metrics` endpoint in the Prometheus text format.
+"""
+
+import os
+import time
+import uuid
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Log one line per finished span (INFO, via structured_log)
+TRACE_LOG = os.getenv('TRACE_LOG', 'false').lower() in ("1", "true", "yes")
+
+TRACE_HEADER = "x-trace-id"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+# Finished spans of the current trace, when the caller asked to collect them (see `trace`)
+collected_spans: ContextVar[Optional[List[Dict]]] = ContextVar("collected_spans", default=None)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values → (per-bucket counts with a final +Inf slot, sum, count)
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total:.6f}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+
+REQUEST_LATENCY = Histogram("a2a_request_latency_seconds", "HTTP request latency by app and route.", ("app", "route"))
+REQUESTS_TOTAL = Counter("a2a_requests_total", "HTTP requests by app, route and status code.", ("app", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("a2a_requests_in_flight", "HTTP requests currently being handled.", ("app",))
+STAGE_LATENCY = Histogram("a2a_stage_latency_seconds", "Span latency by stage (LLM calls, graph nodes, tools, agent calls).", ("stage",))
+LLM_CALLS_TOTAL = Counter("a2a_llm_calls_total", "LLM calls by kind (chat, stream) and outcome (ok, error, replay).", ("kind", "outcome"))
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+def current_trace_id() -> Optional[str]:
+    return trace_id_var.get()
+
+def trace_headers() -> Dict[str, str]:
+    """Headers that carry the current trace into another agent."""
+    trace_id = trace_id_var.get()
+    return {TRACE_HEADER: trace_id} if trace_id else {}
+
+@contextmanager
+def trace(trace_id: Optional[str] = None, collect: bool = False):
+    """Start (or continue) a trace; with collect=True yields the list its finished spans are appended to."""
+    spans: Optional[List[Dict]] = [] if collect else None
+    id_token = trace_id_var.set(trace_id or new_trace_id())
+    spans_token = collected_spans.set(spans) if collect else None
+    try:
+        yield spans
+    finally:
+        if spans_token is not None:
+            collected_spans.reset(spans_token)
+        trace_id_var.reset(id_token)
+
+@contextmanager
+def span(stage: str, **attributes):
+    """Time a stage of the current trace and record it in the stage latency histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        record = {"stage": stage, "ms": round(elapsed * 1000, 2), **attributes}
+        spans = collected_spans.get()
+        if spans is not None:
+            spans.append(record)
+        if TRACE_LOG:
+            _trace_logger().info("%s %.1f ms", stage, record["ms"], extra={"fields": attributes})
+
+@functools.lru_cache(maxsize=None)
+def _trace_logger():
+    import structured_log  # imported late: structured_log imports this module
+    return structured_log.get_logger("trace")
+
+def traced(stage: str):
+    """Decorator form of `span` for async functions (LangGraph nodes, tools)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with span(stage):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def instrument(app, app_name: str):
+    """Add trace propagation, request metrics and GET /metrics to a FastAPI app."""
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+
+    @app.middleware("http")
+    async def telemetry_middleware(request: Request, call_next):
+        if request.url.path == "/metrics":
+            return await call_next(request)
+        REQUESTS_IN_FLIGHT.inc(app=app_name)
+        start = time.perf_counter()
+        status = 500
+        with trace(request.headers.get(TRACE_HEADER)):
+            trace_id = trace_id_var.get()
+            try:
+                response = await call_next(request)
+                status = response.status_code
+                response.headers[TRACE_HEADER] = trace_id
+                return response
+            finally:
+                route = request.scope.get("route")
+                route_path = getattr(route, "path", "unmatched")
+                REQUESTS_IN_FLIGHT.dec(app=app_name)
+                REQUEST_LATENCY.observe(time.perf_counter() - start, app=app_name, route=route_path)
+                REQUESTS_TOTAL.inc(app=app_name, route=route_path, status=status)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+# The modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dataset_loader
+
+@pytest.fixture(scope="session")
+def dataset():
+    """The 40-employee demo dataset."""
+    return dataset_loader.load_dataset("demo")
+
+API_HEADERS = {"x-api-key": "dummy-dekallm-key"}
+
+@pytest.fixture(scope="session")
+def hr_client():
+    from fastapi.testclient import TestClient
+    import hr_agent
+    return TestClient(hr_agent.app, headers=API_HEADERS)
+
+@pytest.fixture(scope="session")
+def employee_client():
+    from fastapi.testclient import TestClient
+    import remote_agent
+    return TestClient(remote_agent.app, headers=API_HEADERS)
@@ -0,0 +1,49 @@
+import pytest
+from employee_index import EmployeeIndex
+from synthetic_data import generate_dataset
+
+def linear_search(records, criteria):
+    """The original employee_search_tool scan the index replaced."""
+    if criteria.get("all"):
+        return records
+    results = records
+    if "id" in criteria:
+        try:
+            id_val = int(criteria["id"])
+            results = [e for e in results if e["id"] == id_val]
+        except Exception:
+            pass
+    for field in ("name", "country", "job_role"):
+        if field in criteria:
+            value = str(criteria[field]).lower()
+            results = [e for e in results if value in e[field].lower()]
+    return results
+
+def criteria_cases(records):
+    cases = [{}, {"all": True}, {"id": 7}, {"id": "12"}, {"id": 999}, {"id": "abc"},
+             {"name": "a"}, {"name": "an"}, {"name": "zzz"}, {"country": "US"}, {"job_role": "engineer"},
+             {"job_role": "Engineer", "country": "a"}, {"name": "e", "country": "i", "id": 3}]
+    for record in records[::7]:
+        cases.append({"name": record["name"]})
+        cases.append({"name": record["name"].split()[-1].upper()})
+        cases.append({"job_role": record["job_role"][2:8], "country": record["country"]})
+    return cases
+
+def test_search_matches_linear_scan(dataset):
+    employees = dataset["employees"]
+    index = EmployeeIndex(employees)
+    assert len(index) == len(employees)
+    for criteria in criteria_cases(employees):
+        assert index.search(criteria) == linear_search(employees, criteria), criteria
+
+@pytest.mark.parametrize("ngram", [2, 3, 4])
+def test_search_matches_linear_scan_synthetic(ngram):
+    employees = generate_dataset(500, seed=7)["employees"]
+    index = EmployeeIndex(employees, ngram=ngram)
+    for criteria in criteria_cases(employees):
+        assert index.search(criteria) == linear_search(employees, criteria), criteria
+
+def test_lookup_short_needle_scans_values(dataset):
+    index = EmployeeIndex(dataset["employees"])
+    expected = {i for i, e in enumerate(dataset["employees"]) if "o" in e["name"].lower()}
+    assert index.lookup("name", "O") == expected
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from email.utils import formatdate
+import httpx
+import pytest
+import llm_client
+import llm_gateway
+import stub_llm
+from llm_gateway import GatewayOverloaded, LLMGateway
+
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "Find employee 7"}], "max_tokens": 50}
+
+class Draws:
+    """Stand-in for the stub's seeded RNG: 429 for the first `failures` requests, then success."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+
+    def random(self):
+        self.failures -= 1
+        return 0.0 if self.failures >= 0 else 1.0
+
+    def uniform(self, a, b):
+        return 0.0
+
+@pytest.fixture
+def stub(monkeypatch):
+    """llm_client pointed at the stub LLM app in-process, with a fresh gateway."""
+    monkeypatch.setattr(stub_llm, "STUB_LLM_LATENCY_MS", 0)
+    monkeypatch.setattr(stub_llm, "STUB_LLM_JITTER_MS", 0)
+    monkeypatch.setattr(stub_llm, "STUB_LLM_ERROR_RATE", 1.0)
+    monkeypatch.setattr(stub_llm, "STUB_LLM_RETRY_AFTER", "0.05")
+    monkeypatch.setattr(stub_llm, "_stats", {"requests": 0, "streamed": 0, "rate_limited": 0})
+    monkeypatch.setattr(llm_client, "base_url", "http://stub-llm/v1/chat/completions")
+    monkeypatch.setattr(llm_client.cassette, "mode", "off")
+    gateway = LLMGateway(max_in_flight=4, queue_max=8, queue_timeout=1, max_retries=2)
+    monkeypatch.setattr(llm_client, "gateway", gateway)
+    delays = []
+    retry_delay = gateway.retry_delay
+
+    def recording(attempt, error):
+        delay = retry_delay(attempt, error)
+        delays.append(delay)
+        return delay
+
+    monkeypatch.setattr(gateway, "retry_delay", recording)
+    gateway.delays = delays
+    return gateway
+
+def run(coro):
+    async def with_client():
+        llm_client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_llm.app))
+        try:
+            return await coro
+        finally:
+            await llm_client.close_client()
+    return asyncio.run(with_client())
+
+def test_429_is_retried_after_retry_after(stub, monkeypatch):
+    monkeypatch.setattr(stub_llm, "_rng", Draws(failures=2))
+    data = run(llm_client.post_chat(PAYLOAD))
+    assert data["choices"][0]["message"]["content"]
+    assert stub_llm._stats == {"requests": 3, "streamed": 0, "rate_limited": 2}
+    assert stub.retries == 2 and stub.shed == 0
+    # Full jitter alone could pick ~0; Retry-After sets the floor
+    assert len(stub.delays) == 2 and all(delay >= 0.05 for delay in stub.delays)
+
+def test_429_past_retries_is_shed(stub, monkeypatch):
+    monkeypatch.setattr(stub_llm, "_rng", Draws(failures=10))
+    with pytest.raises(GatewayOverloaded) as raised:
+        run(llm_client.post_chat(PAYLOAD))
+    assert "429" in str(raised.value)
+    assert raised.value.retry_after == pytest.approx(0.05)
+    assert stub_llm._stats["requests"] == stub.max_retries + 1
+    assert stub.delays[-1] is None
+
+def test_long_retry_after_is_not_waited_out(stub, monkeypatch):
+    monkeypatch.setattr(stub_llm, "_rng", Draws(failures=1))
+    monkeypatch.setattr(stub_llm, "STUB_LLM_RETRY_AFTER", str(int(llm_gateway.LLM_RETRY_AFTER_MAX) + 60))
+    start = time.monotonic()
+    with pytest.raises(GatewayOverloaded):
+        run(llm_client.post_chat(PAYLOAD))
+    assert time.monotonic() - start < 1
+    assert stub_llm._stats["requests"] == 1 and stub.retries == 0
+
+def test_non_retryable_status_is_raised(stub, monkeypatch):
+    async def bad_request():
+        request = httpx.Request("POST", "http://stub-llm/v1/chat/completions")
+        raise httpx.HTTPStatusError("400", request=request, response=httpx.Response(400, request=request))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(stub.call(bad_request, tokens=10))
+    assert stub.retries == 0
+
+def test_queue_overflow_and_timeout_are_shed(stub, monkeypatch):
+    monkeypatch.setattr(stub_llm, "STUB_LLM_ERROR_RATE", 0)
+    monkeypatch.setattr(stub_llm, "STUB_LLM_LATENCY_MS", 300)
+    gateway = LLMGateway(max_in_flight=1, queue_max=1, queue_timeout=0.05, max_retries=0)
+    monkeypatch.setattr(llm_client, "gateway", gateway)
+
+    async def burst():
+        first = asyncio.ensure_future(llm_client.post_chat(PAYLOAD))
+        await asyncio.sleep(0.02)
+        # One waiter fits in the queue and times out; the next finds the queue full
+        return await asyncio.gather(first, llm_client.post_chat(PAYLOAD), llm_client.post_chat(PAYLOAD),
+                                    return_exceptions=True)
+
+    ok, timed_out, overflow = run(burst())
+    assert ok["choices"]
+    assert isinstance(timed_out, GatewayOverloaded) and "queue_timeout" in str(timed_out)
+    assert isinstance(overflow, GatewayOverloaded) and "queue_full" in str(overflow)
+    assert gateway.shed == 2 and gateway.admitted == 1
+    assert gateway.in_flight == 0 and gateway.queued == 0
+
+def test_rate_limit_waits_then_sheds():
+    gateway = LLMGateway(rate_rps=20, rate_burst=1, queue_timeout=0.02, max_retries=0)
+
+    async def ok():
+        return "ok"
+
+    async def three():
+        return await asyncio.gather(*(gateway.call(ok, tokens=1) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(three())
+    # The burst admits one call; the next refill (50 ms) is past every waiter's 20 ms deadline
+    assert results[0] == "ok"
+    assert all(isinstance(r, GatewayOverloaded) for r in results[1:])
+
+def test_shed_call_is_503_with_retry_after():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    app = FastAPI()
+    llm_gateway.install(app)
+
+    @app.get("/")
+    async def overloaded():
+        raise GatewayOverloaded("queue_full", retry_after=2.5)
+
+    response = TestClient(app).get("/")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "2"
+
+def test_retry_after_seconds():
+    response = lambda value: httpx.Response(429, headers={"Retry-After": value} if value is not None else {})
+    assert llm_gateway.retry_after_seconds(response("3")) == 3.0
+    assert llm_gateway.retry_after_seconds(response("-1")) == 0.0
+    assert llm_gateway.retry_after_seconds(response(None)) is None
+    assert llm_gateway.retry_after_seconds(response("soon")) is None
+    assert llm_gateway.retry_after_seconds(response(formatdate(time.time() + 120, usegmt=True))) == pytest.approx(120, abs=2)
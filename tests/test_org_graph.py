@@ -0,0 +1,77 @@
+from org_graph import OrgGraph
+from synthetic_data import generate_dataset
+
+def naive_subtree(records, role):
+    """Everyone under `role`, found by repeatedly scanning reports_to."""
+    found, frontier = set(), {role}
+    while frontier:
+        frontier = {r["job_role"] for r in records if r.get("reports_to") in frontier} - found - {role}
+        found |= frontier
+    return found
+
+def check_against_scan(records):
+    graph = OrgGraph(records)
+    for role in graph.records:
+        expected = naive_subtree(records, role) if role in graph.tin else set()
+        subtree = graph.subtree(role)
+        assert len(subtree) == len(set(subtree)) == graph.subtree_size(role)
+        assert set(subtree) == expected, role
+        for other in graph.records:
+            assert graph.is_ancestor(role, other) == (other in expected)
+    return graph
+
+def test_demo_hierarchy(dataset):
+    graph = check_against_scan(dataset["hierarchy"])
+    assert graph.cycles == []
+    # Network Engineer reports to a role that has no record of its own
+    assert "DevOps Engineer" in graph.dangling
+    assert "Network Engineer" in graph.dangling["DevOps Engineer"]
+    assert graph.chain("Network Engineer") == ["Network Engineer", "DevOps Engineer"]
+
+def test_synthetic_hierarchy():
+    check_against_scan(generate_dataset(300, seed=11)["hierarchy"])
+
+def test_subtree_is_preorder():
+    records = [
+        {"job_role": "CEO", "reports_to": None},
+        {"job_role": "CTO", "reports_to": "CEO"},
+        {"job_role": "CFO", "reports_to": "CEO"},
+        {"job_role": "Engineer", "reports_to": "CTO"},
+        {"job_role": "Analyst", "reports_to": "CFO"}
+    ]
+    graph = OrgGraph(records)
+    assert graph.subtree("CEO") == ["CTO", "Engineer", "CFO", "Analyst"]
+    assert graph.direct_reports("CEO") == ["CTO", "CFO"]
+    assert graph.depth == {"CEO": 0, "CTO": 1, "CFO": 1, "Engineer": 2, "Analyst": 2}
+    assert graph.chain("Engineer") == ["Engineer", "CTO", "CEO"]
+    assert graph.subtree("Engineer") == [] and graph.subtree("Nobody") == []
+
+def test_cycles_are_reported_not_looped():
+    records = [
+        {"job_role": "CEO", "reports_to": None},
+        {"job_role": "A", "reports_to": "B"},
+        {"job_role": "B", "reports_to": "A"},
+        {"job_role": "C", "reports_to": "A"}
+    ]
+    graph = OrgGraph(records)
+    assert sorted(graph.cycles) == ["A", "B", "C"]
+    assert graph.subtree("A") == [] and graph.subtree_size("A") == 0
+    assert not graph.is_ancestor("A", "C")
+    assert graph.chain("C") == ["C", "A", "B"]
+
+def test_deep_chain_does_not_recurse():
+    depth = 20000
+    records = [{"job_role": "R0", "reports_to": None}] + [
+        {"job_role": f"R{i}", "reports_to": f"R{i - 1}"} for i in range(1, depth)]
+    graph = OrgGraph(records)
+    assert graph.subtree_size("R0") == depth - 1
+    assert graph.depth[f"R{depth - 1}"] == depth - 1
+    assert graph.is_ancestor("R0", f"R{depth - 1}")
+
+def test_resolve():
+    graph = OrgGraph([{"job_role": "Software Engineer", "reports_to": None},
+                      {"job_role": "Senior Software Engineer", "reports_to": "Software Engineer"}])
+    assert graph.resolve("software engineer") == "Software Engineer"
+    assert graph.resolve("senior") == "Senior Software Engineer"
+    assert graph.resolve("engineer") == "Software Engineer"
+    assert graph.resolve("pilot") is None
@@ -0,0 +1,101 @@
+import json
+import pytest
+import pagination
+from pagination import PagingError
+
+def walk(client, path, body):
+    """Every page of a paged request: (rows, number of pages)."""
+    rows, pages, cursor = [], 0, None
+    while True:
+        response = client.post(path, json={**body, "cursor": cursor} if cursor else body)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["results"]) <= body["page_size"]
+        rows += page["results"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+@pytest.fixture
+def workflow_runs(monkeypatch):
+    """Counts HR workflow runs."""
+    import hr_agent
+    runs = []
+    invoke = hr_agent.langraph_workflow.ainvoke
+
+    async def counting(*args, **kwargs):
+        runs.append(args)
+        return await invoke(*args, **kwargs)
+
+    monkeypatch.setattr(hr_agent.langraph_workflow, "ainvoke", counting)
+    return runs
+
+def test_cursor_round_trip():
+    cursor = pagination.encode_cursor(40, 'W/"abc-0123456789abcdef"')
+    assert pagination.decode_cursor(cursor, 'W/"abc-0123456789abcdef"') == 40
+    # Another request body, or the same body after the data changed
+    for other in ('W/"abc-fedcba9876543210"', 'W/"abd-0123456789abcdef"'):
+        with pytest.raises(PagingError):
+            pagination.decode_cursor(cursor, other)
+    with pytest.raises(PagingError):
+        pagination.decode_cursor("not a cursor", 'W/"abc-0123456789abcdef"')
+
+@pytest.mark.parametrize("page_size", [1, 7, 40, 1000])
+def test_walk_equals_unpaged(hr_client, workflow_runs, page_size):
+    body = {"query": "all salaries", "order_by": ["-base_salary", "employee_id"]}
+    expected = hr_client.post("/hr-tasks/send", json=body).json()["results"]
+    del workflow_runs[:]
+    rows, pages = walk(hr_client, "/hr-tasks/send", {**body, "page_size": page_size})
+    assert rows == expected
+    assert pages == max(-(-len(expected) // page_size), 1)
+    # Later pages are served from the rows cached by the first one
+    assert len(workflow_runs) == 1
+    assert not pagination._page_rows
+
+def test_walk_respects_operators(employee_client):
+    body = {"query": "all employees", "order_by": "name", "offset": 3, "limit": 11, "fields": ["id", "name"]}
+    expected = employee_client.post("/tasks/send", json=body).json()["results"]
+    assert len(expected) == 11 and set(expected[0]) == {"id", "name"}
+    rows, pages = walk(employee_client, "/tasks/send", {**body, "page_size": 4})
+    assert rows == expected and pages == 3
+
+def test_cursor_replayed_on_another_query_is_400(hr_client, employee_client):
+    first = hr_client.post("/hr-tasks/send", json={"query": "all salaries", "page_size": 5}).json()
+    cursor = first["next_cursor"]
+    assert cursor
+    for body in ({"query": "all schedules", "page_size": 5, "cursor": cursor},
+                 {"query": "all salaries", "page_size": 6, "cursor": cursor},
+                 {"query": "all salaries", "page_size": 5, "order_by": "employee_id", "cursor": cursor}):
+        response = hr_client.post("/hr-tasks/send", json=body)
+        assert response.status_code == 400, body
+    response = employee_client.post("/tasks/send", json={"query": "all salaries", "page_size": 5, "cursor": cursor})
+    assert response.status_code == 400
+    # The original request still accepts it
+    response = hr_client.post("/hr-tasks/send", json={"query": "all salaries", "page_size": 5, "cursor": cursor})
+    assert response.status_code == 200
+
+@pytest.mark.parametrize("body", [
+    {"query": "all salaries", "page_size": 0},
+    {"query": "all salaries", "page_size": "10"},
+    {"query": "all salaries", "page_size": pagination.PAGE_SIZE_MAX + 1},
+    {"query": "all salaries", "cursor": "abc"},
+    {"query": "all salaries", "page_size": 5, "cursor": "%%%"}
+])
+def test_bad_paging_is_400(hr_client, body):
+    assert hr_client.post("/hr-tasks/send", json=body).status_code == 400
+
+def test_page_cache_is_bounded(hr_client, monkeypatch):
+    monkeypatch.setattr(pagination, "PAGE_CACHE_SIZE", 2)
+    pagination._page_rows.clear()
+    for key in ("employee_id", "base_salary", "currency"):
+        hr_client.post("/hr-tasks/send", json={"query": "all salaries", "order_by": key, "page_size": 5})
+    assert len(pagination._page_rows) == 2
+    pagination._page_rows.clear()
+
+def test_ndjson_stream(employee_client):
+    body = {"query": "all employees", "order_by": "-id", "limit": 12}
+    expected = employee_client.post("/tasks/send", json=body).json()["results"]
+    response = employee_client.post("/tasks/send", json={**body, "stream": True})
+    assert response.headers["content-type"].startswith(pagination.NDJSON_TYPE)
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
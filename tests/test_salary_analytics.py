@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+import salary_analytics
+from salary_analytics import AnalyticsError, SalaryStore, run_analytics
+from synthetic_data import generate_dataset
+
+@pytest.fixture(scope="module")
+def store(dataset):
+    return SalaryStore(dataset["salaries"], dataset["employees"], reporting_currency="USD")
+
+def full_sort(store, ascending):
+    """Ranking by a plain sort of every valid row: (employee_id, normalized) in rank order."""
+    rows = [(int(e), float(v)) for e, v in zip(store.employee_id, store.normalized) if not np.isnan(v)]
+    return sorted(rows, key=lambda r: r[1] if ascending else -r[1])
+
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("n", [1, 3, 10, 39, 40, 100, None])
+def test_rank_matches_full_sort(store, n, ascending):
+    ranked = store.rank(n=n, ascending=ascending)
+    expected = full_sort(store, ascending)[:n]
+    assert [r["rank"] for r in ranked] == list(range(1, len(expected) + 1))
+    assert [r["salary_usd"] for r in ranked] == [round(v, 2) for _, v in expected]
+    # Ties may come back in either order, but the same rows are selected
+    assert sorted(r["employee_id"] for r in ranked) == sorted(e for e, _ in expected)
+
+def test_rank_synthetic_top_k():
+    data = generate_dataset(5000, seed=3)
+    store = SalaryStore(data["salaries"], data["employees"], reporting_currency="EUR")
+    ranked = store.rank(n=25)
+    expected = full_sort(store, False)[:25]
+    assert [r["salary_eur"] for r in ranked] == [round(v, 2) for _, v in expected]
+
+@pytest.mark.parametrize("group_by", ["currency", "country", "job_role"])
+def test_aggregate_percentiles_match_numpy(store, group_by):
+    percentiles = (0, 10, 25, 33.3, 75, 90, 99, 100)
+    rows = store.aggregate(group_by=group_by, percentiles=percentiles)
+    labels = {"currency": store.currencies, "country": store.countries, "job_role": store.job_roles}[group_by]
+    codes = getattr(store, group_by)
+    assert sum(r["count"] for r in rows) == int((~np.isnan(store.normalized)).sum())
+    for row in rows:
+        values = store.normalized[(codes == labels.index(row[group_by])) & ~np.isnan(store.normalized)]
+        assert row["count"] == len(values)
+        assert row["min"] == round(float(values.min()), 2)
+        assert row["max"] == round(float(values.max()), 2)
+        assert row["mean"] == pytest.approx(float(values.mean()), abs=0.01)
+        assert row["median"] == pytest.approx(float(np.percentile(values, 50)), abs=0.01)
+        for p in percentiles:
+            assert row[f"p{p:g}"] == pytest.approx(float(np.percentile(values, p)), abs=0.01), (row[group_by], p)
+
+def test_aggregate_raw_amounts_per_currency(store, dataset):
+    rows = store.aggregate(group_by="currency", normalized=False)
+    for row in rows:
+        amounts = [s["base_salary"] for s in dataset["salaries"] if s["currency"] == row["currency"]]
+        assert row["unit"] == row["currency"]
+        assert row["median"] == pytest.approx(float(np.percentile(amounts, 50)), abs=0.01)
+
+def test_unknown_currency_is_left_out():
+    salaries = [
+        {"employee_id": 1, "base_salary": 100.0, "currency": "USD", "bonus_eligibility": True},
+        {"employee_id": 2, "base_salary": 5.0, "currency": "XXX", "bonus_eligibility": False},
+        {"employee_id": 3, "base_salary": 300.0, "currency": "USD", "bonus_eligibility": False}
+    ]
+    store = SalaryStore(salaries, reporting_currency="USD")
+    assert [r["employee_id"] for r in store.rank(n=None)] == [3, 1]
+    assert [r["currency"] for r in store.aggregate()] == ["USD"]
+    assert sum(b["count"] for b in store.histogram(bins=4)) == 2
+
+def test_histogram_matches_numpy(store):
+    bins = store.histogram(bins=7)
+    counts, _ = np.histogram(store.normalized[~np.isnan(store.normalized)], bins=7)
+    assert [b["count"] for b in bins] == counts.tolist()
+
+@pytest.mark.parametrize("options", [
+    "rank",
+    {"mode": "median"},
+    {"mode": "rank", "n": 0},
+    {"mode": "rank", "n": True},
+    {"mode": "rank", "n": "5"},
+    {"mode": "histogram", "bins": 0},
+    {"mode": "aggregate", "percentiles": [101]},
+    {"mode": "aggregate", "percentiles": "50"},
+    {"mode": "aggregate", "group_by": "name"},
+    {"mode": "aggregate", "group_by": "country", "normalized": False}
+])
+def test_invalid_options_raise(store, options):
+    with pytest.raises(AnalyticsError):
+        run_analytics(store, options)
+
+def test_parse_analytics_options():
+    assert salary_analytics.parse_analytics_options("top 3 salaries") == {"mode": "rank", "ascending": False, "n": 3}
+    assert salary_analytics.parse_analytics_options("lowest paid by country") == {
+        "mode": "rank", "ascending": True, "group_by": "country"}
+    assert salary_analytics.parse_analytics_options("salary distribution")["mode"] == "histogram"
+    assert salary_analytics.parse_analytics_options("median salary per role") == {"mode": "aggregate", "group_by": "job_role"}
+
+@pytest.mark.parametrize("analytics", [{"mode": "rank", "n": -1}, {"mode": "nope"}, [1, 2]])
+def test_invalid_options_are_400(hr_client, analytics):
+    response = hr_client.post("/hr-tasks/send", json={"query": "salaries", "query_type": "salary_analytics", "analytics": analytics})
+    assert response.status_code == 400
+
+def test_rank_over_http(hr_client, store):
+    response = hr_client.post("/hr-tasks/send", json={"query": "salaries", "query_type": "salary_analytics", "analytics": {"mode": "rank", "n": 3}})
+    assert response.status_code == 200
+    assert [r["employee_id"] for r in response.json()["results"]] == [r["employee_id"] for r in store.rank(n=3)]
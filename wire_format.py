@@ -0,0 +1,116 @@
+"""Content negotiation for agent responses: JSON (orjson when installed) or msgpack, optionally compressed.
+
+Servers call `encode_response(request, data)`; the body format follows the request's `Accept`
+header (`application/msgpack` opts in, anything else gets JSON) and bodies of at least
+`WIRE_COMPRESS_MIN_BYTES` are compressed with zstd or gzip, whichever `Accept-Encoding` allows
+(zstd first). Clients call `decode_response(response)`; httpx already advertises and undoes
+gzip and zstd, so only the body format needs handling there.
+
+orjson, msgpack and zstandard are optional: without them responses fall back to stdlib JSON,
+msgpack requests get JSON, and only gzip is offered.
+"""
+
+import os
+import gzip
+import json
+import importlib.util
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Wire settings (override via .env)
+WIRE_COMPRESS_MIN_BYTES = int(os.getenv('WIRE_COMPRESS_MIN_BYTES', '4096'))  # 0 disables compression
+WIRE_GZIP_LEVEL = int(os.getenv('WIRE_GZIP_LEVEL', '5'))
+WIRE_ZSTD_LEVEL = int(os.getenv('WIRE_ZSTD_LEVEL', '3'))
+
+JSON_TYPE = "application/json"
+MSGPACK_TYPE = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK_TYPE, "application/x-msgpack")
+# Request headers a response body depends on; sent on 200s and on their 304s
+VARY = "Accept, Accept-Encoding"
+
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+HAS_MSGPACK = importlib.util.find_spec("msgpack") is not None
+HAS_ZSTD = importlib.util.find_spec("zstandard") is not None
+
+if HAS_ORJSON:
+    import orjson
+if HAS_MSGPACK:
+    import msgpack
+if HAS_ZSTD:
+    import zstandard
+
+def dumps_json(data: Any) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads_json(body: bytes) -> Any:
+    return orjson.loads(body) if HAS_ORJSON else json.loads(body)
+
+def _accepts(header: Optional[str], token: str) -> bool:
+    """True when a comma-separated Accept/Accept-Encoding header lists `token` without q=0."""
+    for part in (header or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip() == token:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def negotiate_format(accept: Optional[str]) -> str:
+    if HAS_MSGPACK and any(_accepts(accept, t) for t in MSGPACK_TYPES):
+        return MSGPACK_TYPE
+    return JSON_TYPE
+
+def negotiate_encoding(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    if not WIRE_COMPRESS_MIN_BYTES or size < WIRE_COMPRESS_MIN_BYTES:
+        return None
+    if HAS_ZSTD and _accepts(accept_encoding, "zstd"):
+        return "zstd"
+    if _accepts(accept_encoding, "gzip"):
+        return "gzip"
+    return None
+
+def encode(data: Any, media_type: str = JSON_TYPE) -> bytes:
+    if media_type == MSGPACK_TYPE:
+        return msgpack.packb(data, use_bin_type=True)
+    return dumps_json(data)
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=WIRE_ZSTD_LEVEL).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=WIRE_GZIP_LEVEL, mtime=0)
+    return body
+
+def encode_body(data: Any, accept: Optional[str], accept_encoding: Optional[str]) -> Tuple[bytes, Dict[str, str]]:
+    """Negotiated body and its headers (Content-Type, Content-Encoding, Vary)."""
+    media_type = negotiate_format(accept)
+    body = encode(data, media_type)
+    encoding = negotiate_encoding(accept_encoding, len(body))
+    headers = {"Content-Type": media_type, "Vary": VARY}
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
+
+def encode_response(request, data: Any):
+    """FastAPI Response for `data` in the format and compression the request accepts."""
+    from fastapi import Response
+    body, headers = encode_body(data, request.headers.get("accept"), request.headers.get("accept-encoding"))
+    media_type = headers.pop("Content-Type")
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def accept_header(prefer_msgpack: bool = False) -> str:
+    """Accept header for agent requests; msgpack is listed only when it can be decoded."""
+    if prefer_msgpack and HAS_MSGPACK:
+        return f"{MSGPACK_TYPE}, {JSON_TYPE};q=0.9"
+    return JSON_TYPE
+
+def decode_response(response) -> Any:
+    """Parse an httpx response body by its Content-Type (content encoding is already undone by httpx)."""
+    content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in MSGPACK_TYPES:
+        return msgpack.unpackb(response.content, raw=False)
+    return loads_json(response.content)